@@ -1,6 +1,8 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import os
+
 from pydantic import field_validator
 from pydantic_settings import NoDecode
 from typing_extensions import Annotated
@@ -17,9 +19,15 @@ class AppConfiguration(ModelBaseSettings):
         app_storage_queue_url (str): The URL of the Azure Storage Queue.
         app_storage_blob_url (str): The URL of the Azure Storage Blob.
         app_process_steps (list[str]): The list of process steps to be executed.
-        app_message_queue_interval (int): The interval for the message queue.
+        app_pipeline_execution_mode (str): "queue" to run every step in its own process with its own queue,
+            "fused" to run all the steps in a single process, passing the data pipeline in memory.
+        app_message_queue_interval (int): The interval for the message queue. The first wait time when the queue is idle.
+        app_message_queue_max_interval (int): The longest wait time between polls when the queue stays idle.
         app_message_queue_visibility_timeout (int): The visibility timeout for the message queue.
         app_message_queue_process_timeout (int): The process timeout for the message queue.
+        app_message_queue_max_in_flight (int): The number of messages processed concurrently per handler process.
+            It can be overridden per step with APP_<STEP>_MAX_IN_FLIGHT (ex. APP_EXTRACT_MAX_IN_FLIGHT).
+            It also bounds the number of messages dequeued in one call. Defaults to 8.
         app_logging_enable (bool): Flag to enable or disable logging.
         app_logging_level (str): The logging level to be used.
         app_cps_processes (str): Folder name CPS processes name in Blob Container.
@@ -31,14 +39,35 @@ class AppConfiguration(ModelBaseSettings):
         app_cosmos_database (str): The name of the Cosmos DB database.
         app_cosmos_container_process (str): The name of the Cosmos DB container for process data.
         app_cosmos_container_schema (str): The name of the Cosmos DB container for schema data.
+        app_artifact_cache_tier (str): The local tier in front of the blob storage for the step files, "memory", "disk" or "none".
+        app_artifact_cache_max_bytes (int): The size of the local artifact tier.
+        app_artifact_cache_folder (str): The local folder of the disk artifact tier, empty for a temporary folder.
+        app_content_understanding_cache_enable (bool): Flag to reuse the cached Content Understanding result of an identical file.
+        app_content_understanding_cache_ttl (int): The lifetime in seconds of a cached Content Understanding result, 0 for no expiration.
+        app_content_understanding_cache_max_bytes (int): The size of the Content Understanding result cache, 0 for no limit.
+        app_map_pdf_dpi (int): The resolution used to render PDF pages for the map step.
+        app_map_pdf_max_pages (int): The number of PDF pages rendered for the map step, 0 for all pages.
+        app_map_pdf_thread_count (int): The number of poppler workers rendering PDF pages in parallel.
+        app_map_page_cache_enable (bool): Flag to cache the rendered PDF pages in the blob storage.
+        app_map_page_cache_ttl (int): The lifetime in seconds of the cached rendered PDF pages, 0 for no expiration.
+        app_map_image_optimize_enable (bool): Flag to downscale the prompt images to the tile grid of the model.
+        app_map_image_jpeg_quality (int): The JPEG quality of the prompt images, 0 to keep PNG.
+        app_map_image_max_total_bytes (int): The byte budget of all the images in a prompt, 0 for no budget.
+        app_map_response_cache_enable (bool): Flag to reuse the cached GPT response of an identical prompt.
+        app_map_response_cache_backend (str): The backend of the GPT response cache, "disk" or "blob".
+        app_map_response_cache_folder (str): The local folder of the disk cache, empty for a temporary folder.
+        app_map_response_cache_max_bytes (int): The size of the disk cache, 0 for no limit.
     """
 
     app_storage_queue_url: str
     app_storage_blob_url: str
     app_process_steps: Annotated[list[str], NoDecode]
+    app_pipeline_execution_mode: str = "queue"
     app_message_queue_interval: int
+    app_message_queue_max_interval: int = 60
     app_message_queue_visibility_timeout: int
     app_message_queue_process_timeout: int
+    app_message_queue_max_in_flight: int = 8
     app_logging_enable: bool
     app_logging_level: str
     app_cps_processes: str
@@ -50,6 +79,24 @@ class AppConfiguration(ModelBaseSettings):
     app_cosmos_database: str
     app_cosmos_container_process: str
     app_cosmos_container_schema: str
+    app_artifact_cache_tier: str = "none"
+    app_artifact_cache_max_bytes: int = 512 * 1024 * 1024
+    app_artifact_cache_folder: str = ""
+    app_content_understanding_cache_enable: bool = True
+    app_content_understanding_cache_ttl: int = 7 * 24 * 60 * 60
+    app_content_understanding_cache_max_bytes: int = 1024 * 1024 * 1024
+    app_map_pdf_dpi: int = 200
+    app_map_pdf_max_pages: int = 0
+    app_map_pdf_thread_count: int = 4
+    app_map_page_cache_enable: bool = False
+    app_map_page_cache_ttl: int = 7 * 24 * 60 * 60
+    app_map_image_optimize_enable: bool = False
+    app_map_image_jpeg_quality: int = 0
+    app_map_image_max_total_bytes: int = 10 * 1024 * 1024
+    app_map_response_cache_enable: bool = False
+    app_map_response_cache_backend: str = "blob"
+    app_map_response_cache_folder: str = ""
+    app_map_response_cache_max_bytes: int = 512 * 1024 * 1024
 
     @field_validator("app_process_steps", mode="before")
     @classmethod
@@ -57,3 +104,20 @@ class AppConfiguration(ModelBaseSettings):
         if isinstance(v, str):
             return [x for x in v.split(",")]
         return v
+
+    def get_step_max_in_flight(self, step_name: str) -> int:
+        """
+        Get the number of messages processed concurrently for the given step.
+        APP_<STEP>_MAX_IN_FLIGHT takes precedence over app_message_queue_max_in_flight.
+
+        Args:
+            step_name (str): The name of the step in the pipeline.
+
+        Returns:
+            int: The number of messages to keep in flight, at least 1.
+        """
+        step_value = os.environ.get(f"APP_{step_name.upper()}_MAX_IN_FLIGHT")
+        max_in_flight = (
+            int(step_value) if step_value else self.app_message_queue_max_in_flight
+        )
+        return max(1, max_in_flight)
@@ -0,0 +1,24 @@
+from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
+from openai import AsyncAzureOpenAI
+
+from libs.azure_helper.aio.loop_pool import LoopPool
+
+# The clients of the running event loop by endpoint
+_loop_clients: LoopPool[dict[str, AsyncAzureOpenAI]] = LoopPool(dict)
+
+
+def get_openai_client(azure_openai_endpoint: str) -> AsyncAzureOpenAI:
+    clients = _loop_clients.get()
+    client = clients.get(azure_openai_endpoint)
+    if client is None:
+        credential = DefaultAzureCredential()
+        token_provider = get_bearer_token_provider(
+            credential, "https://cognitiveservices.azure.com/.default"
+        )
+        client = AsyncAzureOpenAI(
+            azure_endpoint=azure_openai_endpoint,
+            azure_ad_token_provider=token_provider,
+            api_version="2024-10-01-preview",
+        )
+        clients[azure_openai_endpoint] = client
+    return client
@@ -0,0 +1,123 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+from typing import Any, Dict
+
+import certifi
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from libs.azure_helper.aio.loop_pool import LoopPool
+
+
+class _ClientPool:
+    def __init__(self):
+        self.mongo_clients: dict[str, AsyncMongoClient] = {}
+        self.prepared_containers: dict[tuple[str, str, str], set] = {}
+
+
+_loop_pools: LoopPool[_ClientPool] = LoopPool(_ClientPool)
+
+
+def _get_mongo_client(connection_string: str) -> AsyncMongoClient:
+    pool = _loop_pools.get()
+    mongo_client = pool.mongo_clients.get(connection_string)
+    if mongo_client is None:
+        # MongoClient need to get Certificate but in Container,
+        # it doesn't have native certificate so we need to add it othwerwise the connection will be fail
+        mongo_client = AsyncMongoClient(connection_string, tlsCAFile=certifi.where())
+        pool.mongo_clients[connection_string] = mongo_client
+    return mongo_client
+
+
+async def close_client_pool():
+    """
+    Close the shared MongoClients of the running event loop.
+    """
+    pool = _loop_pools.pop()
+    if pool is None:
+        return
+
+    for mongo_client in pool.mongo_clients.values():
+        await mongo_client.close()
+
+
+class CosmosMongDBHelper:
+    """
+    Async variant of libs.azure_helper.comsos_mongo.CosmosMongDBHelper.
+
+    The collection and its indexes are bootstrapped on the first awaited operation,
+    once per collection in the running event loop.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        db_name: str,
+        container_name: str,
+        indexes: list = None,
+    ):
+        self.connection_string = connection_string
+        self.client: AsyncMongoClient = _get_mongo_client(connection_string)
+        self.db: AsyncDatabase = self.client[db_name]
+        self.container: AsyncCollection = self.db[container_name]
+
+        self._db_name = db_name
+        self._container_name = container_name
+        self._indexes = indexes or []
+
+    async def _prepare(self):
+        """
+        Create the container and the indexes if they don't exist.
+        """
+        prepared_containers = _loop_pools.get().prepared_containers
+        key = (self.connection_string, self._db_name, self._container_name)
+
+        prepared_indexes = prepared_containers.get(key)
+        if prepared_indexes is None:
+            await self._create_container(self.db, self._container_name)
+            prepared_indexes = set()
+
+        missing_indexes = [
+            index for index in self._indexes if index not in prepared_indexes
+        ]
+        if missing_indexes:
+            await self._create_indexes(self.container, missing_indexes)
+
+        prepared_containers[key] = prepared_indexes.union(missing_indexes)
+
+    async def _create_container(
+        self, database: AsyncDatabase, container_name: str
+    ) -> AsyncCollection:
+        if container_name not in await database.list_collection_names():
+            await database.create_collection(container_name)
+        return database[container_name]
+
+    async def _create_indexes(self, container: AsyncCollection, fields):
+        existing_indexes = await container.index_information()
+        for field in fields:
+            if f"{field}_1" not in existing_indexes:
+                await container.create_index([(field, 1)])
+
+    async def insert_document(self, document: Dict[str, Any]):
+        await self._prepare()
+        result = await self.container.insert_one(document)
+        return result
+
+    async def find_document(self, query: Dict[str, Any], sort_fields=None):
+        await self._prepare()
+        cursor = self.container.find(query)
+        if sort_fields:
+            cursor = cursor.sort(sort_fields)
+        return await cursor.to_list()
+
+    async def update_document(self, filter: Dict[str, Any], update: Dict[str, Any]):
+        await self._prepare()
+        result = await self.container.update_one(filter, {"$set": update})
+        return result
+
+    async def delete_document(self, item_id: str):
+        await self._prepare()
+        result = await self.container.delete_one({"Id": item_id})
+        return result
@@ -0,0 +1,438 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+
+import httpx
+from azure.core.credentials import AccessToken
+from azure.identity.aio import DefaultAzureCredential
+
+from libs.azure_helper.aio.loop_pool import LoopPool
+from libs.azure_helper.content_understanding import (
+    COGNITIVE_SERVICES_SCOPE,
+    TOKEN_REFRESH_MARGIN_SECONDS,
+    PollingSchedule,
+)
+
+
+class CachedTokenProvider:
+    """
+    Caches the access token of an async credential and refreshes it shortly before it expires.
+    """
+
+    def __init__(
+        self,
+        credential: DefaultAzureCredential,
+        scope: str = COGNITIVE_SERVICES_SCOPE,
+        refresh_margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS,
+    ):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._token: AccessToken = None
+        self._lock = asyncio.Lock()
+
+    def _needs_refresh(self) -> bool:
+        return (
+            self._token is None
+            or self._token.expires_on - self.refresh_margin_seconds <= time.time()
+        )
+
+    async def get_token(self) -> str:
+        """
+        Get a valid access token, requesting a new one only when the cached token is about to expire.
+
+        Returns:
+            str: The access token.
+        """
+        # Concurrent requests wait for a single token request instead of sending their own
+        async with self._lock:
+            if self._needs_refresh():
+                self._token = await self.credential.get_token(self.scope)
+            return self._token.token
+
+
+class _ClientPool:
+    def __init__(self):
+        self.token_provider = CachedTokenProvider(DefaultAzureCredential())
+        # Keep-alive connections are reused by every request of the event loop
+        self.http_client = httpx.AsyncClient(timeout=httpx.Timeout(60.0))
+
+
+_loop_pools: LoopPool[_ClientPool] = LoopPool(_ClientPool)
+
+
+async def close_client_pool():
+    """
+    Close the shared credential and HTTP client of the running event loop.
+    """
+    pool = _loop_pools.pop()
+    if pool is None:
+        return
+
+    await pool.http_client.aclose()
+    await pool.token_provider.credential.close()
+
+
+class AzureContentUnderstandingHelper:
+    """
+    Async variant of libs.azure_helper.content_understanding.AzureContentUnderstandingHelper.
+
+    Requests are sent with a shared httpx.AsyncClient, so waiting for the service
+    doesn't block the event loop of the handler.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_version: str = "2024-12-01-preview",
+        x_ms_useragent: str = "cps-contentunderstanding/client",
+    ):
+        if not api_version:
+            raise ValueError("API version must be provided.")
+        if not endpoint:
+            raise ValueError("Endpoint must be provided.")
+
+        pool = _loop_pools.get()
+        self._token_provider = pool.token_provider
+        self.credential = self._token_provider.credential
+        self._http_client = pool.http_client
+
+        self._endpoint = endpoint.rstrip("/")
+        self._api_version = api_version
+        self._x_ms_useragent = x_ms_useragent
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def api_version(self) -> str:
+        return self._api_version
+
+    def _get_analyzer_url(self, endpoint, api_version, analyzer_id):
+        return f"{endpoint}/contentunderstanding/analyzers/{analyzer_id}?api-version={api_version}"  # noqa
+
+    def _get_analyzer_list_url(self, endpoint, api_version):
+        return f"{endpoint}/contentunderstanding/analyzers?api-version={api_version}"
+
+    def _get_analyze_url(self, endpoint, api_version, analyzer_id):
+        return f"{endpoint}/contentunderstanding/analyzers/{analyzer_id}:analyze?api-version={api_version}"  # noqa
+
+    def _get_training_data_config(
+        self, storage_container_sas_url, storage_container_path_prefix
+    ):
+        return {
+            "containerUrl": storage_container_sas_url,
+            "kind": "blob",
+            "prefix": storage_container_path_prefix,
+        }
+
+    async def _get_headers(self) -> dict:
+        """Returns the headers for the HTTP requests.
+        Returns:
+            dict: A dictionary containing the headers for the HTTP requests.
+        """
+        # Built for every request so a refreshed token is picked up
+        return {
+            "Authorization": f"Bearer {await self._token_provider.get_token()}",
+            "x-ms-useragent": self._x_ms_useragent,
+        }
+
+    async def get_all_analyzers(self):
+        """
+        Retrieves a list of all available analyzers from the content understanding service.
+
+        Returns:
+            dict: The JSON response from the service, which includes the list of available analyzers.
+
+        Raises:
+            httpx.HTTPStatusError: If the HTTP request returned an unsuccessful status code.
+        """
+        response = await self._http_client.get(
+            self._get_analyzer_list_url(self._endpoint, self._api_version),
+            headers=await self._get_headers(),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def get_analyzer_detail_by_id(self, analyzer_id):
+        """
+        Retrieves a specific analyzer detail through analyzerid from the content understanding service.
+
+        Args:
+            analyzer_id (str): The unique identifier for the analyzer.
+
+        Returns:
+            dict: The JSON response from the service, which includes the target analyzer detail.
+
+        Raises:
+            httpx.HTTPStatusError: If the request fails.
+        """
+        response = await self._http_client.get(
+            self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
+            headers=await self._get_headers(),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def begin_create_analyzer(
+        self,
+        analyzer_id: str,
+        analyzer_template: dict = None,
+        analyzer_template_path: str = "",
+        training_storage_container_sas_url: str = "",
+        training_storage_container_path_prefix: str = "",
+    ):
+        """
+        Initiates the creation of an analyzer with the given ID and schema.
+
+        Args:
+            analyzer_id (str): The unique identifier for the analyzer.
+            analyzer_template (dict, optional): The schema definition for the analyzer. Defaults to None.
+            analyzer_template_path (str, optional): The file path to the analyzer schema JSON file. Defaults to "".
+            training_storage_container_sas_url (str, optional): The SAS URL for the training storage container. Defaults to "".
+            training_storage_container_path_prefix (str, optional): The path prefix within the training storage container. Defaults to "".
+
+        Raises:
+            ValueError: If neither `analyzer_template` nor `analyzer_template_path` is provided.
+            httpx.HTTPStatusError: If the HTTP request to create the analyzer fails.
+
+        Returns:
+            httpx.Response: The response object from the HTTP request.
+        """
+        if analyzer_template_path and Path(analyzer_template_path).exists():
+            with open(analyzer_template_path, "r") as file:
+                analyzer_template = json.load(file)
+
+        if not analyzer_template:
+            raise ValueError("Analyzer schema must be provided.")
+
+        if (
+            training_storage_container_sas_url
+            and training_storage_container_path_prefix
+        ):  # noqa
+            analyzer_template["trainingData"] = self._get_training_data_config(
+                training_storage_container_sas_url,
+                training_storage_container_path_prefix,
+            )
+
+        headers = {"Content-Type": "application/json"}
+        headers.update(await self._get_headers())
+
+        response = await self._http_client.put(
+            self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
+            headers=headers,
+            json=analyzer_template,
+        )
+        response.raise_for_status()
+        self._logger.info(f"Analyzer {analyzer_id} create request accepted.")
+        return response
+
+    async def delete_analyzer(self, analyzer_id: str):
+        """
+        Deletes an analyzer with the specified analyzer ID.
+
+        Args:
+            analyzer_id (str): The ID of the analyzer to be deleted.
+
+        Returns:
+            httpx.Response: The response object from the delete request.
+
+        Raises:
+            httpx.HTTPStatusError: If the delete request fails.
+        """
+        response = await self._http_client.delete(
+            self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
+            headers=await self._get_headers(),
+        )
+        response.raise_for_status()
+        self._logger.info(f"Analyzer {analyzer_id} deleted.")
+        return response
+
+    async def begin_analyze_stream(self, analyzer_id: str, file_stream: bytes):
+        """
+        Begins the analysis of a file stream using the specified analyzer.
+
+        Args:
+            analyzer_id (str): The ID of the analyzer to use.
+            file_stream (bytes): The byte stream of the file to analyze.
+
+        Returns:
+            httpx.Response: The response from the analysis request.
+
+        Raises:
+            httpx.HTTPStatusError: If the HTTP request returned an unsuccessful status code.
+        """
+        headers = {"Content-Type": "application/octet-stream"}
+        headers.update(await self._get_headers())
+        response = await self._http_client.post(
+            self._get_analyze_url(self._endpoint, self._api_version, analyzer_id),
+            headers=headers,
+            content=file_stream,
+        )
+
+        response.raise_for_status()
+        self._logger.info(f"Analyzing file with analyzer: {analyzer_id}")
+        return response
+
+    async def begin_analyze(self, analyzer_id: str, file_location: str):
+        """
+        Begins the analysis of a file or URL using the specified analyzer.
+
+        Args:
+            analyzer_id (str): The ID of the analyzer to use.
+            file_location (str): The path to the file or the URL to analyze.
+
+        Returns:
+            httpx.Response: The response from the analysis request.
+
+        Raises:
+            ValueError: If the file location is not a valid path or URL.
+            httpx.HTTPStatusError: If the HTTP request returned an unsuccessful status code.
+        """
+        if Path(file_location).exists():
+            with open(file_location, "rb") as file:
+                request_arguments = {"content": file.read()}
+            headers = {"Content-Type": "application/octet-stream"}
+        elif "https://" in file_location or "http://" in file_location:
+            request_arguments = {"json": {"url": file_location}}
+            headers = {"Content-Type": "application/json"}
+        else:
+            raise ValueError("File location must be a valid path or URL.")
+
+        headers.update(await self._get_headers())
+        response = await self._http_client.post(
+            self._get_analyze_url(self._endpoint, self._api_version, analyzer_id),
+            headers=headers,
+            **request_arguments,
+        )
+
+        response.raise_for_status()
+        self._logger.info(
+            f"Analyzing file {file_location} with analyzer: {analyzer_id}"
+        )
+        return response
+
+    async def get_image_from_analyze_operation(
+        self, analyze_response: httpx.Response, image_id: str
+    ):
+        """Retrieves an image from the analyze operation using the image ID.
+        Args:
+            analyze_response (httpx.Response): The response object from the analyze operation.
+            image_id (str): The ID of the image to retrieve.
+        Returns:
+            bytes: The image content as a byte string.
+        """
+        operation_location = analyze_response.headers.get("operation-location", "")
+        if not operation_location:
+            raise ValueError(
+                "Operation location not found in the analyzer response header."
+            )
+        operation_location = operation_location.split("?api-version")[0]
+        image_retrieval_url = (
+            f"{operation_location}/images/{image_id}?api-version={self._api_version}"
+        )
+        try:
+            response = await self._http_client.get(
+                image_retrieval_url, headers=await self._get_headers()
+            )
+            response.raise_for_status()
+
+            assert response.headers.get("Content-Type") == "image/jpeg"
+
+            return response.content
+        except httpx.HTTPError as e:
+            print(f"HTTP request failed: {e}")
+            return None
+
+    async def poll_result(
+        self,
+        response: httpx.Response,
+        timeout_seconds: int = 120,
+        polling_interval_seconds: float = 2,
+        initial_polling_interval_seconds: float = 0.25,
+    ):
+        """
+        Polls the result of an asynchronous operation until it completes or times out.
+
+        The polling interval starts at initial_polling_interval_seconds and doubles up to
+        polling_interval_seconds, unless the service hints a Retry-After.
+        Waiting between polls doesn't block the event loop.
+
+        Args:
+            response (httpx.Response): The initial response object containing the operation location.
+            timeout_seconds (int, optional): The maximum number of seconds to wait for the operation to complete. Defaults to 120.
+            polling_interval_seconds (float, optional): The longest number of seconds to wait between polling attempts. Defaults to 2.
+            initial_polling_interval_seconds (float, optional): The number of seconds to wait before the first polling attempt. Defaults to 0.25.
+
+        Raises:
+            ValueError: If the operation location is not found in the response headers.
+            TimeoutError: If the operation does not complete within the specified timeout.
+            RuntimeError: If the operation fails.
+
+        Returns:
+            dict: The JSON response of the completed operation if it succeeds.
+        """
+        operation_location = response.headers.get("operation-location", "")
+        if not operation_location:
+            raise ValueError("Operation location not found in response headers.")
+
+        operation_id = operation_location.split("/")[-1].split("?")[0]
+        schedule = PollingSchedule(
+            initial_interval=initial_polling_interval_seconds,
+            max_interval=polling_interval_seconds,
+        )
+
+        start_time = time.monotonic()
+        poll_count = 0
+        while True:
+            elapsed_time = time.monotonic() - start_time
+            if elapsed_time > timeout_seconds:
+                raise TimeoutError(
+                    f"Operation timed out after {timeout_seconds:.2f} seconds."
+                )
+
+            await asyncio.sleep(
+                schedule.next_interval(
+                    response.headers, timeout_seconds - elapsed_time
+                )
+            )
+
+            response = await self._http_client.get(
+                operation_location, headers=await self._get_headers()
+            )
+            response.raise_for_status()
+            poll_count += 1
+
+            # Parse the response only once per poll
+            result = response.json()
+            status = result.get("status", "").lower()
+            if status == "succeeded":
+                self._log_poll_metrics(
+                    operation_id, status, time.monotonic() - start_time, poll_count
+                )
+                return result
+            elif status == "failed":
+                self._log_poll_metrics(
+                    operation_id, status, time.monotonic() - start_time, poll_count
+                )
+                self._logger.error(f"Request failed. Reason: {result}")
+                raise RuntimeError("Request failed.")
+            else:
+                self._logger.info(f"Request {operation_id} in progress ...")
+
+    def _log_poll_metrics(
+        self, operation_id: str, status: str, elapsed_time: float, poll_count: int
+    ):
+        self._logger.info(
+            f"Request {operation_id} {status} after {elapsed_time:.2f} seconds "
+            f"and {poll_count} polls.",
+            extra={
+                "operation_id": operation_id,
+                "operation_status": status,
+                "operation_latency_seconds": round(elapsed_time, 3),
+                "operation_poll_count": poll_count,
+            },
+        )
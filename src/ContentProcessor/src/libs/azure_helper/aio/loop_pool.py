@@ -0,0 +1,39 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import asyncio
+import weakref
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopPool(Generic[T]):
+    """
+    Shared clients pooled per running event loop.
+
+    Async clients are bound to the event loop that created them, so every event loop
+    gets its own pool, created on first use. The pool of a closed event loop is
+    released with the loop.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def get(self) -> T:
+        """
+        Get the pool of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._factory()
+            self._pools[loop] = pool
+        return pool
+
+    def pop(self) -> T | None:
+        """
+        Remove the pool of the running event loop, None when it has not been used.
+        """
+        return self._pools.pop(asyncio.get_running_loop(), None)
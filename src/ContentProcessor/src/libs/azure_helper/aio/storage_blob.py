@@ -0,0 +1,237 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import base64
+from typing import IO, Iterable, Union
+
+from azure.core.exceptions import ResourceExistsError
+from azure.identity.aio import DefaultAzureCredential
+from azure.storage.blob import BlobBlock, BlobProperties
+from azure.storage.blob.aio import BlobServiceClient
+
+from libs.azure_helper.aio.loop_pool import LoopPool
+
+# Size of the blocks staged by upload_chunks
+UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class _ClientPool:
+    def __init__(self):
+        self.credential: DefaultAzureCredential = None
+        self.blob_service_clients: dict[str, BlobServiceClient] = {}
+        self.verified_containers: set[tuple[str, str]] = set()
+
+
+_loop_pools: LoopPool[_ClientPool] = LoopPool(_ClientPool)
+
+
+def _get_blob_service_client(account_url: str) -> BlobServiceClient:
+    pool = _loop_pools.get()
+    if pool.credential is None:
+        pool.credential = DefaultAzureCredential()
+
+    blob_service_client = pool.blob_service_clients.get(account_url)
+    if blob_service_client is None:
+        blob_service_client = BlobServiceClient(
+            account_url=account_url, credential=pool.credential
+        )
+        pool.blob_service_clients[account_url] = blob_service_client
+    return blob_service_client
+
+
+async def close_client_pool():
+    """
+    Close the shared credential and clients of the running event loop.
+    """
+    pool = _loop_pools.pop()
+    if pool is None:
+        return
+
+    for blob_service_client in pool.blob_service_clients.values():
+        await blob_service_client.close()
+    if pool.credential is not None:
+        await pool.credential.close()
+
+
+class StorageBlobHelper:
+    """
+    Async variant of libs.azure_helper.storage_blob.StorageBlobHelper.
+
+    The helper exposes the same methods as the synchronous helper as coroutines.
+    It has to be created and used inside a running event loop.
+    """
+
+    blob_service_client: BlobServiceClient = None
+
+    @staticmethod
+    def get(account_url: str, container_name: str = None):
+        return StorageBlobHelper(account_url=account_url, container_name=container_name)
+
+    def __init__(self, account_url: str, container_name=None):
+        self.blob_service_client = _get_blob_service_client(account_url)
+        self.parent_container_name = container_name
+
+    async def _invalidate_container(self):
+        if not self.parent_container_name:
+            return
+
+        # if containeer_name is provided, "container_name/folder name" is used, get container_name
+        # and create container if not exists
+        container_name = self.parent_container_name.split("/")[0]
+
+        # Containers are only checked once per account in this event loop
+        verified_containers = _loop_pools.get().verified_containers
+        key = (self.blob_service_client.url, container_name)
+        if key in verified_containers:
+            return
+
+        container_client = self.blob_service_client.get_container_client(container_name)
+        if not await container_client.exists():
+            try:
+                await container_client.create_container()
+            except ResourceExistsError:
+                # Created by another worker in the meantime
+                pass
+
+        verified_containers.add(key)
+
+    async def _get_blob_client(self, container_name: str, blob_name: str):
+        await self._invalidate_container()
+
+        if container_name:
+            full_container_name = (
+                f"{self.parent_container_name}/{container_name}"
+                if self.parent_container_name
+                else container_name
+            )
+        elif self.parent_container_name is not None and container_name is None:
+            full_container_name = self.parent_container_name
+        else:
+            raise ValueError(
+                "Container name must be provided either during initialization or as a function argument."
+            )
+
+        return self.blob_service_client.get_container_client(
+            full_container_name
+        ).get_blob_client(blob_name)
+
+    async def upload_file(self, container_name: str, blob_name: str, file_path: str):
+        blob_client = await self._get_blob_client(container_name, blob_name)
+
+        with open(file_path, "rb") as data:
+            await blob_client.upload_blob(data, overwrite=True)
+
+    async def upload_stream(self, container_name: str, blob_name: str, stream: IO):
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        await blob_client.upload_blob(stream, overwrite=True)
+
+    async def upload_text(self, container_name: str, blob_name: str, text: str):
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        await blob_client.upload_blob(text, overwrite=True)
+
+    async def upload_chunks(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunks: Iterable[bytes],
+        block_size: int = UPLOAD_BLOCK_SIZE,
+    ) -> int:
+        """
+        Upload the chunks as blocks of block_size, then commit them as a single blob.
+        At most one block is held in memory, whatever the size of the blob.
+
+        Returns:
+            int: The size of the uploaded blob in bytes.
+        """
+        blob_client = await self._get_blob_client(container_name, blob_name)
+
+        blocks: list[BlobBlock] = []
+        buffer = bytearray()
+        total_bytes = 0
+
+        async def stage_block():
+            # Block ids must have the same length in a blob
+            block_id = base64.b64encode(f"{len(blocks):08d}".encode("utf-8")).decode(
+                "utf-8"
+            )
+            await blob_client.stage_block(block_id=block_id, data=bytes(buffer))
+            blocks.append(BlobBlock(block_id=block_id))
+            buffer.clear()
+
+        for chunk in chunks:
+            total_bytes += len(chunk)
+            view = memoryview(chunk)
+            while view:
+                free_bytes = block_size - len(buffer)
+                buffer += view[:free_bytes]
+                view = view[free_bytes:]
+                if len(buffer) >= block_size:
+                    await stage_block()
+
+        if buffer:
+            await stage_block()
+
+        await blob_client.commit_block_list(blocks)
+        return total_bytes
+
+    async def download_file(
+        self, container_name: str, blob_name: str, download_path: str
+    ):
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        downloader = await blob_client.download_blob()
+        with open(download_path, "wb") as download_file:
+            download_file.write(await downloader.readall())
+
+    async def download_stream(self, container_name: str, blob_name: str) -> bytes:
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        downloader = await blob_client.download_blob()
+        return await downloader.readall()
+
+    async def download_text(self, container_name: str, blob_name: str) -> str:
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        downloader = await blob_client.download_blob()
+        return await downloader.content_as_text()
+
+    async def list_blobs(self, container_name: str = None) -> list[BlobProperties]:
+        """
+        List the blobs in a folder of the container, with their names relative to the folder.
+        """
+        await self._invalidate_container()
+
+        folder_name = "/".join(
+            name for name in (self.parent_container_name, container_name) if name
+        )
+        if not folder_name:
+            raise ValueError(
+                "Container name must be provided either during initialization or as a function argument."
+            )
+
+        root_container_name, _, prefix = folder_name.partition("/")
+        prefix = f"{prefix}/" if prefix else ""
+
+        container_client = self.blob_service_client.get_container_client(
+            root_container_name
+        )
+        blobs = []
+        async for blob in container_client.list_blobs(name_starts_with=prefix):
+            blob.name = blob.name[len(prefix) :]
+            blobs.append(blob)
+        return blobs
+
+    async def delete_blob(self, container_name: str, blob_name: str):
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        await blob_client.delete_blob()
+
+    async def update_blob(
+        self, container_name: str, blob_name: str, data: Union[str, IO, bytes]
+    ):
+        await self.upload_blob(container_name, blob_name, data)
+
+    async def upload_blob(
+        self, container_name: str, blob_name: str, data: Union[str, IO, bytes]
+    ):
+        if not isinstance(data, (str, bytes)) and not hasattr(data, "read"):
+            raise ValueError("Unsupported data type for upload")
+
+        blob_client = await self._get_blob_client(container_name, blob_name)
+        await blob_client.upload_blob(data, overwrite=True)
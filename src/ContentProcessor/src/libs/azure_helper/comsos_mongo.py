@@ -1,12 +1,42 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import threading
 from typing import Any, Dict
 
 import certifi
 from pymongo import MongoClient
 from pymongo.database import Collection, Database
 
+# MongoClient instances shared by every CosmosMongDBHelper in this process.
+# MongoClient is thread-safe and keeps its own connection pool, so one client per
+# connection string is enough. Collections and indexes are bootstrapped once.
+_pool_lock = threading.Lock()
+_mongo_clients: dict[str, MongoClient] = {}
+_prepared_containers: dict[tuple[str, str, str], set] = {}
+
+
+def _get_mongo_client(connection_string: str) -> MongoClient:
+    with _pool_lock:
+        mongo_client = _mongo_clients.get(connection_string)
+        if mongo_client is None:
+            # MongoClient need to get Certificate but in Container,
+            # it doesn't have native certificate so we need to add it othwerwise the connection will be fail
+            mongo_client = MongoClient(connection_string, tlsCAFile=certifi.where())
+            _mongo_clients[connection_string] = mongo_client
+        return mongo_client
+
+
+def clear_client_pool():
+    """
+    Close and forget the shared MongoClients and bootstrapped collections of this process.
+    """
+    with _pool_lock:
+        for mongo_client in _mongo_clients.values():
+            mongo_client.close()
+        _mongo_clients.clear()
+        _prepared_containers.clear()
+
 
 class CosmosMongDBHelper:
     def __init__(
@@ -22,7 +52,7 @@ class CosmosMongDBHelper:
         self.db: Database = None
 
         self.client, self.db, self.container = self._prepare(
-            connection_string, db_name, container_name
+            connection_string, db_name, container_name, indexes
         )
 
     def _prepare(
@@ -44,15 +74,29 @@ class CosmosMongDBHelper:
         Returns:
             tuple: MongoClient, Database, Collection
         """
-        # MongoClient need to get Certificate but in Container,
-        # it doesn't have native certificate so we need to add it othwerwise the connection will be fail
-        mongoClient = MongoClient(connection_string, tlsCAFile=certifi.where())
+        mongoClient = _get_mongo_client(connection_string)
         database = mongoClient[db_name]
-        container = self._create_container(database, container_name)
+
+        # Only the first helper for a collection checks the collection and its indexes
+        key = (connection_string, db_name, container_name)
+        with _pool_lock:
+            prepared_indexes = _prepared_containers.get(key)
+
+        if prepared_indexes is None:
+            container = self._create_container(database, container_name)
+            prepared_indexes = set()
+        else:
+            container = database[container_name]
+
         # Add Indexes
-        if indexes:
-            self._create_indexes(container, indexes)
-        # self._create_indexes(container, ["ClassName", "Id"])
+        missing_indexes = [
+            index for index in (indexes or []) if index not in prepared_indexes
+        ]
+        if missing_indexes:
+            self._create_indexes(container, missing_indexes)
+
+        with _pool_lock:
+            _prepared_containers[key] = prepared_indexes.union(missing_indexes)
 
         return mongoClient, database, container
 
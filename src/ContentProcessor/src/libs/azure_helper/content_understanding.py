@@ -1,17 +1,170 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import email.utils
 import json
 import logging
+import threading
 import time
+from collections.abc import Mapping
 from pathlib import Path
 
 import requests
+from azure.core.credentials import AccessToken
 from azure.identity import DefaultAzureCredential
 from requests.models import Response
 
 COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
 
+# Tokens are refreshed this many seconds before they expire,
+# so a token never expires in the middle of a long running operation.
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+
+class CachedTokenProvider:
+    """
+    Caches the access token of a credential and refreshes it shortly before it expires.
+    """
+
+    def __init__(
+        self,
+        credential: DefaultAzureCredential,
+        scope: str = COGNITIVE_SERVICES_SCOPE,
+        refresh_margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS,
+    ):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._token: AccessToken = None
+        self._lock = threading.Lock()
+
+    def _needs_refresh(self) -> bool:
+        return (
+            self._token is None
+            or self._token.expires_on - self.refresh_margin_seconds <= time.time()
+        )
+
+    def get_token(self) -> str:
+        """
+        Get a valid access token, requesting a new one only when the cached token is about to expire.
+
+        Returns:
+            str: The access token.
+        """
+        with self._lock:
+            if self._needs_refresh():
+                self._token = self.credential.get_token(self.scope)
+            return self._token.token
+
+
+# The credential, token and HTTP session are shared by every helper in this process
+_shared_lock = threading.Lock()
+_token_provider: CachedTokenProvider = None
+_session: requests.Session = None
+
+
+def _get_token_provider() -> CachedTokenProvider:
+    global _token_provider
+    with _shared_lock:
+        if _token_provider is None:
+            _token_provider = CachedTokenProvider(DefaultAzureCredential())
+        return _token_provider
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _shared_lock:
+        if _session is None:
+            # Keep-alive connections are reused by every request of the process
+            _session = requests.Session()
+        return _session
+
+
+def clear_shared_clients():
+    """
+    Forget the shared token provider and close the shared HTTP session of this process.
+    """
+    global _token_provider, _session
+    with _shared_lock:
+        if _session is not None:
+            _session.close()
+        _token_provider = None
+        _session = None
+
+
+def get_retry_after_seconds(headers: Mapping) -> float | None:
+    """
+    Get the waiting time hinted by the service in the Retry-After headers.
+
+    Args:
+        headers (Mapping): The response headers.
+
+    Returns:
+        float | None: The number of seconds to wait, or None when the service gives no hint.
+    """
+    for header in ("retry-after-ms", "x-ms-retry-after-ms"):
+        value = headers.get(header)
+        if value:
+            try:
+                return max(0.0, float(value) / 1000)
+            except ValueError:
+                pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # Retry-After can also be an HTTP date
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class PollingSchedule:
+    """
+    Waiting times between polls of a long running operation.
+
+    Polling starts with a short interval, so small documents are picked up as soon
+    as they are ready, and backs off exponentially up to max_interval for long jobs.
+    A Retry-After hint from the service takes precedence over the computed interval.
+    """
+
+    def __init__(
+        self,
+        initial_interval: float = 0.25,
+        max_interval: float = 2.0,
+        backoff_factor: float = 2.0,
+    ):
+        self.max_interval = max(0.0, max_interval)
+        self.backoff_factor = backoff_factor
+        self._next_interval = min(max(0.0, initial_interval), self.max_interval)
+
+    def next_interval(self, headers: Mapping, remaining_seconds: float) -> float:
+        """
+        Get the time to wait before the next poll.
+
+        Args:
+            headers (Mapping): The headers of the last response.
+            remaining_seconds (float): The time left before the operation times out.
+
+        Returns:
+            float: The interval in seconds.
+        """
+        interval = get_retry_after_seconds(headers)
+        if interval is None:
+            interval = self._next_interval
+            self._next_interval = min(
+                self.max_interval, self._next_interval * self.backoff_factor
+            )
+
+        return max(0.0, min(interval, remaining_seconds))
+
 
 class AzureContentUnderstandingHelper:
     credential: DefaultAzureCredential = None
@@ -22,20 +175,24 @@ class AzureContentUnderstandingHelper:
         api_version: str = "2024-12-01-preview",
         x_ms_useragent: str = "cps-contentunderstanding/client",
     ):
-        self.credential = DefaultAzureCredential()
-
         if not api_version:
             raise ValueError("API version must be provided.")
         if not endpoint:
             raise ValueError("Endpoint must be provided.")
 
+        self._token_provider = _get_token_provider()
+        self.credential = self._token_provider.credential
+        self._session = _get_session()
+
         self._endpoint = endpoint.rstrip("/")
         self._api_version = api_version
+        self._x_ms_useragent = x_ms_useragent
         self._logger = logging.getLogger(__name__)
-        self._headers = self._get_headers(
-            self.credential.get_token(COGNITIVE_SERVICES_SCOPE).token,
-            x_ms_useragent,
-        )
+
+    @property
+    def _headers(self) -> dict:
+        # Built for every request so a refreshed token is picked up
+        return self._get_headers(self._token_provider.get_token(), self._x_ms_useragent)
 
     def _get_analyzer_url(self, endpoint, api_version, analyzer_id):
         return f"{endpoint}/contentunderstanding/analyzers/{analyzer_id}?api-version={api_version}"  # noqa
@@ -81,7 +238,7 @@ class AzureContentUnderstandingHelper:
         Raises:
             requests.exceptions.HTTPError: If the HTTP request returned an unsuccessful status code.
         """
-        response = requests.get(
+        response = self._session.get(
             url=self._get_analyzer_list_url(self._endpoint, self._api_version),
             headers=self._headers,
         )
@@ -102,7 +259,7 @@ class AzureContentUnderstandingHelper:
         Raises:
             HTTPError: If the request fails.
         """
-        response = requests.get(
+        response = self._session.get(
             url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
             headers=self._headers,
         )
@@ -153,7 +310,7 @@ class AzureContentUnderstandingHelper:
         headers = {"Content-Type": "application/json"}
         headers.update(self._headers)
 
-        response = requests.put(
+        response = self._session.put(
             url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
             headers=headers,
             json=analyzer_template,
@@ -175,7 +332,7 @@ class AzureContentUnderstandingHelper:
         Raises:
             HTTPError: If the delete request fails.
         """
-        response = requests.delete(
+        response = self._session.delete(
             url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
             headers=self._headers,
         )
@@ -200,7 +357,7 @@ class AzureContentUnderstandingHelper:
         """
         headers = {"Content-Type": "application/octet-stream"}
         headers.update(self._headers)
-        response = requests.post(
+        response = self._session.post(
             url=self._get_analyze_url(self._endpoint, self._api_version, analyzer_id),
             headers=headers,
             data=file_stream,
@@ -238,7 +395,7 @@ class AzureContentUnderstandingHelper:
 
         headers.update(self._headers)
         if isinstance(data, dict):
-            response = requests.post(
+            response = self._session.post(
                 url=self._get_analyze_url(
                     self._endpoint, self._api_version, analyzer_id
                 ),
@@ -246,7 +403,7 @@ class AzureContentUnderstandingHelper:
                 json=data,
             )
         else:
-            response = requests.post(
+            response = self._session.post(
                 url=self._get_analyze_url(
                     self._endpoint, self._api_version, analyzer_id
                 ),
@@ -280,7 +437,7 @@ class AzureContentUnderstandingHelper:
             f"{operation_location}/images/{image_id}?api-version={self._api_version}"
         )
         try:
-            response = requests.get(url=image_retrieval_url, headers=self._headers)
+            response = self._session.get(url=image_retrieval_url, headers=self._headers)
             response.raise_for_status()
 
             assert response.headers.get("Content-Type") == "image/jpeg"
@@ -294,15 +451,20 @@ class AzureContentUnderstandingHelper:
         self,
         response: Response,
         timeout_seconds: int = 120,
-        polling_interval_seconds: int = 2,
+        polling_interval_seconds: float = 2,
+        initial_polling_interval_seconds: float = 0.25,
     ):
         """
         Polls the result of an asynchronous operation until it completes or times out.
 
+        The polling interval starts at initial_polling_interval_seconds and doubles up to
+        polling_interval_seconds, unless the service hints a Retry-After.
+
         Args:
             response (Response): The initial response object containing the operation location.
             timeout_seconds (int, optional): The maximum number of seconds to wait for the operation to complete. Defaults to 120.
-            polling_interval_seconds (int, optional): The number of seconds to wait between polling attempts. Defaults to 2.
+            polling_interval_seconds (float, optional): The longest number of seconds to wait between polling attempts. Defaults to 2.
+            initial_polling_interval_seconds (float, optional): The number of seconds to wait before the first polling attempt. Defaults to 0.25.
 
         Raises:
             ValueError: If the operation location is not found in the response headers.
@@ -316,30 +478,58 @@ class AzureContentUnderstandingHelper:
         if not operation_location:
             raise ValueError("Operation location not found in response headers.")
 
-        headers = {"Content-Type": "application/json"}
-        headers.update(self._headers)
+        operation_id = operation_location.split("/")[-1].split("?")[0]
+        schedule = PollingSchedule(
+            initial_interval=initial_polling_interval_seconds,
+            max_interval=polling_interval_seconds,
+        )
 
-        start_time = time.time()
+        start_time = time.monotonic()
+        poll_count = 0
         while True:
-            elapsed_time = time.time() - start_time
+            elapsed_time = time.monotonic() - start_time
             if elapsed_time > timeout_seconds:
                 raise TimeoutError(
                     f"Operation timed out after {timeout_seconds:.2f} seconds."
                 )
 
-            response = requests.get(operation_location, headers=self._headers)
+            time.sleep(
+                schedule.next_interval(
+                    response.headers, timeout_seconds - elapsed_time
+                )
+            )
+
+            response = self._session.get(operation_location, headers=self._headers)
             response.raise_for_status()
-            status = response.json().get("status").lower()
+            poll_count += 1
+
+            # Parse the response only once per poll
+            result = response.json()
+            status = result.get("status", "").lower()
             if status == "succeeded":
-                self._logger.info(
-                    f"Request result is ready after {elapsed_time:.2f} seconds."
+                self._log_poll_metrics(
+                    operation_id, status, time.monotonic() - start_time, poll_count
                 )
-                return response.json()
+                return result
             elif status == "failed":
-                self._logger.error(f"Request failed. Reason: {response.json()}")
+                self._log_poll_metrics(
+                    operation_id, status, time.monotonic() - start_time, poll_count
+                )
+                self._logger.error(f"Request failed. Reason: {result}")
                 raise RuntimeError("Request failed.")
             else:
-                self._logger.info(
-                    f"Request {operation_location.split('/')[-1].split('?')[0]} in progress ..."
-                )
-            time.sleep(polling_interval_seconds)
+                self._logger.info(f"Request {operation_id} in progress ...")
+
+    def _log_poll_metrics(
+        self, operation_id: str, status: str, elapsed_time: float, poll_count: int
+    ):
+        self._logger.info(
+            f"Request {operation_id} {status} after {elapsed_time:.2f} seconds "
+            f"and {poll_count} polls.",
+            extra={
+                "operation_id": operation_id,
+                "operation_status": status,
+                "operation_latency_seconds": round(elapsed_time, 3),
+                "operation_poll_count": poll_count,
+            },
+        )
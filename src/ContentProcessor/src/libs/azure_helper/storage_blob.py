@@ -1,11 +1,56 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import threading
 from typing import IO, Union
 
+from azure.core.exceptions import ResourceExistsError
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
 
+# Azure SDK clients shared by every StorageBlobHelper in this process.
+# The credential caches its tokens and each BlobServiceClient keeps its connection pool,
+# so they are created once instead of on every helper construction.
+_pool_lock = threading.Lock()
+_credential: DefaultAzureCredential = None
+_blob_service_clients: dict[str, BlobServiceClient] = {}
+_verified_containers: set[tuple[str, str]] = set()
+
+
+def _get_credential() -> DefaultAzureCredential:
+    global _credential
+    with _pool_lock:
+        if _credential is None:
+            _credential = DefaultAzureCredential()
+        return _credential
+
+
+def _get_blob_service_client(account_url: str) -> BlobServiceClient:
+    credential = _get_credential()
+    with _pool_lock:
+        blob_service_client = _blob_service_clients.get(account_url)
+        if blob_service_client is None:
+            blob_service_client = BlobServiceClient(
+                account_url=account_url, credential=credential
+            )
+            _blob_service_clients[account_url] = blob_service_client
+        return blob_service_client
+
+
+def clear_client_pool():
+    """
+    Close and forget the shared credential, clients and verified containers of this process.
+    """
+    global _credential
+    with _pool_lock:
+        for blob_service_client in _blob_service_clients.values():
+            blob_service_client.close()
+        if _credential is not None:
+            _credential.close()
+        _credential = None
+        _blob_service_clients.clear()
+        _verified_containers.clear()
+
 
 class StorageBlobHelper:
     credential: DefaultAzureCredential = None
@@ -16,10 +61,8 @@ class StorageBlobHelper:
         return StorageBlobHelper(account_url=account_url, container_name=container_name)
 
     def __init__(self, account_url: str, container_name=None):
-        self.credential = DefaultAzureCredential()
-        self.blob_service_client = BlobServiceClient(
-            account_url=account_url, credential=self.credential
-        )
+        self.credential = _get_credential()
+        self.blob_service_client = _get_blob_service_client(account_url)
         self.parent_container_name = container_name
         if container_name:
             # if containeer_name is provided, "container_name/folder name" is used, get container_name
@@ -28,9 +71,21 @@ class StorageBlobHelper:
             self._invalidate_container(container_name)
 
     def _invalidate_container(self, container_name: str):
+        # Containers are only checked once per account in this process
+        key = (self.blob_service_client.url, container_name)
+        if key in _verified_containers:
+            return
+
         container_client = self.blob_service_client.get_container_client(container_name)
         if not container_client.exists():
-            container_client.create_container()
+            try:
+                container_client.create_container()
+            except ResourceExistsError:
+                # Created by another worker in the meantime
+                pass
+
+        with _pool_lock:
+            _verified_containers.add(key)
 
     def _get_container_client(self, container_name=None):
         if container_name:
@@ -6,6 +6,7 @@ from typing import Any, Optional
 
 from pydantic import BaseModel, SkipValidation
 
+from libs.azure_helper.aio import comsos_mongo as comsos_mongo_aio
 from libs.azure_helper.comsos_mongo import CosmosMongDBHelper
 from libs.pipeline.entities.schema import Schema
 from libs.pipeline.handlers.logics.evaluate_handler.comparison import (
@@ -106,5 +107,31 @@ class ContentProcess(BaseModel):
             # Insert a new document
             mongo_helper.insert_document(self.model_dump())
 
+    async def update_status_to_cosmos_async(
+        self, connection_string: str, database_name: str, collection_name: str
+    ):
+        """
+        Update the status of the process in Cosmos DB without blocking the event loop.
+        """
+        mongo_helper = comsos_mongo_aio.CosmosMongDBHelper(
+            connection_string=connection_string,
+            db_name=database_name,
+            container_name=collection_name,
+            indexes=["process_id"],
+        )
+
+        # Check if the process_id already exists in the database
+        existing_process = await mongo_helper.find_document(
+            {"process_id": self.process_id}
+        )
+        if existing_process:
+            # Update the existing document
+            await mongo_helper.update_document(
+                {"process_id": self.process_id}, self.model_dump()
+            )
+        else:
+            # Insert a new document
+            await mongo_helper.insert_document(self.model_dump())
+
     class Config:
         arbitrary_types_allowed = True
@@ -0,0 +1,169 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ArtifactCache(ABC):
+    """
+    Bounded local tier in front of the blob storage for the files of the pipeline.
+
+    Files are written through to the cache when they are uploaded and read through it
+    when they are downloaded, so the steps running on the same host don't download
+    the outputs of the previous steps again.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """
+        Get the cached file content, None when it is not cached.
+        """
+
+    @abstractmethod
+    def set(self, key: str, data: bytes):
+        """
+        Cache the file content, evicting the least recently used files over max_bytes.
+        """
+
+
+class MemoryArtifactCache(ArtifactCache):
+    """
+    Artifact cache in the memory of the process.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes):
+        # Files bigger than the cache are not cached
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = data
+            self._size += len(data)
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class DiskArtifactCache(ArtifactCache):
+    """
+    Artifact cache in a local folder, shared by the handler processes of the host.
+    """
+
+    def __init__(self, max_bytes: int, folder: str = None):
+        super().__init__(max_bytes)
+        self.folder = Path(
+            folder or os.path.join(tempfile.gettempdir(), "cps_artifacts")
+        )
+
+    def _get_path(self, key: str) -> Path:
+        return self.folder / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.bin"
+
+    def get(self, key: str) -> bytes | None:
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        # The modification time tracks the last use for the eviction
+        path.touch()
+        return data
+
+    def set(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so other processes never read a partial file
+        with tempfile.NamedTemporaryFile(
+            dir=self.folder, suffix=".tmp", delete=False
+        ) as temp_file:
+            temp_file.write(data)
+        Path(temp_file.name).replace(self._get_path(key))
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.folder.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+
+
+# Artifact cache of this process, None when the files are always read from the blob storage
+_artifact_cache: ArtifactCache = None
+
+
+def configure_artifact_cache(tier: str, max_bytes: int, folder: str = None):
+    """
+    Configure the artifact cache of this process.
+
+    Args:
+        tier (str): "memory" for the memory of the process, "disk" for a local folder shared
+            by the processes of the host, "none" to disable the cache.
+        max_bytes (int): The size of the cache.
+        folder (str, optional): The local folder of the disk tier. Defaults to a temporary folder.
+    """
+    global _artifact_cache
+    if tier == "none" or max_bytes <= 0:
+        _artifact_cache = None
+    elif tier == "memory":
+        _artifact_cache = MemoryArtifactCache(max_bytes)
+    elif tier == "disk":
+        _artifact_cache = DiskArtifactCache(max_bytes, folder)
+    else:
+        raise ValueError(f"Unsupported artifact cache tier: {tier}")
+
+
+def get_artifact_cache() -> ArtifactCache | None:
+    return _artifact_cache
+
+
+def get_artifact_key(
+    account_url: str, container_name: str, process_id: str, file_id: str, name: str
+) -> str:
+    """
+    Get the cache key of a file of the pipeline.
+
+    Every file added to the pipeline gets a new id, so a file written again by a retried
+    step on another host never matches a stale cached copy.
+    """
+    return f"{account_url}/{container_name}/{process_id}/{file_id}/{name}"
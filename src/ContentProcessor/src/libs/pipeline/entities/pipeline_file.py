@@ -1,14 +1,17 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import asyncio
 import datetime
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Optional
 
 from pydantic import Field
 
+from libs.azure_helper.aio import storage_blob as storage_blob_aio
 from libs.azure_helper.storage_blob import StorageBlobHelper
 from libs.base.application_models import AppModelBase
+from libs.pipeline import artifact_store
 
 
 class ArtifactType(str, Enum):
@@ -66,13 +69,37 @@ class FileDetailBase(AppModelBase):
 
 
 class FileDetails(FileDetailBase):
+    def _get_artifact_cache_key(self, account_url: str, container_name: str) -> str:
+        """
+        Get the key of the file in the artifact cache, None when the file is not cached.
+        """
+        if artifact_store.get_artifact_cache() is None or not self.id:
+            return None
+        return artifact_store.get_artifact_key(
+            account_url, container_name, self.process_id, self.id, self.name
+        )
+
+    def _get_cached(self, key: str) -> bytes | None:
+        return artifact_store.get_artifact_cache().get(key) if key else None
+
+    def _set_cached(self, key: str, data: bytes | str):
+        if key and isinstance(data, (bytes, str)):
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            artifact_store.get_artifact_cache().set(key, data)
+
     def download_stream(self, account_url: str, container_name: str) -> bytes:
         """
         Download the file locally
         """
-        return StorageBlobHelper(
-            account_url=account_url, container_name=container_name
-        ).download_stream(container_name=self.process_id, blob_name=self.name)
+        key = self._get_artifact_cache_key(account_url, container_name)
+        stream = self._get_cached(key)
+        if stream is None:
+            stream = StorageBlobHelper(
+                account_url=account_url, container_name=container_name
+            ).download_stream(container_name=self.process_id, blob_name=self.name)
+            self._set_cached(key, stream)
+        return stream
 
     def download_file(self, account_url: str, container_name: str, file_path: str):
         """
@@ -94,6 +121,7 @@ class FileDetails(FileDetailBase):
             container_name=self.process_id, blob_name=self.name, stream=stream
         )
         self.size = len(stream)
+        self._set_cached(self._get_artifact_cache_key(account_url, container_name), stream)
 
     def upload_json_text(self, account_url: str, container_name: str, text: str):
         """
@@ -102,5 +130,66 @@ class FileDetails(FileDetailBase):
         StorageBlobHelper(
             account_url=account_url, container_name=container_name
         ).upload_text(container_name=self.process_id, blob_name=self.name, text=text)
-        self.size = len(text)
+        self.size = len(text.encode("utf-8"))
+        self.mime_type = "application/json"
+        self._set_cached(self._get_artifact_cache_key(account_url, container_name), text)
+
+    async def download_stream_async(
+        self, account_url: str, container_name: str
+    ) -> bytes:
+        """
+        Download the file without blocking the event loop
+        """
+        key = self._get_artifact_cache_key(account_url, container_name)
+        stream = await asyncio.to_thread(self._get_cached, key) if key else None
+        if stream is None:
+            stream = await storage_blob_aio.StorageBlobHelper(
+                account_url=account_url, container_name=container_name
+            ).download_stream(container_name=self.process_id, blob_name=self.name)
+            if key:
+                await asyncio.to_thread(self._set_cached, key, stream)
+        return stream
+
+    async def upload_stream_async(
+        self, account_url: str, container_name: str, stream: bytes
+    ):
+        """
+        Upload the stream to the blob without blocking the event loop
+        """
+        await storage_blob_aio.StorageBlobHelper(
+            account_url=account_url, container_name=container_name
+        ).upload_stream(
+            container_name=self.process_id, blob_name=self.name, stream=stream
+        )
+        self.size = len(stream)
+        key = self._get_artifact_cache_key(account_url, container_name)
+        if key:
+            await asyncio.to_thread(self._set_cached, key, stream)
+
+    async def upload_json_text_async(
+        self, account_url: str, container_name: str, text: str
+    ):
+        """
+        Upload the json text to the blob without blocking the event loop
+        """
+        await storage_blob_aio.StorageBlobHelper(
+            account_url=account_url, container_name=container_name
+        ).upload_text(container_name=self.process_id, blob_name=self.name, text=text)
+        self.size = len(text.encode("utf-8"))
+        self.mime_type = "application/json"
+        key = self._get_artifact_cache_key(account_url, container_name)
+        if key:
+            await asyncio.to_thread(self._set_cached, key, text)
+
+    async def upload_json_chunks_async(
+        self, account_url: str, container_name: str, chunks: Iterable[bytes]
+    ):
+        """
+        Upload the json chunks to the blob as staged blocks, without holding the whole document in memory
+        """
+        self.size = await storage_blob_aio.StorageBlobHelper(
+            account_url=account_url, container_name=container_name
+        ).upload_chunks(
+            container_name=self.process_id, blob_name=self.name, chunks=chunks
+        )
         self.mime_type = "application/json"
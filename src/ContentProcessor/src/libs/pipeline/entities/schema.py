@@ -1,10 +1,54 @@
 import datetime
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from libs.azure_helper.aio import comsos_mongo as comsos_mongo_aio
 from libs.azure_helper.comsos_mongo import CosmosMongDBHelper
 
+# Number of schema documents kept in memory
+SCHEMA_CACHE_SIZE = 128
+# Seconds a schema document is used before it is queried again
+SCHEMA_CACHE_TTL_SECONDS = 60
+
+# Schema documents by (connection_string, database_name, collection_name, schema_id), in LRU order
+_schemas: OrderedDict[tuple[str, str, str, str], tuple[float, "Schema"]] = OrderedDict()
+_schemas_lock = threading.Lock()
+
+
+def clear_schema_cache():
+    """
+    Forget the schema documents of this process.
+    """
+    with _schemas_lock:
+        _schemas.clear()
+
+
+def _get_cached_schema(key: tuple[str, str, str, str]) -> Optional["Schema"]:
+    with _schemas_lock:
+        cached = _schemas.get(key)
+        if cached is None:
+            return None
+
+        expires_at, schema = cached
+        if time.monotonic() >= expires_at:
+            del _schemas[key]
+            return None
+
+        _schemas.move_to_end(key)
+        return schema.model_copy()
+
+
+def _cache_schema(key: tuple[str, str, str, str], schema: "Schema"):
+    with _schemas_lock:
+        _schemas[key] = (time.monotonic() + SCHEMA_CACHE_TTL_SECONDS, schema.model_copy())
+        _schemas.move_to_end(key)
+        while len(_schemas) > SCHEMA_CACHE_SIZE:
+            _schemas.popitem(last=False)
+
 
 class Schema(BaseModel):
     Id: str
@@ -29,6 +73,12 @@ class Schema(BaseModel):
         if schema_id is None or schema_id == "":
             raise Exception("Schema Id is not provided.")
 
+        # Schemas rarely change, reuse the document queried in the last SCHEMA_CACHE_TTL_SECONDS
+        key = (connection_string, database_name, collection_name, schema_id)
+        schema = _get_cached_schema(key)
+        if schema is not None:
+            return schema
+
         mongo_helper = CosmosMongDBHelper(
             connection_string=connection_string,
             db_name=database_name,
@@ -43,4 +93,44 @@ class Schema(BaseModel):
                 f"Schema with Id {schema_id} not found in {collection_name}."
             )
 
-        return Schema(**(schema_information[0]))
+        schema = Schema(**(schema_information[0]))
+        _cache_schema(key, schema)
+        return schema
+
+    @staticmethod
+    async def get_schema_async(
+        connection_string: str,
+        database_name: str,
+        collection_name: str,
+        schema_id: str,
+    ) -> Optional["Schema"]:
+        """
+        Get the schema for the given schema_id without blocking the event loop
+        """
+
+        if schema_id is None or schema_id == "":
+            raise Exception("Schema Id is not provided.")
+
+        # Schemas rarely change, reuse the document queried in the last SCHEMA_CACHE_TTL_SECONDS
+        key = (connection_string, database_name, collection_name, schema_id)
+        schema = _get_cached_schema(key)
+        if schema is not None:
+            return schema
+
+        mongo_helper = comsos_mongo_aio.CosmosMongDBHelper(
+            connection_string=connection_string,
+            db_name=database_name,
+            container_name=collection_name,
+            indexes=["Id", "ClassName"],
+        )
+
+        # Check if the schema exists
+        schema_information = await mongo_helper.find_document({"Id": schema_id})
+        if not schema_information or len(schema_information) == 0:
+            raise Exception(
+                f"Schema with Id {schema_id} not found in {collection_name}."
+            )
+
+        schema = Schema(**(schema_information[0]))
+        _cache_schema(key, schema)
+        return schema
@@ -0,0 +1,68 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import logging
+
+from pydantic import Field
+
+from libs.application.application_context import AppContext
+from libs.pipeline import pipeline_step_helper
+from libs.pipeline.entities.pipeline_message_context import MessageContext
+from libs.pipeline.entities.pipeline_step_result import StepResult
+from libs.pipeline.queue_handler_base import HandlerBase
+from libs.utils import stopwatch
+
+
+class FusedPipelineHandler(HandlerBase):
+    """
+    Handler running the consecutive steps of the pipeline in a single coroutine chain.
+
+    The handler listens to the queue of its step and runs the chain from that step on.
+    The data pipeline is passed in memory from one step to the next, without a queue hop
+    or a persisted status in between. The step result and status are persisted for the last
+    executed step only, like any other step. The output files of the intermediate steps
+    are still uploaded: the artifact cache is optional and bounded, so the next steps read
+    them from the blob storage when they are not cached. When a step of the pipeline
+    has no fused handler, the data pipeline is handed over to the queue of that step.
+    """
+
+    step_handlers: dict[str, HandlerBase] = Field(default_factory=dict)
+
+    def __init__(
+        self,
+        appContext: AppContext,
+        step_name: str,
+        step_handlers: dict[str, HandlerBase],
+        **data,
+    ):
+        super().__init__(appContext, step_name, step_handlers=step_handlers, **data)
+
+    def _bind_step(self, app_context: AppContext, step_name: str):
+        super()._bind_step(app_context, step_name)
+        for handler_step_name, step_handler in self.step_handlers.items():
+            step_handler._bind_step(app_context, handler_step_name)
+
+    async def execute(self, context: MessageContext) -> StepResult:
+        pipeline_status = context.data_pipeline.pipeline_status
+
+        while True:
+            step_handler = self.step_handlers[pipeline_status.active_step]
+            with stopwatch.Stopwatch() as timer:
+                step_result = await step_handler.execute(context)
+            step_result.elapsed = timer.elapsed_string
+
+            next_step_name = pipeline_step_helper.get_next_step_name(
+                pipeline_status, pipeline_status.active_step
+            )
+            if next_step_name is None or next_step_name not in self.step_handlers:
+                # The last result is persisted and handed over by the handler base
+                return step_result
+
+            logging.info(
+                f"Fused step completed - {pipeline_status.process_id}: {pipeline_status.active_step} -> {next_step_name}"
+            )
+
+            # Pass the data pipeline to the next step in memory
+            pipeline_status.add_step_result(step_result)
+            pipeline_status.update_step()
+            pipeline_status.active_step = next_step_name
@@ -1,12 +1,10 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
-import json
-
 from openai.types.chat.parsed_chat_completion import ParsedChatCompletion
 
 from libs.application.application_context import AppContext
-from libs.azure_helper.model.content_understanding import AnalyzedResult
+from libs.azure_helper.model.content_understanding import DocumentContent
 from libs.pipeline.entities.pipeline_file import ArtifactType, PipelineLogEntry
 from libs.pipeline.entities.pipeline_message_context import MessageContext
 from libs.pipeline.entities.pipeline_step_result import StepResult
@@ -34,26 +32,27 @@ class EvaluateHandler(HandlerBase):
         print(context.data_pipeline.get_previous_step_result(self.handler_name))
 
         # Get the result from Extract step
-        output_file_json_string_from_extract = self.download_output_file_to_json_string(
+        extract_result = await self.download_output_file(
+            context=context,
             processed_by="extract",
             artifact_type=ArtifactType.ExtractedContent,
         )
 
-        # Deserialize the result to AnalyzedResult (Content Understanding)
-        content_understanding_result = AnalyzedResult(
-            **json.loads(output_file_json_string_from_extract)
+        # Deserialize the analyzed content only, the rest of the AnalyzedResult (Content Understanding) is not used
+        content_understanding_result = DocumentContent(
+            **extract_result.get("result", "contents", 0)
         )
 
         # Get the result from Map step handler - OpenAI
-        output_file_json_string_from_map = self.download_output_file_to_json_string(
+        map_result = await self.download_output_file(
+            context=context,
             processed_by="map",
             artifact_type=ArtifactType.SchemaMappedData,
+            model_type=ParsedChatCompletion,
         )
 
         # Deserialize the result to ParsedChatCompletion (Azure OpenAI)
-        gpt_result = ParsedChatCompletion(
-            **json.loads(output_file_json_string_from_map)
-        )
+        gpt_result = map_result.model
 
         # Mapped Result by GPT
         parsed_message_from_gpt = gpt_result.choices[0].message.parsed
@@ -64,7 +63,7 @@ class EvaluateHandler(HandlerBase):
         # Evaluate Confidence Score - Content Understanding
         content_understanding_confidence_score = content_understanding_confidence(
             gpt_evaluate_confidence_dict,
-            content_understanding_result.result.contents[0],
+            content_understanding_result,
         )
 
         # Evaluate Confidence Score - GPT
@@ -107,7 +106,7 @@ class EvaluateHandler(HandlerBase):
                 }
             )
         )
-        result_file.upload_json_text(
+        await result_file.upload_json_text_async(
             account_url=self.application_context.configuration.app_storage_blob_url,
             container_name=self.application_context.configuration.app_cps_processes,
             text=all_results.model_dump_json(),
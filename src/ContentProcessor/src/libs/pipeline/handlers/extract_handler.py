@@ -1,16 +1,24 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import logging
+
 from libs.application.application_context import AppContext
-from libs.azure_helper.content_understanding import AzureContentUnderstandingHelper
+from libs.azure_helper.aio.content_understanding import AzureContentUnderstandingHelper
 from libs.azure_helper.model.content_understanding import AnalyzedResult
 from libs.pipeline.entities.pipeline_file import PipelineLogEntry
 from libs.pipeline.entities.pipeline_message_context import MessageContext
 from libs.pipeline.entities.pipeline_step_result import StepResult
+from libs.pipeline.handlers.logics.extract_handler.result_cache import (
+    ContentUnderstandingResultCache,
+    get_result_cache_key,
+)
 from libs.pipeline.queue_handler_base import HandlerBase
 
 from libs.pipeline.entities.pipeline_file import ArtifactType
 
+ANALYZER_ID = "prebuilt-layout"
+
 
 class ExtractHandler(HandlerBase):
     def __init__(self, appContext: AppContext, step_name: str, **data):
@@ -24,17 +32,55 @@ class ExtractHandler(HandlerBase):
             self.application_context.configuration.app_content_understanding_endpoint
         )
 
-        response = content_understanding_helper.begin_analyze_stream(
-            analyzer_id="prebuilt-layout",
-            file_stream=context.data_pipeline.get_source_files()[0].download_stream(
-                self.application_context.configuration.app_storage_blob_url,
-                self.application_context.configuration.app_cps_processes,
-            ),
+        file_stream = await context.data_pipeline.get_source_files()[
+            0
+        ].download_stream_async(
+            self.application_context.configuration.app_storage_blob_url,
+            self.application_context.configuration.app_cps_processes,
         )
 
-        response = content_understanding_helper.poll_result(response)
+        # Identical files are analyzed once, re-submits and retries reuse the cached result
+        result_cache = None
+        response = None
+        if self.application_context.configuration.app_content_understanding_cache_enable:
+            result_cache = ContentUnderstandingResultCache(
+                account_url=self.application_context.configuration.app_storage_blob_url,
+                container_name=self.application_context.configuration.app_cps_processes,
+                ttl_seconds=self.application_context.configuration.app_content_understanding_cache_ttl,
+                max_bytes=self.application_context.configuration.app_content_understanding_cache_max_bytes,
+            )
+            cache_key = get_result_cache_key(
+                file_stream, ANALYZER_ID, content_understanding_helper.api_version
+            )
+            try:
+                response = await result_cache.get(cache_key)
+            except Exception as e:
+                logging.warning(
+                    f"Failed to read cached Content Understanding result - {cache_key}: {e}"
+                )
+
+        cache_hit = response is not None
+        if cache_hit:
+            logging.info(
+                f"Content Understanding result found in cache - {context.data_pipeline.pipeline_status.process_id}: {cache_key}"
+            )
+        else:
+            response = await content_understanding_helper.begin_analyze_stream(
+                analyzer_id=ANALYZER_ID,
+                file_stream=file_stream,
+            )
+            response = await content_understanding_helper.poll_result(response)
+
         result: AnalyzedResult = AnalyzedResult(**response)
 
+        if result_cache is not None and not cache_hit:
+            try:
+                await result_cache.set(cache_key, response)
+            except Exception as e:
+                logging.warning(
+                    f"Failed to cache Content Understanding result - {cache_key}: {e}"
+                )
+
         # Save Result as a file
         # Create File Entity to add
         result_file = context.data_pipeline.add_file(
@@ -53,7 +99,7 @@ class ExtractHandler(HandlerBase):
         )
 
         # Upload the result to blob storage
-        result_file.upload_json_text(
+        await result_file.upload_json_text_async(
             account_url=self.application_context.configuration.app_storage_blob_url,
             container_name=self.application_context.configuration.app_cps_processes,
             text=result.model_dump_json(),
@@ -65,5 +111,6 @@ class ExtractHandler(HandlerBase):
             result={
                 "result": "success",
                 "file_name": result_file.name,
+                "cache_hit": cache_hit,
             },
         )
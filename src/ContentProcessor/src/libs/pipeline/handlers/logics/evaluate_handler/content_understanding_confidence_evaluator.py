@@ -1,4 +1,4 @@
-import copy
+from bisect import bisect_left, bisect_right
 from typing import Iterable, Optional
 
 from pydantic import Field
@@ -120,39 +120,121 @@ def extract_lines(
 
     di_lines = list()
     for page_number, page in enumerate(analyze_result.pages):
+        # Sort the words by their span offset once per page,
+        # so the words of each line are found by bisection instead of scanning the page
+        word_order = sorted(
+            range(len(page.words)), key=lambda index: page.words[index].span.offset
+        )
+        word_offsets = [page.words[index].span.offset for index in word_order]
+
         for line in page.lines:
-            line_copy = copy.copy(line)
-            contained_words = list()
-            # for span in line_copy.spans:
             # Find words in the page that are fully contained within the span
-            span = line_copy.span
-            span_offset_start = span.offset
-            span_offset_end = span_offset_start + span.length
-            words_contained = [
-                word
-                for word in page.words
-                if word.span.offset >= span_offset_start
-                and word.span.offset + word.span.length <= span_offset_end
+            span_offset_start = line.span.offset
+            span_offset_end = span_offset_start + line.span.length
+            candidate_indexes = word_order[
+                bisect_left(word_offsets, span_offset_start) : bisect_right(
+                    word_offsets, span_offset_end
+                )
+            ]
+            # Keep the words in page order
+            contained_words = [
+                page.words[index]
+                for index in sorted(candidate_indexes)
+                if page.words[index].span.offset + page.words[index].span.length
+                <= span_offset_end
             ]
-            contained_words.extend(words_contained)
 
             contained_words_conf_scores = [word.confidence for word in contained_words]
 
-            di_line = DIDocumentLine(**line_copy.model_dump())
+            di_line = DIDocumentLine(**line.model_dump())
             di_line.contained_words = contained_words
             di_line.page_number = page_number
             di_line.confidence = multiple_score_resolver(contained_words_conf_scores)
-            di_line.normalized_polygon = normalize_polygon(page, line_copy.polygon)
+            di_line.normalized_polygon = normalize_polygon(page, line.polygon)
 
             di_lines.append(di_line)
     return di_lines
 
 
+class DocumentLineIndex:
+    """
+    Lines of a Content Understanding Service result, indexed once per document for matching field values.
+
+    Exact matches are looked up in a hash map of the lower-cased line contents.
+    Containment matches search a single corpus of the normalized line contents,
+    and map every hit back to its line by bisection on the line offsets.
+    """
+
+    LINE_SEPARATOR = "\x00"
+
+    def __init__(
+        self, analyze_result: DocumentContent, multiple_score_resolver: callable = min
+    ):
+        self.lines = extract_lines(analyze_result, multiple_score_resolver)
+
+        self._exact_lines: dict[str, list[int]] = {}
+        for line_index, line in enumerate(self.lines):
+            self._exact_lines.setdefault(line.content.lower(), []).append(line_index)
+
+        # Same normalization as value_contains: spaces removed, lower-cased
+        normalized_contents = [
+            line.content.replace(" ", "").lower() for line in self.lines
+        ]
+        self._line_offsets = []
+        offset = 0
+        for content in normalized_contents:
+            self._line_offsets.append(offset)
+            offset += len(content) + len(self.LINE_SEPARATOR)
+        self._corpus = self.LINE_SEPARATOR.join(normalized_contents)
+
+    def find_exact(self, value: str) -> list[DIDocumentLine]:
+        """
+        Find the lines whose content equals the value, ignoring case.
+        """
+        return [self.lines[index] for index in self._exact_lines.get(value.lower(), [])]
+
+    def find_containing(self, value: str) -> list[DIDocumentLine]:
+        """
+        Find the lines whose content contains the value, ignoring case and spaces.
+        """
+        pattern = value.replace(" ", "").lower()
+        if not pattern:
+            return list(self.lines)
+        if self.LINE_SEPARATOR in pattern:
+            return [line for line in self.lines if value_contains(value, line.content)]
+
+        matching_lines = []
+        position = self._corpus.find(pattern)
+        while position != -1:
+            line_index = bisect_right(self._line_offsets, position) - 1
+            matching_lines.append(self.lines[line_index])
+
+            # One hit per line is enough, continue with the next line
+            if line_index + 1 >= len(self._line_offsets):
+                break
+            position = self._corpus.find(pattern, self._line_offsets[line_index + 1])
+
+        return matching_lines
+
+    def find_matching_lines(
+        self, value: str, value_matcher: callable = value_match
+    ) -> list[DIDocumentLine]:
+        """
+        Find the lines that match the value with the given value matcher.
+        """
+        if value_matcher is value_match:
+            return self.find_exact(value)
+        if value_matcher is value_contains:
+            return self.find_containing(value)
+        return [line for line in self.lines if value_matcher(value, line.content)]
+
+
 def find_matching_lines(
     value: str,
     analyze_result: DocumentContent,
     value_matcher: callable = value_match,
     multiple_score_resolver: callable = min,
+    line_index: Optional[DocumentLineIndex] = None,
 ) -> list[DIDocumentLine]:
     """
     Find lines in the  Content Understanding Service result that match a given value.
@@ -162,6 +244,7 @@ def find_matching_lines(
         analyze_result: The  Content Understanding Service result to search for matching lines.
         value_matcher: The function to use for matching values.
         multiple_score_resolver: The function to resolve multiple confidence scores of contained words.
+        line_index: The prebuilt line index of the analyze_result. Built on the fly if not provided.
 
     Returns:
         list: The list of DIDocumentLine instances that match the given value.
@@ -173,11 +256,10 @@ def find_matching_lines(
     if not isinstance(value, str):
         value = str(value)
 
-    di_lines = extract_lines(analyze_result, multiple_score_resolver)
+    if line_index is None:
+        line_index = DocumentLineIndex(analyze_result, multiple_score_resolver)
 
-    matching_lines = [line for line in di_lines if value_matcher(value, line.content)]
-
-    return matching_lines
+    return line_index.find_matching_lines(value, value_matcher)
 
 
 def get_field_confidence_score(
@@ -216,6 +298,9 @@ def evaluate_confidence(extract_result: dict, analyze_result: DocumentContent):
         dict: The confidence evaluation of the extracted fields.
     """
 
+    # Index the document lines once for all the field values
+    line_index = DocumentLineIndex(analyze_result)
+
     def evaluate_field_value_confidence(
         value: any,
     ) -> dict[str, any]:
@@ -240,11 +325,14 @@ def evaluate_confidence(extract_result: dict, analyze_result: DocumentContent):
         else:
             # Find lines that match the value exactly or contain the value
             matching_lines = find_matching_lines(
-                value, analyze_result, value_matcher=value_match
+                value, analyze_result, value_matcher=value_match, line_index=line_index
             )
             if not matching_lines:
                 matching_lines = find_matching_lines(
-                    value, analyze_result, value_matcher=value_contains
+                    value,
+                    analyze_result,
+                    value_matcher=value_contains,
+                    line_index=line_index,
                 )
 
             # Calculate the confidence score based on the matching lines
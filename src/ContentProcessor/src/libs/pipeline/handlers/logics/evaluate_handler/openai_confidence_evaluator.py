@@ -2,7 +2,9 @@
 # Licensed under the MIT License.
 
 import math
+from functools import lru_cache
 
+import numpy as np
 import tiktoken
 from openai.types.chat.chat_completion import Choice
 
@@ -11,6 +13,36 @@ from libs.pipeline.handlers.logics.evaluate_handler.confidence import (
 )
 
 
+@lru_cache(maxsize=8)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Get the encoding used by the OpenAI model, loaded once per model.
+
+    Args:
+        model: The model used for the response.
+
+    Returns:
+        tiktoken.Encoding: The encoding of the model.
+    """
+    return tiktoken.encoding_for_model(model)
+
+
+@lru_cache(maxsize=65536)
+def get_token_length(model: str, token: str) -> int:
+    """
+    Get the number of characters a response token covers in the generated text.
+
+    Args:
+        model: The model used for the response.
+        token: The token string from the logprobs.
+
+    Returns:
+        int: The length of the token in characters.
+    """
+    encoding = get_encoding(model)
+    return len(encoding.decode(encoding.encode(token, disallowed_special=())))
+
+
 def evaluate_confidence(extract_result: dict, choice: Choice, model: str = "gpt-4o"):
     """
     Evaluate confidence for each field value in the extracted result based on the logprobs of the response from Azure OpenAI.
@@ -26,9 +58,6 @@ def evaluate_confidence(extract_result: dict, choice: Choice, model: str = "gpt-
 
     confidence = dict()
 
-    # Retrieves the specific encoding used for the OpenAI model that generated the response.
-    encoding = tiktoken.encoding_for_model(model)
-
     # To perform the confidence evaluation, we need the original text from the response, not just the object result.
     generated_text = choice.message.content
 
@@ -38,42 +67,44 @@ def evaluate_confidence(extract_result: dict, choice: Choice, model: str = "gpt-
 
     logprobs = choice.logprobs.content
 
-    tokens = [token_logprob.token for token_logprob in logprobs]
-    token_logprobs = [token_logprob.logprob for token_logprob in logprobs]
-
-    # Encode the entire generated text to map tokens to character positions
-    token_offsets = []
-    current_pos = 0
-    for token in tokens:
-        token_bytes = encoding.encode(token, disallowed_special=())
-        token_str = encoding.decode(token_bytes)
-        token_length = len(token_str)
-        token_offsets.append((current_pos, current_pos + token_length))
-        current_pos += token_length
+    # Character offsets of every token in the generated text, computed once for all fields.
+    # The token lengths are memoized per model, so the encoder only sees each distinct token once.
+    token_lengths = np.fromiter(
+        (get_token_length(model, token_logprob.token) for token_logprob in logprobs),
+        dtype=np.int64,
+        count=len(logprobs),
+    )
+    token_ends = np.cumsum(token_lengths)
+    token_starts = token_ends - token_lengths
+
+    # Missing logprobs are stored as NaN and skipped when averaging
+    token_logprobs = np.array(
+        [
+            np.nan if token_logprob.logprob is None else token_logprob.logprob
+            for token_logprob in logprobs
+        ],
+        dtype=np.float64,
+    )
 
     substr_offset = 0
 
-    def find_token_indices(substring: str, start_char: int):
+    def find_token_range(substring: str, start_char: int) -> tuple[int, int]:
         """
-        Find the indices of tokens that contain a given substring.
+        Find the range of tokens that overlap a given substring.
 
         Args:
             substring: The substring to search for.
             start_char: The starting character position of the substring.
 
         Returns:
-            list: The list of token indices that contain the substring.
+            tuple: The first token index and the index after the last token that overlap the substring.
         """
 
-        substring_length = len(substring)
-        end_char = start_char + substring_length
-        indices = []
-        for idx, (start, end) in enumerate(token_offsets):
-            if start >= end_char:
-                break
-            if end > start_char:
-                indices.append(idx)
-        return indices
+        end_char = start_char + len(substring)
+        # Tokens ending after the substring starts, up to the first token starting after it ends
+        first_index = int(np.searchsorted(token_ends, start_char, side="right"))
+        last_index = int(np.searchsorted(token_starts, end_char, side="left"))
+        return first_index, max(first_index, last_index)
 
     def evaluate_field_value_confidence(value: any):
         """
@@ -106,32 +137,27 @@ def evaluate_confidence(extract_result: dict, choice: Choice, model: str = "gpt-
             except ValueError:
                 return {"confidence": 0.0, "value": value}
 
-            # Find all the token indices that cover the value string
-            token_indices = find_token_indices(value_str, start_index)
+            # Find all the tokens that cover the value string
+            first_index, last_index = find_token_range(value_str, start_index)
 
-            if not token_indices:
+            if first_index == last_index:
                 return {"confidence": 0.0, "value": value}
 
             # Get the logprobs for the tokens that cover the value string
-            value_logprobs = []
-            for idx in token_indices:
-                logprob = token_logprobs[idx]
-                if logprob is not None:
-                    value_logprobs.append(logprob)
+            value_logprobs = token_logprobs[first_index:last_index]
+            value_logprobs = value_logprobs[~np.isnan(value_logprobs)]
 
-            if not value_logprobs:
+            if value_logprobs.size == 0:
                 return {"confidence": 0.0, "value": value}
 
             # Ensure that only likely tokens are considered for confidence calculation
-            filtered_logprobs = [
-                logprob for logprob in value_logprobs if logprob > -9999.0
-            ]
+            filtered_logprobs = value_logprobs[value_logprobs > -9999.0]
 
-            if not filtered_logprobs:
+            if filtered_logprobs.size == 0:
                 return {"confidence": 0.0, "value": value}
 
             # Calculate the average log probability of the likely tokens
-            avg_logprob = sum(filtered_logprobs) / len(filtered_logprobs)
+            avg_logprob = float(filtered_logprobs.mean())
 
             # Convert the average log probability to a confidence score
             confidence = math.exp(avg_logprob)
@@ -0,0 +1,129 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import hashlib
+import json
+import logging
+import time
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from libs.azure_helper.aio.storage_blob import StorageBlobHelper
+from libs.utils.eviction_schedule import EvictionSchedule
+
+RESULT_CACHE_FOLDER = "_cache/content_understanding"
+EVICTION_INTERVAL_SECONDS = 300
+
+_eviction_schedule = EvictionSchedule(EVICTION_INTERVAL_SECONDS)
+
+
+def clear_eviction_schedule():
+    """
+    Forget when this process last evicted the cache, the next write evicts again.
+    """
+    _eviction_schedule.clear()
+
+
+def get_result_cache_key(file_bytes: bytes, analyzer_id: str, api_version: str) -> str:
+    """
+    Get the cache key of a Content Understanding result.
+    The key depends on the file content, the analyzer and the API version only.
+    """
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    return f"{content_hash}_{analyzer_id}_{api_version}"
+
+
+class ContentUnderstandingResultCache:
+    """
+    Content addressed cache of the Content Understanding results in the blob storage.
+
+    The same file analyzed with the same analyzer and API version gives the same result,
+    so re-submitted files and retried processes reuse it instead of analyzing it again.
+    Entries expire after ttl_seconds, and the oldest entries are evicted when the cache
+    grows over max_bytes. The eviction runs on write, at most once every
+    EVICTION_INTERVAL_SECONDS per process, so the cache may briefly exceed max_bytes.
+
+    Attributes:
+        ttl_seconds (int): The lifetime of a cache entry, 0 for no expiration.
+        max_bytes (int): The size of the cache, 0 for no limit.
+    """
+
+    def __init__(
+        self,
+        account_url: str,
+        container_name: str,
+        ttl_seconds: int = 0,
+        max_bytes: int = 0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._blob_helper = StorageBlobHelper(
+            account_url=account_url, container_name=container_name
+        )
+
+    @staticmethod
+    def _get_entry_name(key: str) -> str:
+        return f"{key}.json"
+
+    def _is_expired(self, cached_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - cached_at > self.ttl_seconds
+
+    async def get(self, key: str) -> dict | None:
+        """
+        Get the cached result, None when it is not cached or expired.
+        """
+        entry_name = self._get_entry_name(key)
+        try:
+            entry = json.loads(
+                await self._blob_helper.download_stream(RESULT_CACHE_FOLDER, entry_name)
+            )
+        except ResourceNotFoundError:
+            return None
+
+        if self._is_expired(entry["cached_at"]):
+            logging.info(f"Content Understanding result cache entry expired - {key}")
+            await self._delete(entry_name)
+            return None
+
+        return entry["result"]
+
+    async def set(self, key: str, result: dict):
+        """
+        Cache the result, then evict the expired and oldest entries over the cache size
+        when this process has not done it within EVICTION_INTERVAL_SECONDS.
+        """
+        await self._blob_helper.upload_text(
+            RESULT_CACHE_FOLDER,
+            self._get_entry_name(key),
+            json.dumps({"cached_at": time.time(), "result": result}),
+        )
+
+        if (self.ttl_seconds > 0 or self.max_bytes > 0) and _eviction_schedule.is_due():
+            await self.evict()
+
+    async def evict(self):
+        """
+        Delete the expired entries, then the least recently written ones until the cache fits max_bytes.
+        """
+        entries = sorted(
+            await self._blob_helper.list_blobs(RESULT_CACHE_FOLDER),
+            key=lambda blob: blob.last_modified,
+        )
+
+        total_bytes = sum(entry.size for entry in entries)
+        for entry in entries:
+            expired = self._is_expired(entry.last_modified.timestamp())
+            over_size = self.max_bytes > 0 and total_bytes > self.max_bytes
+            if not expired and not over_size:
+                # Entries are ordered by age, the newer ones are kept
+                break
+
+            await self._delete(entry.name)
+            total_bytes -= entry.size
+
+    async def _delete(self, entry_name: str):
+        try:
+            await self._blob_helper.delete_blob(RESULT_CACHE_FOLDER, entry_name)
+        except ResourceNotFoundError:
+            # Evicted by another worker in the meantime
+            pass
@@ -0,0 +1,191 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import asyncio
+import hashlib
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from azure.core.exceptions import ResourceNotFoundError
+from pdf2image import convert_from_bytes
+
+from libs.azure_helper.aio.storage_blob import StorageBlobHelper
+from libs.utils.eviction_schedule import EvictionSchedule
+
+PAGE_CACHE_FOLDER = "_cache/pages"
+PAGE_CACHE_MANIFEST = "manifest.json"
+EVICTION_INTERVAL_SECONDS = 300
+
+_eviction_schedule = EvictionSchedule(EVICTION_INTERVAL_SECONDS)
+
+
+def clear_eviction_schedule():
+    """
+    Forget when this process last evicted the page cache, the next write evicts again.
+    """
+    _eviction_schedule.clear()
+
+
+def rasterize_pdf(
+    pdf_bytes: bytes, dpi: int = 200, max_pages: int = 0, thread_count: int = 1
+) -> list[bytes]:
+    """
+    Render the pages of a PDF document to PNG images.
+
+    Poppler renders the pages in parallel worker processes (thread_count) and writes
+    the PNG files directly, so the pages are not re-encoded in memory.
+
+    Args:
+        pdf_bytes (bytes): The PDF document.
+        dpi (int, optional): The resolution of the rendered pages. Defaults to 200.
+        max_pages (int, optional): The number of pages to render, 0 for all pages. Defaults to 0.
+        thread_count (int, optional): The number of poppler workers. Defaults to 1.
+
+    Returns:
+        list[bytes]: The PNG images of the pages in page order.
+    """
+    with tempfile.TemporaryDirectory() as output_folder:
+        page_paths = convert_from_bytes(
+            pdf_bytes,
+            dpi=dpi,
+            last_page=max_pages if max_pages > 0 else None,
+            thread_count=max(1, thread_count),
+            fmt="png",
+            output_folder=output_folder,
+            paths_only=True,
+        )
+        # pdf2image names the files with zero padded page numbers
+        return [Path(page_path).read_bytes() for page_path in sorted(page_paths)]
+
+
+def get_page_cache_key(pdf_bytes: bytes, dpi: int, max_pages: int) -> str:
+    """
+    Get the cache key of the rendered pages of a PDF document.
+    The key depends on the document content and the rendering options only.
+    """
+    content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    return f"{content_hash}_{dpi}dpi_{max_pages}"
+
+
+def _is_expired(cached_at: float, ttl_seconds: int) -> bool:
+    return ttl_seconds > 0 and time.time() - cached_at > ttl_seconds
+
+
+async def _download_cached_pages(
+    blob_helper: StorageBlobHelper, cache_folder: str, ttl_seconds: int
+) -> list[bytes] | None:
+    try:
+        manifest = json.loads(
+            await blob_helper.download_stream(cache_folder, PAGE_CACHE_MANIFEST)
+        )
+        if _is_expired(manifest.get("cached_at", 0), ttl_seconds):
+            # Rendered again and overwritten
+            return None
+
+        return list(
+            await asyncio.gather(
+                *[
+                    blob_helper.download_stream(cache_folder, page_name)
+                    for page_name in manifest["pages"]
+                ]
+            )
+        )
+    except ResourceNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Failed to read cached rendered pages - {cache_folder}: {e}")
+        return None
+
+
+async def _upload_cached_pages(
+    blob_helper: StorageBlobHelper, cache_folder: str, page_images: list[bytes]
+):
+    page_names = [f"page-{index + 1:04d}.png" for index in range(len(page_images))]
+    await asyncio.gather(
+        *[
+            blob_helper.upload_stream(cache_folder, page_name, page_image)
+            for page_name, page_image in zip(page_names, page_images)
+        ]
+    )
+    # The manifest is written last, so a partially written cache entry is never read
+    await blob_helper.upload_text(
+        cache_folder,
+        PAGE_CACHE_MANIFEST,
+        json.dumps({"cached_at": time.time(), "pages": page_names}),
+    )
+
+
+async def evict_page_cache(blob_helper: StorageBlobHelper, ttl_seconds: int):
+    """
+    Delete the rendered pages written more than ttl_seconds ago.
+    """
+    for entry in await blob_helper.list_blobs(PAGE_CACHE_FOLDER):
+        if not _is_expired(entry.last_modified.timestamp(), ttl_seconds):
+            continue
+
+        try:
+            await blob_helper.delete_blob(PAGE_CACHE_FOLDER, entry.name)
+        except ResourceNotFoundError:
+            # Evicted by another worker in the meantime
+            pass
+
+
+async def get_pdf_page_images(
+    pdf_bytes: bytes,
+    account_url: str,
+    container_name: str,
+    dpi: int = 200,
+    max_pages: int = 0,
+    thread_count: int = 1,
+    use_cache: bool = True,
+    ttl_seconds: int = 0,
+) -> list[bytes]:
+    """
+    Get the PNG images of the pages of a PDF document.
+
+    Rendered pages are cached in the blob storage under a key made of the document
+    content hash and the rendering options, so retries and re-processing of the same
+    document never render it twice. Entries expire after ttl_seconds, and the expired
+    entries are deleted on write, at most once every EVICTION_INTERVAL_SECONDS per process.
+
+    Args:
+        pdf_bytes (bytes): The PDF document.
+        account_url (str): The URL of the blob storage account.
+        container_name (str): The container (and folder) where the cache is stored.
+        dpi (int, optional): The resolution of the rendered pages. Defaults to 200.
+        max_pages (int, optional): The number of pages to render, 0 for all pages. Defaults to 0.
+        thread_count (int, optional): The number of poppler workers. Defaults to 1.
+        use_cache (bool, optional): Flag to read and write the page cache. Defaults to True.
+        ttl_seconds (int, optional): The lifetime of a cache entry, 0 for no expiration. Defaults to 0.
+
+    Returns:
+        list[bytes]: The PNG images of the pages in page order.
+    """
+    if not use_cache:
+        return await asyncio.to_thread(
+            rasterize_pdf, pdf_bytes, dpi, max_pages, thread_count
+        )
+
+    blob_helper = StorageBlobHelper(account_url=account_url, container_name=container_name)
+    cache_folder = f"{PAGE_CACHE_FOLDER}/{get_page_cache_key(pdf_bytes, dpi, max_pages)}"
+
+    page_images = await _download_cached_pages(blob_helper, cache_folder, ttl_seconds)
+    if page_images is not None:
+        logging.info(f"Rendered pages found in cache - {cache_folder}")
+        return page_images
+
+    page_images = await asyncio.to_thread(
+        rasterize_pdf, pdf_bytes, dpi, max_pages, thread_count
+    )
+
+    try:
+        await _upload_cached_pages(blob_helper, cache_folder, page_images)
+        if ttl_seconds > 0 and _eviction_schedule.is_due():
+            await evict_page_cache(blob_helper, ttl_seconds)
+    except Exception as e:
+        logging.warning(f"Failed to cache rendered pages - {cache_folder}: {e}")
+
+    return page_images
@@ -0,0 +1,145 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import io
+import math
+
+from PIL import Image
+
+from libs.base.application_models import AppModelBase
+from libs.pipeline.entities.mime_types import MimeTypes
+
+# GPT vision models fit high detail images within 2048 x 2048,
+# scale the shortest side down to 768 and bill every 512 x 512 tile.
+MAX_IMAGE_SIDE = 2048
+MAX_SHORTEST_SIDE = 768
+TILE_SIZE = 512
+BASE_IMAGE_TOKENS = 85
+TILE_IMAGE_TOKENS = 170
+
+# Images are never scaled below this size to fit the byte budget
+MIN_IMAGE_SIDE = 256
+
+
+class PromptImage(AppModelBase):
+    mime_type: str
+    data: bytes
+
+
+class PromptImageStats(AppModelBase):
+    """
+    Sizes of the images sent to the model, before and after the optimization.
+    """
+
+    image_count: int = 0
+    original_bytes: int = 0
+    optimized_bytes: int = 0
+    original_tokens: int = 0
+    optimized_tokens: int = 0
+
+
+def get_tile_grid_size(width: int, height: int) -> tuple[int, int]:
+    """
+    Get the size the model scales an image to before splitting it into tiles.
+    """
+    scale = min(1.0, MAX_IMAGE_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+
+    scale = min(1.0, MAX_SHORTEST_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimate the prompt tokens of a high detail image.
+    """
+    width, height = get_tile_grid_size(width, height)
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return BASE_IMAGE_TOKENS + TILE_IMAGE_TOKENS * tiles
+
+
+def _encode_image(image: Image.Image, jpeg_quality: int) -> PromptImage:
+    buffer = io.BytesIO()
+    if jpeg_quality > 0:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+        return PromptImage(mime_type=MimeTypes.ImageJpeg, data=buffer.getvalue())
+
+    image.save(buffer, format="PNG", optimize=True)
+    return PromptImage(mime_type=MimeTypes.ImagePng, data=buffer.getvalue())
+
+
+def _resize(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    if size == image.size:
+        return image
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def optimize_prompt_images(
+    images: list[PromptImage], jpeg_quality: int = 0, max_total_bytes: int = 0
+) -> tuple[list[PromptImage], PromptImageStats]:
+    """
+    Downscale the prompt images to the tile grid of the model and fit them in a byte budget.
+
+    The model scales bigger images down anyway, so sending them at the tile grid size
+    keeps the answer quality while making the request smaller. When the images still
+    exceed max_total_bytes, they are scaled down further until they fit or reach MIN_IMAGE_SIDE.
+
+    Args:
+        images (list[PromptImage]): The images to send to the model.
+        jpeg_quality (int, optional): The JPEG quality to convert the images to, 0 to keep PNG. Defaults to 0.
+        max_total_bytes (int, optional): The byte budget of all the images, 0 for no budget. Defaults to 0.
+
+    Returns:
+        tuple[list[PromptImage], PromptImageStats]: The optimized images and their sizes before and after.
+    """
+    stats = PromptImageStats(image_count=len(images))
+    if not images:
+        return images, stats
+
+    decoded_images = []
+    for image in images:
+        decoded_image = Image.open(io.BytesIO(image.data))
+        decoded_image.load()
+        decoded_images.append(decoded_image)
+
+        stats.original_bytes += len(image.data)
+        stats.original_tokens += estimate_image_tokens(*decoded_image.size)
+
+    scale = 1.0
+    while True:
+        optimized_images = []
+        for decoded_image in decoded_images:
+            width, height = get_tile_grid_size(*decoded_image.size)
+            image_scale = min(1.0, max(scale, MIN_IMAGE_SIDE / min(width, height)))
+            size = (max(1, round(width * image_scale)), max(1, round(height * image_scale)))
+            optimized_images.append(
+                _encode_image(_resize(decoded_image, size), jpeg_quality)
+            )
+
+        total_bytes = sum(len(image.data) for image in optimized_images)
+        within_budget = max_total_bytes <= 0 or total_bytes <= max_total_bytes
+        smallest = all(
+            min(get_tile_grid_size(*image.size)) * scale <= MIN_IMAGE_SIDE
+            for image in decoded_images
+        )
+        if within_budget or smallest:
+            break
+
+        # Scale down proportionally to the bytes over budget
+        scale *= max(0.5, min(0.9, math.sqrt(max_total_bytes / total_bytes)))
+
+    # Keep the original image when it was not scaled for the budget and the optimization doesn't make it smaller
+    if scale == 1.0:
+        optimized_images = [
+            optimized if len(optimized.data) < len(original.data) else original
+            for original, optimized in zip(images, optimized_images)
+        ]
+
+    for image in optimized_images:
+        stats.optimized_bytes += len(image.data)
+        with Image.open(io.BytesIO(image.data)) as optimized_image:
+            stats.optimized_tokens += estimate_image_tokens(*optimized_image.size)
+
+    return optimized_images, stats
@@ -0,0 +1,179 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from azure.core.exceptions import ResourceNotFoundError
+from pydantic import BaseModel
+
+from libs.azure_helper.aio.storage_blob import StorageBlobHelper
+from libs.pipeline.handlers.logics.map_handler.prompt_image_optimizer import (
+    PromptImage,
+)
+from libs.utils.remote_module_loader import get_json_schema
+
+RESPONSE_CACHE_FOLDER = "_cache/gpt_responses"
+
+
+def get_response_cache_key(
+    model: str,
+    response_format: type[BaseModel],
+    prompts: list[str],
+    images: list[PromptImage],
+    **options,
+) -> str:
+    """
+    Get the cache key of a GPT response.
+
+    The key hashes everything that reaches the model: the model, the JSON schema of the
+    response format, the prompts, the content hashes of the images and the request options.
+    """
+    key_source = {
+        "model": model,
+        "response_format": get_json_schema(response_format),
+        "prompts": prompts,
+        "images": [
+            f"{image.mime_type}:{hashlib.sha256(image.data).hexdigest()}"
+            for image in images
+        ],
+        "options": options,
+    }
+    return hashlib.sha256(
+        json.dumps(key_source, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Cache of the serialized GPT responses of the map step.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """
+        Get the cached response, None when it is not cached.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, response: str):
+        """
+        Cache the response.
+        """
+
+
+class DiskResponseCache(ResponseCache):
+    """
+    Response cache in a local folder, evicting the least recently used responses over max_bytes.
+    """
+
+    def __init__(self, folder: str = None, max_bytes: int = 0):
+        self.folder = Path(
+            folder or os.path.join(tempfile.gettempdir(), "cps_gpt_responses")
+        )
+        self.max_bytes = max_bytes
+
+    def _get_path(self, key: str) -> Path:
+        return self.folder / f"{key}.json"
+
+    def _read(self, key: str) -> str | None:
+        path = self._get_path(key)
+        try:
+            response = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+        # The modification time tracks the last use for the eviction
+        path.touch()
+        return response
+
+    def _write(self, key: str, response: str):
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see a partial response
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.folder, suffix=".tmp", delete=False
+        ) as temp_file:
+            temp_file.write(response)
+        Path(temp_file.name).replace(self._get_path(key))
+
+        if self.max_bytes > 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.folder.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, response: str):
+        await asyncio.to_thread(self._write, key, response)
+
+
+class BlobResponseCache(ResponseCache):
+    """
+    Response cache in the blob storage, shared by all the handler instances.
+    """
+
+    def __init__(self, account_url: str, container_name: str):
+        self._blob_helper = StorageBlobHelper(
+            account_url=account_url, container_name=container_name
+        )
+
+    async def get(self, key: str) -> str | None:
+        try:
+            return await self._blob_helper.download_text(
+                RESPONSE_CACHE_FOLDER, f"{key}.json"
+            )
+        except ResourceNotFoundError:
+            return None
+
+    async def set(self, key: str, response: str):
+        await self._blob_helper.upload_text(
+            RESPONSE_CACHE_FOLDER, f"{key}.json", response
+        )
+
+
+def get_response_cache(
+    backend: str,
+    account_url: str = None,
+    container_name: str = None,
+    folder: str = None,
+    max_bytes: int = 0,
+) -> ResponseCache:
+    """
+    Get the response cache of the given backend.
+
+    Args:
+        backend (str): "disk" for a local folder, "blob" for the blob storage.
+        account_url (str, optional): The URL of the blob storage account, for the blob backend.
+        container_name (str, optional): The container (and folder) of the cache, for the blob backend.
+        folder (str, optional): The local folder of the cache, for the disk backend. Defaults to a temporary folder.
+        max_bytes (int, optional): The size of the cache, for the disk backend. 0 for no limit.
+
+    Returns:
+        ResponseCache: The response cache.
+    """
+    if backend == "disk":
+        return DiskResponseCache(folder=folder, max_bytes=max_bytes)
+    if backend == "blob":
+        return BlobResponseCache(account_url=account_url, container_name=container_name)
+    raise ValueError(f"Unsupported response cache backend: {backend}")
@@ -2,10 +2,10 @@
 # Licensed under the MIT License.
 
 import datetime
-import json
 
 from libs.application.application_context import AppContext
 from libs.models.content_process import ContentProcess, Step_Outputs
+from libs.pipeline import lazy_artifact
 from libs.pipeline.entities.pipeline_file import ArtifactType, PipelineLogEntry
 from libs.pipeline.entities.pipeline_message_context import MessageContext
 from libs.pipeline.entities.pipeline_step_result import StepResult
@@ -46,7 +46,8 @@ class SaveHandler(HandlerBase):
         #########################################################
         # Get Results from All Steps - Content Understanding
         #########################################################
-        output_file_json_string_from_extract = self.download_output_file_to_json_string(
+        extract_result = await self.download_output_file(
+            context=context,
             processed_by="extract",
             artifact_type=ArtifactType.ExtractedContent,
         )
@@ -54,7 +55,8 @@ class SaveHandler(HandlerBase):
         ####################################################
         # Get the result from Map step handler - OpenAI
         ####################################################
-        output_file_json_string_from_map = self.download_output_file_to_json_string(
+        map_result = await self.download_output_file(
+            context=context,
             processed_by="map",
             artifact_type=ArtifactType.SchemaMappedData,
         )
@@ -62,16 +64,14 @@ class SaveHandler(HandlerBase):
         ##########################################################
         # Get the result from Evaluate step handler - Scored / Evaluated
         ##########################################################
-        output_file_json_string_from_evaluate = (
-            self.download_output_file_to_json_string(
-                processed_by="evaluate",
-                artifact_type=ArtifactType.ScoreMergedData,
-            )
-        )
-        # Deserialize the result to ParsedChatCompletion
-        evaluated_result = DataExtractionResult(
-            **json.loads(output_file_json_string_from_evaluate)
+        evaluate_result = await self.download_output_file(
+            context=context,
+            processed_by="evaluate",
+            artifact_type=ArtifactType.ScoreMergedData,
+            model_type=DataExtractionResult,
         )
+        # Deserialize the result to DataExtractionResult
+        evaluated_result = evaluate_result.model
 
         ########################################################
         # Setup Output Result
@@ -91,21 +91,21 @@ class SaveHandler(HandlerBase):
             Step_Outputs(
                 step_name="extract",
                 processed_time=find_process_result("extract").elapsed,
-                step_result=json.loads(output_file_json_string_from_extract),
+                step_result=extract_result,
             )
         )
         process_outputs.append(
             Step_Outputs(
                 step_name="map",
                 processed_time=find_process_result("map").elapsed,
-                step_result=json.loads(output_file_json_string_from_map),
+                step_result=map_result,
             )
         )
         process_outputs.append(
             Step_Outputs(
                 step_name="evaluate",
                 processed_time=find_process_result("evaluate").elapsed,
-                step_result=json.loads(output_file_json_string_from_evaluate),
+                step_result=evaluate_result,
             )
         )
 
@@ -137,7 +137,7 @@ class SaveHandler(HandlerBase):
                 context.data_pipeline.pipeline_status.process_results
             ),
             imported_time=datetime.datetime.strptime(
-                self._current_message_context.data_pipeline.pipeline_status.creation_time,
+                context.data_pipeline.pipeline_status.creation_time,
                 "%Y-%m-%dT%H:%M:%S.%fZ",
             ),
             entity_score=evaluated_result.confidence["overall_confidence"],
@@ -147,7 +147,7 @@ class SaveHandler(HandlerBase):
             ],
             prompt_tokens=evaluated_result.prompt_tokens,
             completion_tokens=evaluated_result.completion_tokens,
-            target_schema=Schema.get_schema(
+            target_schema=await Schema.get_schema_async(
                 schema_id=context.data_pipeline.pipeline_status.schema_id,
                 connection_string=self.application_context.configuration.app_cosmos_connstr,
                 database_name=self.application_context.configuration.app_cosmos_database,
@@ -160,7 +160,7 @@ class SaveHandler(HandlerBase):
         )
 
         # Save Result to Cosmos DB
-        processed_result.update_status_to_cosmos(
+        await processed_result.update_status_to_cosmos_async(
             connection_string=self.application_context.configuration.app_cosmos_connstr,
             database_name=self.application_context.configuration.app_cosmos_database,
             collection_name=self.application_context.configuration.app_cosmos_container_process,
@@ -178,10 +178,11 @@ class SaveHandler(HandlerBase):
                 }
             )
         )
-        processed_history.upload_json_text(
+        # Stream the step outputs, the raw outputs of the steps are written as they were downloaded
+        await processed_history.upload_json_chunks_async(
             account_url=self.application_context.configuration.app_storage_blob_url,
             container_name=self.application_context.configuration.app_cps_processes,
-            text=json.dumps([step.model_dump() for step in process_outputs]),
+            chunks=lazy_artifact.iter_json(process_outputs),
         )
 
         # Save Result as a file
@@ -196,7 +197,7 @@ class SaveHandler(HandlerBase):
                 }
             )
         )
-        result_file.upload_json_text(
+        await result_file.upload_json_text_async(
             account_url=self.application_context.configuration.app_storage_blob_url,
             container_name=self.application_context.configuration.app_cps_processes,
             text=processed_result.model_dump_json(),
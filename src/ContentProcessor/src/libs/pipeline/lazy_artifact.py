@@ -0,0 +1,133 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import json
+from typing import Any, Generic, Iterator, Optional, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    # Fall back to the standard json module
+    orjson = None
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+_NOT_PARSED = object()
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Parse a JSON document with orjson, or the standard json module when orjson is not installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> str:
+    """
+    Serialize a value to a JSON string with orjson, or the standard json module when orjson is not installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value)
+
+
+class LazyArtifact(Generic[ModelType]):
+    """
+    The raw JSON content of a step output, parsed on first access.
+
+    The parsed document and the typed model are memoized, so a step output is parsed
+    once however many times it is used. Callers needing a part of the document only
+    read it with get() without validating the whole document into the model.
+
+    Attributes:
+        raw (bytes): The raw JSON content.
+        model_type (type[BaseModel], optional): The type of the typed view of the document.
+    """
+
+    def __init__(self, raw: bytes | str, model_type: Optional[type[ModelType]] = None):
+        self.raw = raw.encode("utf-8") if isinstance(raw, str) else raw
+        self.model_type = model_type
+        self._text: Optional[str] = None
+        self._data: Any = _NOT_PARSED
+        self._model: Optional[ModelType] = None
+
+    @property
+    def text(self) -> str:
+        """
+        The JSON content as a string.
+        """
+        if self._text is None:
+            self._text = self.raw.decode("utf-8")
+        return self._text
+
+    @property
+    def data(self) -> Any:
+        """
+        The parsed JSON document.
+        """
+        if self._data is _NOT_PARSED:
+            self._data = loads(self.raw)
+        return self._data
+
+    @property
+    def model(self) -> ModelType:
+        """
+        The document validated into model_type.
+        """
+        if self._model is None:
+            if self.model_type is None:
+                raise ValueError("The artifact has no model type.")
+            self._model = self.model_type.model_validate(self.data)
+        return self._model
+
+    def get(self, *path: str | int, default: Any = None) -> Any:
+        """
+        Get a part of the parsed document by its keys and list indexes.
+
+        Example:
+            artifact.get("result", "contents", 0, "markdown")
+        """
+        value = self.data
+        for key in path:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return value
+
+
+def iter_json(value: Any) -> Iterator[bytes]:
+    """
+    Serialize a value to JSON piece by piece, without building the whole document in memory.
+
+    Lazy artifacts are written as their raw JSON content, without parsing it again.
+    Pydantic models are written field by field, so lazy artifacts in their fields are kept raw.
+    """
+    if isinstance(value, LazyArtifact):
+        yield value.raw
+    elif isinstance(value, BaseModel):
+        yield from iter_json(
+            {name: getattr(value, name) for name in type(value).model_fields}
+        )
+    elif isinstance(value, dict):
+        yield b"{"
+        for index, (key, item) in enumerate(value.items()):
+            if index > 0:
+                yield b","
+            yield dumps(str(key)).encode("utf-8")
+            yield b":"
+            yield from iter_json(item)
+        yield b"}"
+    elif isinstance(value, (list, tuple)):
+        yield b"["
+        for index, item in enumerate(value):
+            if index > 0:
+                yield b","
+            yield from iter_json(item)
+        yield b"]"
+    else:
+        yield dumps(value).encode("utf-8")
@@ -1,7 +1,10 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import asyncio
 import logging
+import random
+import threading
 
 from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
@@ -10,6 +13,11 @@ from azure.storage.queue import QueueClient, QueueMessage
 from libs.pipeline import pipeline_step_helper
 from libs.pipeline.entities.pipeline_data import DataPipeline
 
+# Long-lived queue clients of this process, keyed by account URL and queue name.
+# Each entry keeps its HTTP connection pool alive between messages.
+_queue_clients: dict[tuple[str, str], QueueClient] = {}
+_queue_clients_lock = threading.Lock()
+
 
 def create_queue_client_name(step_name: str) -> str:
     return f"content-pipeline-{step_name}-queue"
@@ -30,11 +38,17 @@ def invalidate_queue(queue_client: QueueClient):
 def create_or_get_queue_client(
     queue_name: str, accouont_url: str, credential: DefaultAzureCredential
 ) -> QueueClient:
-    queue_client = QueueClient(
-        account_url=accouont_url, queue_name=queue_name, credential=credential
-    )
-    invalidate_queue(queue_client)
-    return queue_client
+    return _create_queue_client(accouont_url, queue_name, credential)
+
+
+def clear_queue_clients():
+    """
+    Close and forget all queue clients registered in this process.
+    """
+    with _queue_clients_lock:
+        for queue_client in _queue_clients.values():
+            queue_client.close()
+        _queue_clients.clear()
 
 
 def delete_queue_message(message: QueueMessage, queue_client: QueueClient):
@@ -46,7 +60,12 @@ def move_to_dead_letter_queue(
     dead_letter_queue_client: QueueClient,
     queue_client: QueueClient,
 ):
-    dead_letter_queue_client.send_message(content=message.content)
+    try:
+        dead_letter_queue_client.send_message(content=message.content)
+    except ResourceNotFoundError:
+        # The dead letter queue has been deleted since the handler started
+        invalidate_queue(dead_letter_queue_client)
+        dead_letter_queue_client.send_message(content=message.content)
     delete_queue_message(message=message, queue_client=queue_client)
 
 
@@ -54,6 +73,138 @@ def has_messages(queue_client: QueueClient) -> bool:
     return queue_client.peek_messages(max_messages=1)
 
 
+# Maximum number of messages the Storage Queue service returns per receive call
+MAX_MESSAGES_PER_RECEIVE = 32
+
+
+def receive_messages(
+    queue_client: QueueClient, max_messages: int, visibility_timeout: int
+) -> list[QueueMessage]:
+    """
+    Receive up to max_messages messages with as few round trips as possible.
+    An empty list is returned when the queue is empty, so no separate peek is needed.
+    """
+    max_messages = max(1, min(max_messages, MAX_MESSAGES_PER_RECEIVE))
+    return list(
+        queue_client.receive_messages(
+            messages_per_page=max_messages,
+            max_messages=max_messages,
+            visibility_timeout=visibility_timeout,
+        )
+    )
+
+
+def renew_message_lease(
+    queue_client: QueueClient, message: QueueMessage, visibility_timeout: int
+):
+    """
+    Extend the visibility timeout of a message being processed.
+    The message keeps the new pop receipt so it can still be updated or deleted afterwards.
+    """
+    updated_message = queue_client.update_message(
+        message.id,
+        pop_receipt=message.pop_receipt,
+        visibility_timeout=visibility_timeout,
+    )
+    message.pop_receipt = updated_message.pop_receipt
+    message.next_visible_on = updated_message.next_visible_on
+
+
+class IdlePollingBackoff:
+    """
+    Jittered exponential backoff for polling an idle queue.
+
+    Every empty poll doubles the waiting time up to max_interval, and a random jitter
+    keeps idle workers from polling the storage account at the same moment.
+    reset() is called as soon as messages arrive, so the next poll happens immediately.
+    """
+
+    def __init__(
+        self, min_interval: float, max_interval: float, multiplier: float = 2.0
+    ):
+        self.min_interval = max(0.1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.multiplier = multiplier
+        self._empty_polls = 0
+
+    def next_interval(self) -> float:
+        """
+        Get the time to wait before the next poll after an empty poll.
+
+        Returns:
+            float: The interval in seconds, between min_interval and max_interval.
+        """
+        upper_bound = min(
+            self.max_interval,
+            self.min_interval * self.multiplier**self._empty_polls,
+        )
+        # Stop growing once the upper bound has reached max_interval
+        if upper_bound < self.max_interval:
+            self._empty_polls += 1
+
+        return max(self.min_interval, random.uniform(upper_bound / 2, upper_bound))
+
+    def reset(self):
+        self._empty_polls = 0
+
+
+class MessageLeaseKeeper:
+    """
+    Keeps a dequeued message invisible to other workers while it is being processed
+    by renewing its visibility timeout in the background.
+    """
+
+    def __init__(
+        self,
+        queue_client: QueueClient,
+        message: QueueMessage,
+        visibility_timeout: int,
+    ):
+        self.queue_client = queue_client
+        self.message = message
+        self.visibility_timeout = visibility_timeout
+        # Renew well before the message becomes visible again
+        self.renew_interval = max(1, visibility_timeout / 2)
+        self._stop_event = asyncio.Event()
+        self._task: asyncio.Task = None
+
+    def start(self) -> "MessageLeaseKeeper":
+        self._task = asyncio.create_task(self._keep_lease())
+        return self
+
+    async def stop(self):
+        """
+        Stop renewing the lease. A renewal in progress is completed first,
+        so the message holds the latest pop receipt when this returns.
+        """
+        self._stop_event.set()
+        if self._task is not None:
+            await self._task
+
+    async def _keep_lease(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._stop_event.wait(), timeout=self.renew_interval
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await asyncio.to_thread(
+                    renew_message_lease,
+                    self.queue_client,
+                    self.message,
+                    self.visibility_timeout,
+                )
+            except Exception as e:
+                logging.warning(
+                    f"Failed to renew the lease of message {self.message.id}: {e}"
+                )
+                return
+
+
 def pass_data_pipeline_to_next_step(
     data_pipeline: DataPipeline, account_url: str, credential: DefaultAzureCredential
 ):
@@ -64,16 +215,32 @@ def pass_data_pipeline_to_next_step(
     if next_step_name is None:
         return
 
-    _create_queue_client(
+    queue_client = _create_queue_client(
         account_url, create_queue_client_name(next_step_name), credential
-    ).send_message(data_pipeline.model_dump_json())
+    )
+    try:
+        queue_client.send_message(data_pipeline.model_dump_json())
+    except ResourceNotFoundError:
+        # The next step queue has been deleted since the client was registered
+        invalidate_queue(queue_client)
+        queue_client.send_message(data_pipeline.model_dump_json())
 
 
 def _create_queue_client(
     account_url: str, queue_name: str, credential: DefaultAzureCredential
 ) -> QueueClient:
-    queue_client = QueueClient(
-        account_url=account_url, queue_name=queue_name, credential=credential
-    )
-    invalidate_queue(queue_client)
+    """
+    Get the registered queue client for the queue, or create and register it.
+
+    The queue existence is only checked when the client is created.
+    """
+    key = (account_url, queue_name)
+    with _queue_clients_lock:
+        queue_client = _queue_clients.get(key)
+        if queue_client is None:
+            queue_client = QueueClient(
+                account_url=account_url, queue_name=queue_name, credential=credential
+            )
+            invalidate_queue(queue_client)
+            _queue_clients[key] = queue_client
     return queue_client
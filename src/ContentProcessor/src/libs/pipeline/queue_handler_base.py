@@ -8,16 +8,19 @@ import json
 import logging
 from abc import ABC, abstractmethod
 
-from azure.storage.queue import QueueClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.queue import QueueClient, QueueMessage
+from pydantic import BaseModel
 
 from libs.application.application_context import AppContext
 from libs.base.application_models import AppModelBase
 from libs.models.content_process import ContentProcess, Step_Outputs
-from libs.pipeline import pipeline_queue_helper
+from libs.pipeline import artifact_store, pipeline_queue_helper
 from libs.pipeline.entities.pipeline_data import DataPipeline
 from libs.pipeline.entities.pipeline_file import ArtifactType, PipelineLogEntry
 from libs.pipeline.entities.pipeline_message_context import MessageContext
 from libs.pipeline.entities.pipeline_step_result import StepResult
+from libs.pipeline.lazy_artifact import LazyArtifact
 from libs.utils import base64_util, stopwatch
 
 
@@ -28,7 +31,7 @@ class HandlerBase(AppModelBase, ABC):
     application_context: AppContext = None
     dead_letter_queue_client: QueueClient = None
     dead_letter_queue_name: str = None
-    _current_message_context: MessageContext = None
+    max_in_flight: int = 1
 
     def __init__(self, appContext: AppContext, step_name: str, **data):
         super().__init__(**data)
@@ -42,7 +45,32 @@ class HandlerBase(AppModelBase, ABC):
         # Initialize the handler
         self.__initialize_handler(app_context, step_name)
 
+        # Messages currently being processed by this handler process
+        in_flight: set[asyncio.Task] = set()
+
+        def on_message_done(task: asyncio.Task):
+            # Free the slot as soon as the message is done, and surface unexpected errors
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logging.error(
+                    f"Message processing failed - {self.queue_name}: {task.exception()}"
+                )
+
+        # Back off while the queue is idle, poll again immediately while messages keep coming
+        idle_backoff = pipeline_queue_helper.IdlePollingBackoff(
+            min_interval=self.application_context.configuration.app_message_queue_interval,
+            max_interval=self.application_context.configuration.app_message_queue_max_interval,
+        )
+
         while True:
+            # Done callbacks run on the next loop iteration, don't count the finished messages meanwhile
+            in_flight.difference_update([task for task in in_flight if task.done()])
+
+            # Wait for a free slot before pulling more messages from the queue
+            if len(in_flight) >= self.max_in_flight:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
             checking_message: str = """Checking Message.... at {datetime} by {queue_name}
             """
             checking_message = checking_message.format(
@@ -55,360 +83,369 @@ class HandlerBase(AppModelBase, ABC):
 
             logging.info(checking_message) if show_information else None
 
-            # Check if queue is available in the storage account or not
-            pipeline_queue_helper.invalidate_queue(self.queue_client)
-            pipeline_queue_helper.invalidate_queue(self.dead_letter_queue_client)
+            # Dequeue as many messages as there are free slots in a single call.
+            # The queue SDK is blocking, the messages in flight keep running meanwhile
+            try:
+                queue_messages = await asyncio.to_thread(
+                    pipeline_queue_helper.receive_messages,
+                    self.queue_client,
+                    max_messages=self.max_in_flight - len(in_flight),
+                    visibility_timeout=self.application_context.configuration.app_message_queue_process_timeout,
+                )
+            except ResourceNotFoundError:
+                # Queues are checked at startup, recreate them only when they have been deleted since
+                logging.warning(f"Queue not found. - {self.queue_name}")
+                await asyncio.to_thread(
+                    pipeline_queue_helper.invalidate_queue, self.queue_client
+                )
+                await asyncio.to_thread(
+                    pipeline_queue_helper.invalidate_queue,
+                    self.dead_letter_queue_client,
+                )
+                continue
 
-            # Check if there are any messages in the queue
-            if not pipeline_queue_helper.has_messages(self.queue_client):
+            if not queue_messages:
+                idle_interval = idle_backoff.next_interval()
                 print(
-                    f"No messages found. - {self.queue_name}"
+                    f"No messages found. - {self.queue_name} - next check in {idle_interval:.1f}s"
                 ) if show_information else None
 
-                await asyncio.sleep(
-                    # Sleep for 5 seconds
-                    self.application_context.configuration.app_message_queue_interval
-                )
+                await asyncio.sleep(idle_interval)
                 continue
 
-            # Process the message
-            for queue_message in self.queue_client.receive_messages(
-                max_messages=1,
-                visibility_timeout=self.application_context.configuration.app_message_queue_process_timeout,
-            ):
-                logging.info(
-                    f"Message dequeued {self.queue_name}: {queue_message.content}"
-                ) if show_information else None
+            idle_backoff.reset()
 
-                # Check if the message content is Base64 encoded string
-                if base64_util.is_base64_encoded(queue_message.content):
-                    queue_message.content = base64.b64decode(
-                        queue_message.content
-                    ).decode("utf-8")
+            # Process the messages concurrently
+            for queue_message in queue_messages:
+                task = asyncio.create_task(
+                    self._process_message(queue_message, show_information)
+                )
+                in_flight.add(task)
+                task.add_done_callback(on_message_done)
 
-                data_pipeline: DataPipeline = DataPipeline.get_object(
-                    queue_message.content
+            # Let the new tasks start before polling the queue again
+            await asyncio.sleep(0)
+
+    async def _process_message(
+        self, queue_message: QueueMessage, show_information: bool = True
+    ):
+        """
+        Process a single dequeued message with its own MessageContext.
+        Multiple messages can be processed concurrently by the same handler.
+
+        Args:
+            queue_message (QueueMessage): The message dequeued from the handler's queue.
+            show_information (bool, optional): If True, displays information about the processing. Defaults to True.
+        """
+        logging.info(
+            f"Message dequeued {self.queue_name}: {queue_message.content}"
+        ) if show_information else None
+
+        # Check if the message content is Base64 encoded string
+        if base64_util.is_base64_encoded(queue_message.content):
+            queue_message.content = base64.b64decode(queue_message.content).decode(
+                "utf-8"
+            )
+
+        try:
+            data_pipeline: DataPipeline = DataPipeline.get_object(
+                queue_message.content
+            )
+        except ValueError as e:
+            logging.error(f"Message is not a valid model. {e}")
+            await asyncio.to_thread(
+                pipeline_queue_helper.move_to_dead_letter_queue,
+                queue_message,
+                self.dead_letter_queue_client,
+                self.queue_client,
+            )
+            return
+
+        ########################################################
+        # Pass the message to the implementation of the method #
+        ########################################################
+        print(
+            f"Message received: {self.handler_name} \n {data_pipeline}"
+        ) if show_information else None
+
+        # Every message gets its own context
+        message_context = MessageContext(
+            queue_message=queue_message,
+            data_pipeline=data_pipeline,
+        )
+
+        # Set Active Step with current handler name
+        message_context.data_pipeline.pipeline_status.active_step = self.handler_name
+
+        # Keep the message invisible to other workers while it is being processed
+        lease_keeper = pipeline_queue_helper.MessageLeaseKeeper(
+            self.queue_client,
+            queue_message,
+            self.application_context.configuration.app_message_queue_process_timeout,
+        ).start()
+
+        try:
+            print(f"Start Processing : {self.handler_name}") if show_information else None
+            with stopwatch.Stopwatch() as timer:
+                # Execute the handler - Check each derived class for the implementation of the execute method
+                step_result = await self.execute(message_context)
+            print(
+                f"Completed : {self.handler_name} - Elapsed :{timer.elapsed_string}"
+            ) if show_information else None
+            # Steps executed in the same message keep their own elapsed time
+            if step_result.elapsed is None:
+                step_result.elapsed = timer.elapsed_string
+
+            await lease_keeper.stop()
+            await asyncio.to_thread(
+                self._complete_message, message_context, step_result
+            )
+        except Exception as e:
+            logging.error(f"Error Occurred: {e}")
+            await lease_keeper.stop()
+            try:
+                await asyncio.to_thread(self._handle_exception, message_context, e)
+            except Exception as handling_error:
+                logging.error(
+                    f"Failed to handle the error of {self.handler_name}: {handling_error}"
                 )
 
-                try:
-                    if data_pipeline is not None:
-                        ########################################################
-                        # Pass the message to the implementation of the method #
-                        ########################################################
-                        print(
-                            f"Message received: {self.handler_name} \n {data_pipeline}"
-                        ) if show_information else None
-
-                        # Set the current message context
-                        self._current_message_context = MessageContext(
-                            queue_message=queue_message,
-                            data_pipeline=data_pipeline,
-                        )
-
-                        # Set Active Step with current handler name
-                        self._current_message_context.data_pipeline.pipeline_status.active_step = self.handler_name
-
-                        print(
-                            f"Start Processing : {self.handler_name}"
-                        ) if show_information else None
-                        with stopwatch.Stopwatch() as timer:
-                            # Execute the handler - Check each derived class for the implementation of the execute method
-                            step_result = await self.execute(
-                                self._current_message_context
-                            )
-                        print(
-                            f"Completed : {self.handler_name} - Elapsed :{timer.elapsed_string}"
-                        ) if show_information else None
-                        step_result.elapsed = timer.elapsed_string
-
-                        # Save the executed result to persistent - Save the result as a file
-                        step_result.save_to_persistent_storage(
-                            self.application_context.configuration.app_storage_blob_url,
-                            self.application_context.configuration.app_cps_processes,
-                        )
-
-                        # Add result to the pipeline status
-                        self._current_message_context.data_pipeline.pipeline_status.add_step_result(
-                            step_result
-                        )
-
-                        # Save(update) pipeline status to the persistent storage
-                        self._current_message_context.data_pipeline.save_to_persistent_storage(
-                            self.application_context.configuration.app_storage_blob_url,
-                            self.application_context.configuration.app_cps_processes,
-                        )
-
-                        # Enqueue the message to the next step queue
-                        pipeline_queue_helper.pass_data_pipeline_to_next_step(
-                            self._current_message_context.data_pipeline,
-                            self.application_context.configuration.app_storage_queue_url,
-                            self.application_context.credential,
-                        )
-
-                        # Delete the message from the current queue
-                        pipeline_queue_helper.delete_queue_message(
-                            queue_message, self.queue_client
-                        )
-
-                        # Update Process Status to Cosmos DB
-                        # process_id, processed_file_name, status, last_modified_time, last_modified_by update per each every steps.
-                        ContentProcess(
-                            process_id=self._current_message_context.data_pipeline.pipeline_status.process_id,
-                            processed_file_name=self._current_message_context.data_pipeline.files[
-                                0
-                            ].name,
-                            processed_file_mime_type=self._current_message_context.data_pipeline.files[
-                                0
-                            ].mime_type,
-                            status="Completed"
-                            if self._current_message_context.data_pipeline.pipeline_status.completed
-                            else step_name,
-                            imported_time=datetime.datetime.strptime(
-                                self._current_message_context.data_pipeline.pipeline_status.creation_time,
-                                "%Y-%m-%dT%H:%M:%S.%fZ",
-                            ),
-                            last_modified_time=datetime.datetime.now(datetime.UTC),
-                            last_modified_by=step_name,
-                        ).update_process_status_to_cosmos(
-                            connection_string=self.application_context.configuration.app_cosmos_connstr,
-                            database_name=self.application_context.configuration.app_cosmos_database,
-                            collection_name=self.application_context.configuration.app_cosmos_container_process,
-                        )
-                    else:
-                        logging.error("Message is not a valid model.")
-                        self._move_to_dead_letter_queue(queue_message)
-                except Exception as e:
-                    logging.error(f"Error Occurred: {e}")
-
-                    def _get_artifact_type(step_name: str) -> ArtifactType:
-                        if step_name == "extract":
-                            return ArtifactType.ExtractedContent
-                        elif step_name == "map":
-                            return ArtifactType.SchemaMappedData
-                        elif step_name == "evaluate":
-                            return ArtifactType.ScoreMergedData
-                        else:
-                            return ArtifactType.Undefined
-
-                    def _find_process_result(step_name: str):
-                        return next(
-                            (
-                                result
-                                for result in self._current_message_context.data_pipeline.pipeline_status.process_results
-                                if result.step_name == step_name
-                            ),
-                            None,
-                        )
-
-                    # Save the exception to the status object
-                    if self._current_message_context is not None:
-                        # Add Exception Information
-                        self._current_message_context.data_pipeline.pipeline_status.exception = e
-                        # Add the result to the status object
-                        exception_result = StepResult(
-                            process_id=self._current_message_context.data_pipeline.pipeline_status.process_id,
-                            step_name=self.handler_name,
-                            result={
-                                "result": "error",
-                                "error": self._current_message_context.data_pipeline.pipeline_status.exception.model_dump_json(),
-                            },
-                        )
-
-                        # Add the exception result to the pipeline status
-                        self._current_message_context.data_pipeline.pipeline_status.add_step_result(
-                            exception_result
-                        )
-
-                        # Save the exception result to the persistent storage
-                        exception_result.save_to_persistent_storage(
-                            account_url=self.application_context.configuration.app_storage_blob_url,
-                            container_name=self.application_context.configuration.app_cps_processes,
-                        )
-
-                        # Save the pipeline status to the persistent storage
-                        self._current_message_context.data_pipeline.pipeline_status.save_to_persistent_storage(
-                            account_url=self.application_context.configuration.app_storage_blob_url,
-                            container_name=self.application_context.configuration.app_cps_processes,
-                        )
-
-                        # Update Process Status to Cosmos DB
-                        ContentProcess(
-                            process_id=self._current_message_context.data_pipeline.process_id,
-                            processed_file_name=self._current_message_context.data_pipeline.files[
-                                0
-                            ].name,
-                            status="Error",
-                            processed_file_mime_type=self._current_message_context.data_pipeline.files[
-                                0
-                            ].mime_type,
-                            last_modified_time=datetime.datetime.now(datetime.UTC),
-                            last_modified_by=step_name,
-                            imported_time=datetime.datetime.strptime(
-                                self._current_message_context.data_pipeline.pipeline_status.creation_time,
-                                "%Y-%m-%dT%H:%M:%S.%fZ",
-                            ),
-                            process_output=[
-                                Step_Outputs(
-                                    step_name=self.handler_name,
-                                    step_result=exception_result.result,
-                                )
-                            ],
-                        ).update_status_to_cosmos(
-                            connection_string=self.application_context.configuration.app_cosmos_connstr,
-                            database_name=self.application_context.configuration.app_cosmos_database,
-                            collection_name=self.application_context.configuration.app_cosmos_container_process,
-                        )
-
-                        #######################################################################
-                        #
-                        # Add Process Step Outputs and save to single file - step_outputs.json
-                        #
-                        #######################################################################
-                        # Get Executed Steps
-                        # executed_steps = self._current_message_context.data_pipeline.pipeline_status.completed_steps
-                        process_outputs: list[Step_Outputs] = []
-
-                        # append previous steps to process_outputs
-                        # for step in executed_steps:
-                        #     if (
-                        #         step
-                        #         == self._current_message_context.data_pipeline.pipeline_status.active_step
-                        #     ):
-                        #         continue
-
-                        #     output_json_string = (
-                        #         self.download_output_file_to_json_string(
-                        #             processed_by=step,
-                        #             artifact_type=_get_artifact_type(step),
-                        #         )
-                        #     )
-                        #     process_outputs.append(
-                        #         Step_Outputs(
-                        #             step_name=step,
-                        #             processed_time=_find_process_result(step).elapsed,
-                        #             step_result=json.loads(output_json_string),
-                        #         )
-                        #     )
-
-                        # When the message is dequeued more than 5 times, move the message to the Dead Letter Queue
-                        if queue_message.dequeue_count > 5:
-                            logging.info(
-                                "Message will be moved to the Dead Letter Queue."
-                            )
-                            dead_letter_result = StepResult(
-                                process_id=self._current_message_context.data_pipeline.pipeline_status.process_id,
-                                step_name=self.handler_name,
-                                result={
-                                    "result": "moved to Dead Letter Queue",
-                                    "error": self._current_message_context.data_pipeline.pipeline_status.exception.model_dump_json(),
-                                },
-                            )
-
-                            # Add the dead letter result to the pipeline status
-                            self._current_message_context.data_pipeline.pipeline_status.add_step_result(
-                                exception_result
-                            )
-
-                            # Save the dead letter result to the persistent storage
-                            dead_letter_result.save_to_persistent_storage(
-                                account_url=self.application_context.configuration.app_storage_blob_url,
-                                container_name=self.application_context.configuration.app_cps_processes,
-                            )
-
-                            self._current_message_context.data_pipeline.pipeline_status.add_step_result(
-                                dead_letter_result
-                            )
-
-                            # Save the pipeline status to the persistent storage
-                            self._current_message_context.data_pipeline.pipeline_status.save_to_persistent_storage(
-                                account_url=self.application_context.configuration.app_storage_blob_url,
-                                container_name=self.application_context.configuration.app_cps_processes,
-                            )
-
-                            # self._move_to_dead_letter_queue(queue_message)
-                            pipeline_queue_helper.move_to_dead_letter_queue(
-                                queue_message,
-                                self.dead_letter_queue_client,
-                                self.queue_client,
-                            )
-
-                            # Update Process Status - Deadletter queue moving - to Cosmos DB
-                            ContentProcess(
-                                process_id=self._current_message_context.data_pipeline.process_id,
-                                processed_file_name=self._current_message_context.data_pipeline.files[
-                                    0
-                                ].name,
-                                processed_file_mime_type=self._current_message_context.data_pipeline.files[
-                                    0
-                                ].mime_type,
-                                status="Error",
-                                last_modified_time=datetime.datetime.now(datetime.UTC),
-                                last_modified_by=step_name,
-                                imported_time=datetime.datetime.strptime(
-                                    self._current_message_context.data_pipeline.pipeline_status.creation_time,
-                                    "%Y-%m-%dT%H:%M:%S.%fZ",
-                                ),
-                                process_output=[
-                                    Step_Outputs(
-                                        step_name=self.handler_name,
-                                        step_result=dead_letter_result.result,
-                                    )
-                                ],
-                            ).update_status_to_cosmos(
-                                connection_string=self.application_context.configuration.app_cosmos_connstr,
-                                database_name=self.application_context.configuration.app_cosmos_database,
-                                collection_name=self.application_context.configuration.app_cosmos_container_process,
-                            )
-
-                            process_outputs.append(
-                                Step_Outputs(
-                                    step_name=self._current_message_context.data_pipeline.pipeline_status.active_step,
-                                    processed_time="error",
-                                    step_result=dead_letter_result,
-                                )
-                            )
-                        else:
-                            # Set visibility timeout to 30 seconds before the message becomes visible again
-                            self.queue_client.update_message(
-                                queue_message,
-                                visibility_timeout=self.application_context.configuration.app_message_queue_visibility_timeout,  # Adjust the timeout as needed
-                            )
-
-                            process_outputs.append(
-                                Step_Outputs(
-                                    step_name=self._current_message_context.data_pipeline.pipeline_status.active_step,
-                                    processed_time="error",
-                                    step_result=exception_result,
-                                )
-                            )
-
-                        # Add Output file
-                        processed_history = self._current_message_context.data_pipeline.add_file(
-                            file_name="step_outputs.json",
-                            artifact_type=_get_artifact_type(
-                                self._current_message_context.data_pipeline.pipeline_status.active_step,
-                            ),
-                        )
-                        processed_history.log_entries.append(
-                            PipelineLogEntry(
-                                **{
-                                    "source": self.handler_name,
-                                    "message": "Process Output has been added. this file should be deserialized to Step_Outputs[]",
-                                }
-                            )
-                        )
-
-                        processed_history.upload_json_text(
-                            account_url=self.application_context.configuration.app_storage_blob_url,
-                            container_name=self.application_context.configuration.app_cps_processes,
-                            text=json.dumps(
-                                [step.model_dump() for step in process_outputs]
-                            ),
-                        )
+    def _complete_message(self, context: MessageContext, step_result: StepResult):
+        """
+        Persist the step result, hand the message over to the next step and update the process status.
+        """
+        # The step that produced the result, the last one when several steps ran for the message
+        step_name = context.data_pipeline.pipeline_status.active_step
+
+        # Save the executed result to persistent - Save the result as a file
+        step_result.save_to_persistent_storage(
+            self.application_context.configuration.app_storage_blob_url,
+            self.application_context.configuration.app_cps_processes,
+        )
+
+        # Add result to the pipeline status
+        context.data_pipeline.pipeline_status.add_step_result(step_result)
+
+        # Save(update) pipeline status to the persistent storage
+        context.data_pipeline.save_to_persistent_storage(
+            self.application_context.configuration.app_storage_blob_url,
+            self.application_context.configuration.app_cps_processes,
+        )
+
+        # Enqueue the message to the next step queue
+        pipeline_queue_helper.pass_data_pipeline_to_next_step(
+            context.data_pipeline,
+            self.application_context.configuration.app_storage_queue_url,
+            self.application_context.credential,
+        )
+
+        # Delete the message from the current queue
+        pipeline_queue_helper.delete_queue_message(
+            context.queue_message, self.queue_client
+        )
+
+        # Update Process Status to Cosmos DB
+        # process_id, processed_file_name, status, last_modified_time, last_modified_by update per each every steps.
+        ContentProcess(
+            process_id=context.data_pipeline.pipeline_status.process_id,
+            processed_file_name=context.data_pipeline.files[0].name,
+            processed_file_mime_type=context.data_pipeline.files[0].mime_type,
+            status="Completed"
+            if context.data_pipeline.pipeline_status.completed
+            else step_name,
+            imported_time=datetime.datetime.strptime(
+                context.data_pipeline.pipeline_status.creation_time,
+                "%Y-%m-%dT%H:%M:%S.%fZ",
+            ),
+            last_modified_time=datetime.datetime.now(datetime.UTC),
+            last_modified_by=step_name,
+        ).update_process_status_to_cosmos(
+            connection_string=self.application_context.configuration.app_cosmos_connstr,
+            database_name=self.application_context.configuration.app_cosmos_database,
+            collection_name=self.application_context.configuration.app_cosmos_container_process,
+        )
+
+    def _handle_exception(self, context: MessageContext, e: Exception):
+        """
+        Record the exception of the step and retry the message or move it to the Dead Letter Queue.
+        """
+        queue_message = context.queue_message
+        # The step that failed, it can be any of the steps run for the message
+        step_name = context.data_pipeline.pipeline_status.active_step
+
+        def _get_artifact_type(step_name: str) -> ArtifactType:
+            if step_name == "extract":
+                return ArtifactType.ExtractedContent
+            elif step_name == "map":
+                return ArtifactType.SchemaMappedData
+            elif step_name == "evaluate":
+                return ArtifactType.ScoreMergedData
+            else:
+                return ArtifactType.Undefined
+
+        # Add Exception Information
+        context.data_pipeline.pipeline_status.exception = e
+        # Add the result to the status object
+        exception_result = StepResult(
+            process_id=context.data_pipeline.pipeline_status.process_id,
+            step_name=step_name,
+            result={
+                "result": "error",
+                "error": context.data_pipeline.pipeline_status.exception.model_dump_json(),
+            },
+        )
+
+        # Add the exception result to the pipeline status
+        context.data_pipeline.pipeline_status.add_step_result(exception_result)
+
+        # Save the exception result to the persistent storage
+        exception_result.save_to_persistent_storage(
+            account_url=self.application_context.configuration.app_storage_blob_url,
+            container_name=self.application_context.configuration.app_cps_processes,
+        )
+
+        # Save the pipeline status to the persistent storage
+        context.data_pipeline.pipeline_status.save_to_persistent_storage(
+            account_url=self.application_context.configuration.app_storage_blob_url,
+            container_name=self.application_context.configuration.app_cps_processes,
+        )
+
+        # Update Process Status to Cosmos DB
+        ContentProcess(
+            process_id=context.data_pipeline.process_id,
+            processed_file_name=context.data_pipeline.files[0].name,
+            status="Error",
+            processed_file_mime_type=context.data_pipeline.files[0].mime_type,
+            last_modified_time=datetime.datetime.now(datetime.UTC),
+            last_modified_by=step_name,
+            imported_time=datetime.datetime.strptime(
+                context.data_pipeline.pipeline_status.creation_time,
+                "%Y-%m-%dT%H:%M:%S.%fZ",
+            ),
+            process_output=[
+                Step_Outputs(
+                    step_name=step_name,
+                    step_result=exception_result.result,
+                )
+            ],
+        ).update_status_to_cosmos(
+            connection_string=self.application_context.configuration.app_cosmos_connstr,
+            database_name=self.application_context.configuration.app_cosmos_database,
+            collection_name=self.application_context.configuration.app_cosmos_container_process,
+        )
+
+        #######################################################################
+        #
+        # Add Process Step Outputs and save to single file - step_outputs.json
+        #
+        #######################################################################
+        process_outputs: list[Step_Outputs] = []
+
+        # When the message is dequeued more than 5 times, move the message to the Dead Letter Queue
+        if queue_message.dequeue_count > 5:
+            logging.info("Message will be moved to the Dead Letter Queue.")
+            dead_letter_result = StepResult(
+                process_id=context.data_pipeline.pipeline_status.process_id,
+                step_name=step_name,
+                result={
+                    "result": "moved to Dead Letter Queue",
+                    "error": context.data_pipeline.pipeline_status.exception.model_dump_json(),
+                },
+            )
+
+            # Add the dead letter result to the pipeline status
+            context.data_pipeline.pipeline_status.add_step_result(exception_result)
+
+            # Save the dead letter result to the persistent storage
+            dead_letter_result.save_to_persistent_storage(
+                account_url=self.application_context.configuration.app_storage_blob_url,
+                container_name=self.application_context.configuration.app_cps_processes,
+            )
+
+            context.data_pipeline.pipeline_status.add_step_result(dead_letter_result)
+
+            # Save the pipeline status to the persistent storage
+            context.data_pipeline.pipeline_status.save_to_persistent_storage(
+                account_url=self.application_context.configuration.app_storage_blob_url,
+                container_name=self.application_context.configuration.app_cps_processes,
+            )
+
+            pipeline_queue_helper.move_to_dead_letter_queue(
+                queue_message,
+                self.dead_letter_queue_client,
+                self.queue_client,
+            )
+
+            # Update Process Status - Deadletter queue moving - to Cosmos DB
+            ContentProcess(
+                process_id=context.data_pipeline.process_id,
+                processed_file_name=context.data_pipeline.files[0].name,
+                processed_file_mime_type=context.data_pipeline.files[0].mime_type,
+                status="Error",
+                last_modified_time=datetime.datetime.now(datetime.UTC),
+                last_modified_by=step_name,
+                imported_time=datetime.datetime.strptime(
+                    context.data_pipeline.pipeline_status.creation_time,
+                    "%Y-%m-%dT%H:%M:%S.%fZ",
+                ),
+                process_output=[
+                    Step_Outputs(
+                        step_name=step_name,
+                        step_result=dead_letter_result.result,
+                    )
+                ],
+            ).update_status_to_cosmos(
+                connection_string=self.application_context.configuration.app_cosmos_connstr,
+                database_name=self.application_context.configuration.app_cosmos_database,
+                collection_name=self.application_context.configuration.app_cosmos_container_process,
+            )
+
+            process_outputs.append(
+                Step_Outputs(
+                    step_name=context.data_pipeline.pipeline_status.active_step,
+                    processed_time="error",
+                    step_result=dead_letter_result,
+                )
+            )
+        else:
+            # Set visibility timeout to 30 seconds before the message becomes visible again
+            self.queue_client.update_message(
+                queue_message,
+                visibility_timeout=self.application_context.configuration.app_message_queue_visibility_timeout,  # Adjust the timeout as needed
+            )
+
+            process_outputs.append(
+                Step_Outputs(
+                    step_name=context.data_pipeline.pipeline_status.active_step,
+                    processed_time="error",
+                    step_result=exception_result,
+                )
+            )
+
+        # Add Output file
+        processed_history = context.data_pipeline.add_file(
+            file_name="step_outputs.json",
+            artifact_type=_get_artifact_type(
+                context.data_pipeline.pipeline_status.active_step,
+            ),
+        )
+        processed_history.log_entries.append(
+            PipelineLogEntry(
+                **{
+                    "source": step_name,
+                    "message": "Process Output has been added. this file should be deserialized to Step_Outputs[]",
+                }
+            )
+        )
+
+        processed_history.upload_json_text(
+            account_url=self.application_context.configuration.app_storage_blob_url,
+            container_name=self.application_context.configuration.app_cps_processes,
+            text=json.dumps([step.model_dump() for step in process_outputs]),
+        )
 
     def __initialize_handler(self, appContext: AppContext, step_name: str):
-        self.handler_name = step_name
-        self.application_context = appContext
+        self._bind_step(appContext, step_name)
 
         # Create a queue name based on the handler name
         self.queue_name = pipeline_queue_helper.create_queue_client_name(
@@ -439,6 +476,27 @@ class HandlerBase(AppModelBase, ABC):
         # Show the queue information (not for dead letter queue)
         self._show_queue_information()
 
+    def _bind_step(self, app_context: AppContext, step_name: str):
+        """
+        Bind the handler to its step and the application context of the hosting process.
+        """
+        self.handler_name = step_name
+        self.application_context = app_context
+
+        # Number of messages processed concurrently by this handler process
+        self.max_in_flight = (
+            self.application_context.configuration.get_step_max_in_flight(
+                self.handler_name
+            )
+        )
+
+        # Keep the step files on the host, so the next steps don't download them again
+        artifact_store.configure_artifact_cache(
+            tier=self.application_context.configuration.app_artifact_cache_tier,
+            max_bytes=self.application_context.configuration.app_artifact_cache_max_bytes,
+            folder=self.application_context.configuration.app_artifact_cache_folder,
+        )
+
     def _show_queue_information(self):
         queue_statue_message: str = """
         ************************************************************************************************
@@ -482,30 +540,56 @@ class HandlerBase(AppModelBase, ABC):
             )
         )
 
-    def download_output_file_to_json_string(
-        self, processed_by: str, artifact_type: ArtifactType
-    ):
+    async def download_output_file(
+        self,
+        context: MessageContext,
+        processed_by: str,
+        artifact_type: ArtifactType,
+        model_type: type[BaseModel] = None,
+    ) -> LazyArtifact:
         """
-        Download the output file stream and convert it to a JSON string.
+        Download the output file of a previous step, parsed lazily on first access.
 
         Args:
+            context (MessageContext): The context of the message being processed.
             processed_by (str): The name of the step that processed the file.
             artifact_type (ArtifactType): The type of artifact.
+            model_type (type[BaseModel], optional): The type of the typed view of the output file.
 
         Returns:
-            str: The output file as a JSON string.
+            LazyArtifact: The output file content.
         """
         output_files = [
             file
-            for file in self._current_message_context.data_pipeline.files
+            for file in context.data_pipeline.files
             if file.processed_by == processed_by and file.artifact_type == artifact_type
         ]
 
         # Download the output file stream
-        output_file_stream = output_files[0].download_stream(
+        output_file_stream = await output_files[0].download_stream_async(
             self.application_context.configuration.app_storage_blob_url,
             self.application_context.configuration.app_cps_processes,
         )
 
+        return LazyArtifact(output_file_stream, model_type)
+
+    async def download_output_file_to_json_string(
+        self, context: MessageContext, processed_by: str, artifact_type: ArtifactType
+    ):
+        """
+        Download the output file stream and convert it to a JSON string.
+
+        Args:
+            context (MessageContext): The context of the message being processed.
+            processed_by (str): The name of the step that processed the file.
+            artifact_type (ArtifactType): The type of artifact.
+
+        Returns:
+            str: The output file as a JSON string.
+        """
+        output_file = await self.download_output_file(
+            context=context, processed_by=processed_by, artifact_type=artifact_type
+        )
+
         # Convert the output file stream to a JSON string
-        return output_file_stream.decode("utf-8")
+        return output_file.text
@@ -5,6 +5,8 @@ from typing import Any, Tuple
 from pydantic import BaseModel
 
 from libs.application.application_context import AppContext
+from libs.pipeline.fused_pipeline_handler import FusedPipelineHandler
+from libs.pipeline.queue_handler_base import HandlerBase
 
 
 class HandlerInfo(BaseModel):
@@ -40,6 +42,42 @@ class HandlerHostManager:
             }
         )
 
+    def add_fused_handlers_as_process(
+        self,
+        step_handlers: dict[str, HandlerBase],
+        app_context: AppContext,
+        steps: list[str] = None,
+    ):
+        """
+        Register one fused handler process per step, each running the step handlers in one coroutine chain.
+
+        Every process listens to the queue of its step and passes the data pipeline to the
+        next steps in memory. The process of the first step runs the whole chain, the other
+        processes pick up the messages queued at a later step, e.g. before the switch to
+        the fused mode, and run the rest of the chain from there.
+
+        Raises:
+            ValueError: When a step of the pipeline has no step handler.
+        """
+        missing_steps = [step for step in (steps or []) if step not in step_handlers]
+        if missing_steps:
+            raise ValueError(
+                f"No fused handler for the steps: {', '.join(missing_steps)}"
+            )
+
+        for step_name in step_handlers:
+            fused_handler = FusedPipelineHandler(
+                appContext=app_context,
+                step_name=step_name,
+                step_handlers=step_handlers,
+            )
+
+            self.add_handlers_as_process(
+                target_function=fused_handler.connect_queue,
+                process_name=f"fused-{step_name}",
+                args=(False, app_context, step_name),
+            )
+
     async def start_handler_processes(self, test_mode: bool = False):
         for handler in self.handlers:
             handler["handler_info"].handler.start()
@@ -0,0 +1,43 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import threading
+import time
+
+
+class EvictionSchedule:
+    """
+    Limits how often a process evicts a blob cache.
+
+    The eviction lists the whole cache folder, so it runs on write at most once
+    per interval in each process instead of on every write.
+
+    Attributes:
+        interval_seconds (float): The shortest time between two evictions.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._last_due_at: float = None
+        self._lock = threading.Lock()
+
+    def is_due(self) -> bool:
+        """
+        Check whether the eviction is due, the next evictions wait for the interval when it is.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._last_due_at is not None
+                and now - self._last_due_at < self.interval_seconds
+            ):
+                return False
+            self._last_due_at = now
+            return True
+
+    def clear(self):
+        """
+        Forget the last eviction, the next check is due.
+        """
+        with self._lock:
+            self._last_due_at = None
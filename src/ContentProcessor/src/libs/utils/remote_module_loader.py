@@ -3,9 +3,43 @@
 
 import importlib.util
 import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+
+from libs.azure_helper.storage_blob import StorageBlobHelper
+
+# Number of compiled schema classes kept in memory
+SCHEMA_CACHE_SIZE = 32
+# Seconds a compiled schema class is used before the blob is revalidated
+SCHEMA_REVALIDATE_SECONDS = 60
+
+
+class _CachedSchemaClass:
+    def __init__(self, etag: str, loaded_class: type):
+        self.etag = etag
+        self.loaded_class = loaded_class
+        self.validated_at = time.monotonic()
+
+
+# Compiled schema classes by (account_url, container_name, blob_name, module_name), in LRU order
+_schema_classes: OrderedDict[tuple[str, str, str, str], _CachedSchemaClass] = (
+    OrderedDict()
+)
+_schema_classes_lock = threading.Lock()
+
+
+def clear_schema_cache():
+    """
+    Forget the compiled schema classes of this process.
+    """
+    with _schema_classes_lock:
+        _schema_classes.clear()
+    get_json_schema.cache_clear()
 
 
 def load_schema_from_blob(
@@ -13,24 +47,54 @@ def load_schema_from_blob(
 ):
     """
     Load the schema from a blob in Azure Storage.
+
+    The compiled schema class is kept in memory. After SCHEMA_REVALIDATE_SECONDS, the blob
+    is revalidated with a conditional request on its ETag and only downloaded and executed
+    again when it has changed.
     """
-    # Download the blob content
-    blob_content = _download_blob_content(container_name, blob_name, account_url)
+    key = (account_url, container_name, blob_name, module_name)
+    with _schema_classes_lock:
+        cached = _schema_classes.get(key)
+        if cached is not None:
+            _schema_classes.move_to_end(key)
+            if time.monotonic() - cached.validated_at < SCHEMA_REVALIDATE_SECONDS:
+                return cached.loaded_class
+
+    # Download the blob content, unless it didn't change since it was compiled
+    try:
+        blob_content, etag = _download_blob_content(
+            container_name, blob_name, account_url, etag=cached.etag if cached else None
+        )
+    except ResourceNotModifiedError:
+        cached.validated_at = time.monotonic()
+        return cached.loaded_class
 
     # Execute the script content
-    module_name = module_name
     module = _execute_script(blob_content, module_name)
 
     loaded_class = getattr(module, module_name)
+
+    with _schema_classes_lock:
+        _schema_classes[key] = _CachedSchemaClass(etag, loaded_class)
+        _schema_classes.move_to_end(key)
+        while len(_schema_classes) > SCHEMA_CACHE_SIZE:
+            _schema_classes.popitem(last=False)
+
     return loaded_class
 
 
-def _download_blob_content(container_name, blob_name, account_url):
-    # Create the BlobServiceClient object which will be used to create a container client
-    credential = DefaultAzureCredential()
-    blob_service_client = BlobServiceClient(
-        account_url=account_url, credential=credential
-    )
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def get_json_schema(schema_class: type) -> dict:
+    """
+    Get the JSON schema of a schema class, generated once per compiled class.
+    The returned dictionary is shared and must not be modified.
+    """
+    return schema_class.model_json_schema()
+
+
+def _download_blob_content(container_name, blob_name, account_url, etag=None):
+    # Use the BlobServiceClient shared by the process
+    blob_service_client = StorageBlobHelper(account_url=account_url).blob_service_client
 
     # Create a blob client using the local file name as the name for the blob
     blob_client = blob_service_client.get_blob_client(
@@ -39,9 +103,15 @@ def _download_blob_content(container_name, blob_name, account_url):
 
     print(f"\nDownloading blob content from \n\t{blob_name}")
 
-    # Download the blob content as a string
-    blob_content = blob_client.download_blob().readall().decode("utf-8")
-    return blob_content
+    # Download the blob content as a string, if it doesn't match the known ETag
+    if etag:
+        downloader = blob_client.download_blob(
+            etag=etag, match_condition=MatchConditions.IfModified
+        )
+    else:
+        downloader = blob_client.download_blob()
+    blob_content = downloader.readall().decode("utf-8")
+    return blob_content, downloader.properties.etag
 
 
 def _execute_script(script_content, module_name):
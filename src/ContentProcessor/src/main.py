@@ -37,20 +37,38 @@ class Application(AppMainBase):
 
         # Prepare Process Manager
         handler_host_manager = HandlerHostManager()
-        for step in steps:
-            # Dynamic Processor Loader
-            loaded_handler = handler_type_loader.load(step)(
-                appContext=self.application_context,
-                step_name=step,
-            )
 
-            # Register Process to the Process Manager
-            # args => ShowInformation : False on Production
-            handler_host_manager.add_handlers_as_process(
-                target_function=loaded_handler.connect_queue,
-                process_name=loaded_handler.handler_name,
-                args=(False, self.application_context, step),
+        if (
+            self.application_context.configuration.app_pipeline_execution_mode
+            == "fused"
+        ):
+            # Run all the steps in a single coroutine chain, passing the data pipeline in memory
+            handler_host_manager.add_fused_handlers_as_process(
+                step_handlers={
+                    step: handler_type_loader.load(step)(
+                        appContext=self.application_context,
+                        step_name=step,
+                    )
+                    for step in steps
+                },
+                app_context=self.application_context,
+                steps=steps,
             )
+        else:
+            for step in steps:
+                # Dynamic Processor Loader
+                loaded_handler = handler_type_loader.load(step)(
+                    appContext=self.application_context,
+                    step_name=step,
+                )
+
+                # Register Process to the Process Manager
+                # args => ShowInformation : False on Production
+                handler_host_manager.add_handlers_as_process(
+                    target_function=loaded_handler.connect_queue,
+                    process_name=loaded_handler.handler_name,
+                    args=(False, self.application_context, step),
+                )
 
         # Start All registered processes
         await handler_host_manager.start_handler_processes(test_mode)
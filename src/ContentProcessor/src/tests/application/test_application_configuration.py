@@ -0,0 +1,38 @@
+from libs.application.application_configuration import AppConfiguration
+
+
+def _configuration(**data) -> AppConfiguration:
+    return AppConfiguration.model_construct(**data)
+
+
+def test_get_step_max_in_flight_default(monkeypatch):
+    monkeypatch.delenv("APP_EXTRACT_MAX_IN_FLIGHT", raising=False)
+    configuration = _configuration(app_message_queue_max_in_flight=3)
+    assert configuration.get_step_max_in_flight("extract") == 3
+
+
+def test_get_step_max_in_flight_step_override(monkeypatch):
+    monkeypatch.setenv("APP_EXTRACT_MAX_IN_FLIGHT", "8")
+    configuration = _configuration(app_message_queue_max_in_flight=3)
+    assert configuration.get_step_max_in_flight("extract") == 8
+    assert configuration.get_step_max_in_flight("map") == 3
+
+
+def test_get_step_max_in_flight_is_at_least_one(monkeypatch):
+    monkeypatch.setenv("APP_MAP_MAX_IN_FLIGHT", "0")
+    configuration = _configuration(app_message_queue_max_in_flight=3)
+    assert configuration.get_step_max_in_flight("map") == 1
+
+
+def test_get_step_max_in_flight_batches_by_default(monkeypatch):
+    monkeypatch.delenv("APP_EXTRACT_MAX_IN_FLIGHT", raising=False)
+    configuration = _configuration()
+    assert configuration.get_step_max_in_flight("extract") == 8
+
+
+def test_caches_and_image_optimization_are_opt_in():
+    configuration = _configuration()
+    assert configuration.app_artifact_cache_tier == "none"
+    assert configuration.app_map_page_cache_enable is False
+    assert configuration.app_map_image_optimize_enable is False
+    assert configuration.app_map_response_cache_enable is False
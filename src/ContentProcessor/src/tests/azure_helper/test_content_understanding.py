@@ -0,0 +1,113 @@
+import email.utils
+import time
+from unittest.mock import Mock
+
+import pytest
+from azure.core.credentials import AccessToken
+from libs.azure_helper.content_understanding import (
+    AzureContentUnderstandingHelper,
+    CachedTokenProvider,
+    PollingSchedule,
+    clear_shared_clients,
+    get_retry_after_seconds,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_clients():
+    clear_shared_clients()
+    yield
+    clear_shared_clients()
+
+
+def test_get_retry_after_seconds():
+    assert get_retry_after_seconds({}) is None
+    assert get_retry_after_seconds({"retry-after": "3"}) == 3
+    assert get_retry_after_seconds({"retry-after-ms": "500"}) == 0.5
+    assert get_retry_after_seconds({"retry-after": "not a number"}) is None
+
+
+def test_get_retry_after_seconds_with_http_date():
+    retry_at = email.utils.formatdate(time.time() + 10, usegmt=True)
+
+    assert 8 <= get_retry_after_seconds({"retry-after": retry_at}) <= 10
+
+
+def test_polling_schedule_backs_off_up_to_max_interval():
+    schedule = PollingSchedule(initial_interval=0.25, max_interval=2)
+
+    intervals = [schedule.next_interval({}, 120) for _ in range(6)]
+
+    assert intervals == [0.25, 0.5, 1, 2, 2, 2]
+
+
+def test_polling_schedule_honours_retry_after_and_timeout():
+    schedule = PollingSchedule(initial_interval=0.25, max_interval=2)
+
+    assert schedule.next_interval({"retry-after": "5"}, 120) == 5
+    assert schedule.next_interval({"retry-after": "5"}, 1.5) == 1.5
+    # The server hint doesn't consume the backoff
+    assert schedule.next_interval({}, 120) == 0.25
+
+
+def test_poll_result_parses_each_response_once(mocker):
+    mock_credential_class = mocker.patch(
+        "libs.azure_helper.content_understanding.DefaultAzureCredential"
+    )
+    mock_credential_class.return_value.get_token.return_value = AccessToken(
+        "token", int(time.time()) + 3600
+    )
+    mock_sleep = mocker.patch("libs.azure_helper.content_understanding.time.sleep")
+    running = Mock(headers={"retry-after": "1"})
+    running.json.return_value = {"status": "Running"}
+    succeeded = Mock(headers={})
+    succeeded.json.return_value = {"status": "Succeeded", "result": {}}
+    mocker.patch(
+        "libs.azure_helper.content_understanding.requests.Session.get",
+        side_effect=[running, succeeded],
+    )
+    helper = AzureContentUnderstandingHelper("https://example.com")
+
+    result = helper.poll_result(
+        Mock(headers={"operation-location": "https://example.com/results/1"})
+    )
+
+    assert result == {"status": "Succeeded", "result": {}}
+    running.json.assert_called_once()
+    succeeded.json.assert_called_once()
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.25, 1]
+
+
+def test_cached_token_provider_reuses_token_until_close_to_expiry():
+    credential = Mock()
+    credential.get_token.side_effect = [
+        AccessToken("first", int(time.time()) + 3600),
+        AccessToken("second", int(time.time()) + 3600),
+    ]
+    token_provider = CachedTokenProvider(credential)
+
+    assert token_provider.get_token() == "first"
+    assert token_provider.get_token() == "first"
+    credential.get_token.assert_called_once()
+
+    # Expires within the refresh margin
+    token_provider._token = AccessToken("first", int(time.time()) + 60)
+    assert token_provider.get_token() == "second"
+
+
+def test_helpers_share_token_provider_and_session(mocker):
+    mock_credential_class = mocker.patch(
+        "libs.azure_helper.content_understanding.DefaultAzureCredential"
+    )
+    mock_credential_class.return_value.get_token.return_value = AccessToken(
+        "token", int(time.time()) + 3600
+    )
+
+    first = AzureContentUnderstandingHelper("https://example.com")
+    second = AzureContentUnderstandingHelper("https://example.com")
+
+    assert first._session is second._session
+    assert first._headers["Authorization"] == "Bearer token"
+    assert second._headers["Authorization"] == "Bearer token"
+    mock_credential_class.assert_called_once()
+    mock_credential_class.return_value.get_token.assert_called_once()
@@ -0,0 +1,80 @@
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+from libs.azure_helper.aio import content_understanding as content_understanding_aio
+
+
+@pytest_asyncio.fixture
+async def helper(mocker):
+    mock_credential_class = mocker.patch(
+        "libs.azure_helper.aio.content_understanding.DefaultAzureCredential"
+    )
+    mock_credential_class.return_value.get_token = mocker.AsyncMock(
+        return_value=mocker.Mock(token="token", expires_on=time.time() + 3600)
+    )
+    mock_credential_class.return_value.close = mocker.AsyncMock()
+    return content_understanding_aio.AzureContentUnderstandingHelper(
+        "https://example.com/"
+    )
+
+
+def _use_transport(helper, handler):
+    helper._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_begin_analyze_stream(helper):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(
+            202, headers={"operation-location": "https://example.com/results/1"}
+        )
+
+    _use_transport(helper, handler)
+
+    response = await helper.begin_analyze_stream("prebuilt-layout", b"file")
+
+    assert response.headers["operation-location"] == "https://example.com/results/1"
+    assert requests[0].headers["Authorization"] == "Bearer token"
+    assert requests[0].content == b"file"
+    assert str(requests[0].url).startswith(
+        "https://example.com/contentunderstanding/analyzers/prebuilt-layout:analyze"
+    )
+    await content_understanding_aio.close_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_poll_result(helper):
+    statuses = iter(["Running", "Succeeded"])
+
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"status": next(statuses), "result": {}})
+
+    _use_transport(helper, handler)
+    response = httpx.Response(
+        202, headers={"operation-location": "https://example.com/results/1"}
+    )
+
+    result = await helper.poll_result(response, polling_interval_seconds=0)
+
+    assert result == {"status": "Succeeded", "result": {}}
+    await content_understanding_aio.close_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_poll_result_failed(helper):
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"status": "Failed"})
+
+    _use_transport(helper, handler)
+    response = httpx.Response(
+        202, headers={"operation-location": "https://example.com/results/1"}
+    )
+
+    with pytest.raises(RuntimeError, match="Request failed."):
+        await helper.poll_result(response, polling_interval_seconds=0)
+    await content_understanding_aio.close_client_pool()
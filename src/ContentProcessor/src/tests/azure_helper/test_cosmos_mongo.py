@@ -1,8 +1,15 @@
 import pytest
-from libs.azure_helper.comsos_mongo import CosmosMongDBHelper
+from libs.azure_helper.comsos_mongo import CosmosMongDBHelper, clear_client_pool
 import mongomock
 
 
+@pytest.fixture(autouse=True)
+def reset_client_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
 @pytest.fixture
 def mock_mongo_client(monkeypatch):
     def mock_mongo_client_init(*args, **kwargs):
@@ -87,3 +94,23 @@ def test_delete_document(mock_mongo_client):
 
     result = helper.find_document({"Id": "123"})
     assert len(result) == 0
+
+
+def test_client_and_collection_are_prepared_once(mock_mongo_client, mocker):
+    create_container = mocker.spy(CosmosMongDBHelper, "_create_container")
+    create_indexes = mocker.spy(CosmosMongDBHelper, "_create_indexes")
+
+    first = CosmosMongDBHelper(
+        "connection_string", "db_name", "container_name", indexes=["field1"]
+    )
+    second = CosmosMongDBHelper(
+        "connection_string", "db_name", "container_name", indexes=["field1"]
+    )
+    third = CosmosMongDBHelper(
+        "connection_string", "db_name", "container_name", indexes=["field2"]
+    )
+
+    assert first.client is second.client is third.client
+    assert create_container.call_count == 1
+    assert create_indexes.call_count == 2
+    assert "field2_1" in third.container.index_information()
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+from libs.azure_helper.aio.loop_pool import LoopPool
+
+
+@pytest.mark.asyncio
+async def test_pool_is_shared_within_an_event_loop():
+    loop_pool = LoopPool(dict)
+
+    assert loop_pool.get() is loop_pool.get()
+    pool = loop_pool.get()
+    assert loop_pool.pop() is pool
+    assert loop_pool.pop() is None
+    assert loop_pool.get() is not pool
+
+
+def test_each_event_loop_gets_its_own_pool():
+    loop_pool = LoopPool(dict)
+
+    async def get_pool():
+        return loop_pool.get()
+
+    assert asyncio.run(get_pool()) is not asyncio.run(get_pool())
@@ -1,6 +1,13 @@
 import pytest
 from io import BytesIO
-from libs.azure_helper.storage_blob import StorageBlobHelper
+from libs.azure_helper.storage_blob import StorageBlobHelper, clear_client_pool
+
+
+@pytest.fixture(autouse=True)
+def reset_client_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
 
 
 @pytest.fixture
@@ -179,3 +186,32 @@ def test_upload_blob_with_io(storage_blob_helper, mock_blob_service_client, mock
 def test_upload_blob_with_unsupported_type(storage_blob_helper):
     with pytest.raises(ValueError, match="Unsupported data type for upload"):
         storage_blob_helper.upload_blob("testcontainer", "testblob", 12345)
+
+
+def test_clients_are_shared_between_helpers(
+    mock_blob_service_client, mock_default_azure_credential
+):
+    first = StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer/folder",
+    )
+    second = StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer/other-folder",
+    )
+
+    assert first.blob_service_client is second.blob_service_client
+    assert first.credential is second.credential
+    mock_default_azure_credential.assert_called_once()
+    mock_blob_service_client.assert_called_once()
+    # The container existence is only checked for the first helper
+    mock_blob_service_client.return_value.get_container_client.return_value.exists.assert_called_once()
+
+
+def test_clear_client_pool_closes_clients_and_credential(
+    storage_blob_helper, mock_blob_service_client, mock_default_azure_credential
+):
+    clear_client_pool()
+
+    mock_blob_service_client.return_value.close.assert_called_once()
+    mock_default_azure_credential.return_value.close.assert_called_once()
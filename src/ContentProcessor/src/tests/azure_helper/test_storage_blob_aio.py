@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+from libs.azure_helper.aio import storage_blob as storage_blob_aio
+
+
+@pytest.fixture
+def mock_blob_service_client(mocker):
+    mock_class = mocker.patch("libs.azure_helper.aio.storage_blob.BlobServiceClient")
+    mock_class.return_value.get_container_client = mocker.MagicMock()
+    container_client = mock_class.return_value.get_container_client.return_value
+    container_client.exists = mocker.AsyncMock(return_value=False)
+    container_client.create_container = mocker.AsyncMock()
+    blob_client = container_client.get_blob_client.return_value
+    blob_client.upload_blob = mocker.AsyncMock()
+    blob_client.download_blob = mocker.AsyncMock()
+    blob_client.download_blob.return_value.readall = mocker.AsyncMock(
+        return_value=b"content"
+    )
+    mock_class.return_value.close = mocker.AsyncMock()
+    return mock_class
+
+
+@pytest.fixture(autouse=True)
+def mock_default_azure_credential(mocker):
+    mock_class = mocker.patch("libs.azure_helper.aio.storage_blob.DefaultAzureCredential")
+    mock_class.return_value.close = mocker.AsyncMock()
+    return mock_class
+
+
+@pytest.mark.asyncio
+async def test_download_stream(mock_blob_service_client):
+    helper = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+
+    stream = await helper.download_stream("process_id", "testblob")
+
+    assert stream == b"content"
+    mock_blob_service_client.return_value.get_container_client.assert_called_with(
+        "testcontainer/process_id"
+    )
+    await storage_blob_aio.close_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_clients_and_containers_are_shared(mock_blob_service_client):
+    first = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+    second = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+
+    await first.upload_text("process_id", "first.json", "{}")
+    await second.upload_text("process_id", "second.json", "{}")
+
+    assert first.blob_service_client is second.blob_service_client
+    mock_blob_service_client.assert_called_once()
+    container_client = (
+        mock_blob_service_client.return_value.get_container_client.return_value
+    )
+    container_client.exists.assert_awaited_once()
+    container_client.create_container.assert_awaited_once()
+
+    await storage_blob_aio.close_client_pool()
+    mock_blob_service_client.return_value.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_upload_blob_with_unsupported_type(mock_blob_service_client):
+    helper = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+
+    with pytest.raises(ValueError, match="Unsupported data type for upload"):
+        await helper.upload_blob("process_id", "testblob", 123)
+
+    await storage_blob_aio.close_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_list_blobs(mock_blob_service_client, mocker):
+    async def list_blobs(name_starts_with):
+        for name in ("_cache/results/first.json", "_cache/results/second.json"):
+            yield SimpleNamespace(name=name, size=2)
+
+    container_client = (
+        mock_blob_service_client.return_value.get_container_client.return_value
+    )
+    container_client.list_blobs = mocker.MagicMock(side_effect=list_blobs)
+    helper = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+
+    blobs = await helper.list_blobs("_cache/results")
+
+    assert [blob.name for blob in blobs] == ["first.json", "second.json"]
+    container_client.list_blobs.assert_called_once_with(
+        name_starts_with="_cache/results/"
+    )
+    await storage_blob_aio.close_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_upload_chunks_stages_fixed_size_blocks(mock_blob_service_client, mocker):
+    blob_client = (
+        mock_blob_service_client.return_value.get_container_client.return_value.get_blob_client.return_value
+    )
+    staged = []
+
+    async def stage_block(block_id, data):
+        staged.append((block_id, data))
+
+    blob_client.stage_block = mocker.AsyncMock(side_effect=stage_block)
+    blob_client.commit_block_list = mocker.AsyncMock()
+    helper = storage_blob_aio.StorageBlobHelper(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="testcontainer",
+    )
+
+    size = await helper.upload_chunks(
+        "process_id", "step_outputs.json", [b"[", b"x" * 9, "é".encode(), b"]"], 4
+    )
+
+    assert size == 13
+    assert b"".join(data for _, data in staged) == b"[" + b"x" * 9 + "é".encode() + b"]"
+    assert [len(data) for _, data in staged] == [4, 4, 4, 1]
+    committed_blocks = blob_client.commit_block_list.await_args.args[0]
+    assert [block.id for block in committed_blocks] == [
+        block_id for block_id, _ in staged
+    ]
+    assert len({len(block_id) for block_id, _ in staged}) == 1
+    await storage_blob_aio.close_client_pool()
@@ -0,0 +1,82 @@
+import pytest
+from libs.pipeline.entities import schema as schema_module
+from libs.pipeline.entities.schema import Schema, clear_schema_cache
+
+SCHEMA_DOCUMENT = {
+    "Id": "schema-1",
+    "ClassName": "InvoiceSchema",
+    "Description": "Invoice",
+    "FileName": "invoice.py",
+    "ContentType": "application/pdf",
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_schema_cache():
+    clear_schema_cache()
+    yield
+    clear_schema_cache()
+
+
+@pytest.fixture
+def mongo_helper(mocker):
+    helper_class = mocker.patch.object(schema_module, "CosmosMongDBHelper")
+    helper_class.return_value.find_document.return_value = [SCHEMA_DOCUMENT]
+    return helper_class.return_value
+
+
+def _get_schema(schema_id="schema-1"):
+    return Schema.get_schema(
+        connection_string="mongodb://localhost",
+        database_name="cps",
+        collection_name="schemas",
+        schema_id=schema_id,
+    )
+
+
+def test_schema_is_queried_once(mongo_helper):
+    first = _get_schema()
+    second = _get_schema()
+
+    assert first == second == Schema(**SCHEMA_DOCUMENT)
+    assert first is not second
+    mongo_helper.find_document.assert_called_once_with({"Id": "schema-1"})
+
+
+def test_expired_schema_is_queried_again(mongo_helper, mocker):
+    mocker.patch.object(schema_module, "SCHEMA_CACHE_TTL_SECONDS", 0)
+
+    _get_schema()
+    _get_schema()
+
+    assert mongo_helper.find_document.call_count == 2
+
+
+def test_missing_schema_is_not_cached(mongo_helper):
+    mongo_helper.find_document.return_value = []
+
+    with pytest.raises(Exception, match="not found"):
+        _get_schema()
+    with pytest.raises(Exception, match="not found"):
+        _get_schema()
+
+
+@pytest.mark.asyncio
+async def test_get_schema_async_uses_the_cache(mocker):
+    helper_class = mocker.patch.object(
+        schema_module.comsos_mongo_aio, "CosmosMongDBHelper"
+    )
+    helper_class.return_value.find_document = mocker.AsyncMock(
+        return_value=[SCHEMA_DOCUMENT]
+    )
+
+    for _ in range(2):
+        schema = await Schema.get_schema_async(
+            connection_string="mongodb://localhost",
+            database_name="cps",
+            collection_name="schemas",
+            schema_id="schema-1",
+        )
+
+    assert schema.Id == "schema-1"
+    helper_class.return_value.find_document.assert_awaited_once()
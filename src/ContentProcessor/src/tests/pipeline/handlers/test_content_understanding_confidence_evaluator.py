@@ -0,0 +1,102 @@
+from libs.azure_helper.model.content_understanding import DocumentContent
+from libs.pipeline.handlers.logics.evaluate_handler.content_understanding_confidence_evaluator import (
+    DocumentLineIndex,
+    evaluate_confidence,
+    find_matching_lines,
+)
+from libs.utils.utils import value_contains, value_match
+
+
+def _document(lines: list[str]) -> DocumentContent:
+    words = []
+    page_lines = []
+    offset = 0
+    for line_number, line in enumerate(lines):
+        line_offset = offset
+        for word in line.split(" "):
+            words.append(
+                {
+                    "content": word,
+                    "span": {"offset": offset, "length": len(word)},
+                    "confidence": round(0.5 + 0.01 * len(words), 2),
+                    "source": f"D(1,{line_number},0,{line_number + 1},0)",
+                }
+            )
+            offset += len(word) + 1
+        page_lines.append(
+            {
+                "content": line,
+                "span": {"offset": line_offset, "length": len(line)},
+                "source": f"D(1,0,{line_number},10,{line_number},10,{line_number + 1},0,{line_number + 1})",
+            }
+        )
+
+    return DocumentContent(
+        markdown="\n".join(lines),
+        kind="document",
+        startPageNumber=1,
+        endPageNumber=1,
+        unit="inch",
+        pages=[
+            {
+                "pageNumber": 1,
+                "angle": 0,
+                "width": 10,
+                "height": 10,
+                "spans": [{"offset": 0, "length": offset}],
+                # Words are not necessarily sorted by offset
+                "words": list(reversed(words)),
+                "lines": page_lines,
+            }
+        ],
+    )
+
+
+def test_line_index_contains_words_of_each_line():
+    document = _document(["Invoice Number 123", "Total 45.00"])
+
+    index = DocumentLineIndex(document)
+
+    assert [word.content for word in index.lines[0].contained_words] == [
+        "123",
+        "Number",
+        "Invoice",
+    ]
+    assert index.lines[0].confidence == 0.5
+    assert index.lines[1].confidence == 0.53
+    assert index.lines[1].normalized_polygon[1] == {"x": 1.0, "y": 0.1}
+
+
+def test_line_index_matches_like_value_matchers():
+    document = _document(
+        ["Invoice Number 123", "Total 45.00", "total 45.00", "Due Date 2024-01-01"]
+    )
+    index = DocumentLineIndex(document)
+
+    for value in ["TOTAL 45.00", "45.00", "Number123", "2024", "missing", " "]:
+        for value_matcher in [value_match, value_contains]:
+            expected = [
+                line.content
+                for line in index.lines
+                if value_matcher(value, line.content)
+            ]
+            found = [
+                line.content
+                for line in find_matching_lines(
+                    value, document, value_matcher=value_matcher, line_index=index
+                )
+            ]
+            assert found == expected, (value, value_matcher.__name__)
+
+
+def test_evaluate_confidence():
+    document = _document(["Invoice Number 123", "Total 45.00"])
+
+    confidence = evaluate_confidence(
+        {"invoice_number": "123", "total": {"amount": "45.00"}, "missing": "nothing"},
+        document,
+    )
+
+    assert confidence["invoice_number"]["confidence"] == 0.5
+    assert confidence["total"]["amount"]["confidence"] == 0.53
+    assert confidence["missing"]["confidence"] == 0.0
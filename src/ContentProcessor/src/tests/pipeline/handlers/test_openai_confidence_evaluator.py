@@ -0,0 +1,98 @@
+import math
+from unittest.mock import Mock
+
+import pytest
+from libs.pipeline.handlers.logics.evaluate_handler import (
+    openai_confidence_evaluator,
+)
+from libs.pipeline.handlers.logics.evaluate_handler.openai_confidence_evaluator import (
+    evaluate_confidence,
+)
+
+
+class _CharacterEncoding:
+    def encode(self, text, disallowed_special=()):
+        return [ord(character) for character in text]
+
+    def decode(self, tokens):
+        return "".join(chr(token) for token in tokens)
+
+
+@pytest.fixture(autouse=True)
+def character_encoding(mocker):
+    openai_confidence_evaluator.get_encoding.cache_clear()
+    openai_confidence_evaluator.get_token_length.cache_clear()
+    encoding_for_model = mocker.patch(
+        "libs.pipeline.handlers.logics.evaluate_handler.openai_confidence_evaluator.tiktoken.encoding_for_model",
+        return_value=_CharacterEncoding(),
+    )
+    yield encoding_for_model
+    openai_confidence_evaluator.get_encoding.cache_clear()
+    openai_confidence_evaluator.get_token_length.cache_clear()
+
+
+def _choice(tokens: list[tuple[str, float]]):
+    choice = Mock()
+    choice.message.content = "".join(token for token, _ in tokens)
+    choice.logprobs.content = [
+        Mock(token=token, logprob=logprob) for token, logprob in tokens
+    ]
+    return choice
+
+
+def test_evaluate_confidence():
+    choice = _choice(
+        [
+            ('{"name":"', -0.01),
+            ("Jo", -0.2),
+            ("hn", None),
+            ('","total":', -0.01),
+            ("12", -0.4),
+            ("3", -99999.0),
+            ("}", -0.01),
+        ]
+    )
+
+    confidence = evaluate_confidence(
+        {"name": "John", "total": 123, "missing": "nothing"}, choice
+    )
+
+    assert confidence["name"]["confidence"] == pytest.approx(math.exp(-0.2))
+    assert confidence["total"]["confidence"] == pytest.approx(math.exp(-0.4))
+    assert confidence["missing"]["confidence"] == 0.0
+    assert confidence["_overall"] == pytest.approx(
+        (math.exp(-0.2) + math.exp(-0.4)) / 2
+    )
+
+
+def test_evaluate_confidence_nested_values_in_order():
+    choice = _choice(
+        [
+            ('{"items":["', -0.01),
+            ("a", -0.1),
+            ('","', -0.01),
+            ("a", -0.3),
+            ('"]}', -0.01),
+        ]
+    )
+
+    confidence = evaluate_confidence({"items": ["a", "a"]}, choice)
+
+    assert confidence["items"][0]["confidence"] == pytest.approx(math.exp(-0.1))
+    assert confidence["items"][1]["confidence"] == pytest.approx(math.exp(-0.3))
+
+
+def test_encoding_is_loaded_once_per_model(character_encoding):
+    choice = _choice([('{"name":"', -0.01), ("John", -0.2), ('"}', -0.01)])
+
+    evaluate_confidence({"name": "John"}, choice)
+    evaluate_confidence({"name": "John"}, choice)
+
+    character_encoding.assert_called_once_with("gpt-4o")
+
+
+def test_evaluate_confidence_without_logprobs():
+    choice = Mock()
+    choice.logprobs = None
+
+    assert evaluate_confidence({"name": "John"}, choice) == {"_overall": 0.0}
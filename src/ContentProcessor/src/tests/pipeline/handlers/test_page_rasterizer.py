@@ -0,0 +1,180 @@
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from libs.pipeline.handlers.logics.map_handler import page_rasterizer
+from libs.pipeline.handlers.logics.map_handler.page_rasterizer import (
+    clear_eviction_schedule,
+    get_page_cache_key,
+    get_pdf_page_images,
+    rasterize_pdf,
+)
+
+
+def _fake_convert_from_bytes(pdf_bytes, output_folder, last_page=None, **kwargs):
+    page_count = last_page or 3
+    page_paths = []
+    for page_number in range(1, page_count + 1):
+        page_path = Path(output_folder) / f"page-{page_number}.png"
+        page_path.write_bytes(f"png {page_number}".encode())
+        page_paths.append(str(page_path))
+    return page_paths
+
+
+@pytest.fixture
+def mock_convert_from_bytes(mocker):
+    return mocker.patch(
+        "libs.pipeline.handlers.logics.map_handler.page_rasterizer.convert_from_bytes",
+        side_effect=_fake_convert_from_bytes,
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_eviction_schedule():
+    clear_eviction_schedule()
+    yield
+    clear_eviction_schedule()
+
+
+class _InMemoryBlobHelper:
+    def __init__(self):
+        self.blobs: dict[str, bytes] = {}
+        self.written_at: dict[str, float] = {}
+
+    async def download_stream(self, container_name, blob_name):
+        key = f"{container_name}/{blob_name}"
+        if key not in self.blobs:
+            raise ResourceNotFoundError("Blob not found")
+        return self.blobs[key]
+
+    async def upload_stream(self, container_name, blob_name, stream):
+        self.blobs[f"{container_name}/{blob_name}"] = stream
+        self.written_at[f"{container_name}/{blob_name}"] = time.time()
+
+    async def upload_text(self, container_name, blob_name, text):
+        await self.upload_stream(container_name, blob_name, text.encode())
+
+    async def list_blobs(self, container_name):
+        prefix = f"{container_name}/"
+        return [
+            SimpleNamespace(
+                name=key[len(prefix) :],
+                last_modified=datetime.fromtimestamp(written_at, timezone.utc),
+            )
+            for key, written_at in self.written_at.items()
+            if key.startswith(prefix)
+        ]
+
+    async def delete_blob(self, container_name, blob_name):
+        key = f"{container_name}/{blob_name}"
+        del self.blobs[key]
+        del self.written_at[key]
+
+
+@pytest.fixture
+def blob_helper(mocker):
+    helper = _InMemoryBlobHelper()
+    mocker.patch.object(page_rasterizer, "StorageBlobHelper", return_value=helper)
+    return helper
+
+
+def test_rasterize_pdf(mock_convert_from_bytes):
+    page_images = rasterize_pdf(b"pdf", dpi=150, max_pages=2, thread_count=4)
+
+    assert page_images == [b"png 1", b"png 2"]
+    _, kwargs = mock_convert_from_bytes.call_args
+    assert kwargs["dpi"] == 150
+    assert kwargs["last_page"] == 2
+    assert kwargs["thread_count"] == 4
+    assert kwargs["fmt"] == "png"
+    assert kwargs["paths_only"] is True
+
+
+def test_get_page_cache_key_depends_on_content_and_options():
+    assert get_page_cache_key(b"pdf", 200, 0) == get_page_cache_key(b"pdf", 200, 0)
+    assert get_page_cache_key(b"pdf", 200, 0) != get_page_cache_key(b"pdf", 150, 0)
+    assert get_page_cache_key(b"pdf", 200, 0) != get_page_cache_key(b"other", 200, 0)
+
+
+@pytest.mark.asyncio
+async def test_get_pdf_page_images_renders_once(mock_convert_from_bytes, blob_helper):
+    first = await get_pdf_page_images(b"pdf", "https://example.com", "processes")
+    second = await get_pdf_page_images(b"pdf", "https://example.com", "processes")
+
+    assert first == second == [b"png 1", b"png 2", b"png 3"]
+    mock_convert_from_bytes.assert_called_once()
+    cache_folder = f"_cache/pages/{get_page_cache_key(b'pdf', 200, 0)}"
+    assert json.loads(blob_helper.blobs[f"{cache_folder}/manifest.json"])["pages"] == [
+        "page-0001.png",
+        "page-0002.png",
+        "page-0003.png",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_pdf_page_images_without_cache(mock_convert_from_bytes, blob_helper):
+    await get_pdf_page_images(
+        b"pdf", "https://example.com", "processes", use_cache=False
+    )
+
+    assert blob_helper.blobs == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "manifest, error",
+    [
+        (b"{not json", None),
+        (json.dumps({"images": []}).encode(), None),
+        (None, HttpResponseError("Server busy")),
+    ],
+)
+async def test_get_pdf_page_images_renders_when_cache_read_fails(
+    mock_convert_from_bytes, blob_helper, mocker, manifest, error
+):
+    cache_folder = f"_cache/pages/{get_page_cache_key(b'pdf', 200, 0)}"
+    if manifest is not None:
+        blob_helper.blobs[f"{cache_folder}/manifest.json"] = manifest
+    if error is not None:
+        mocker.patch.object(blob_helper, "download_stream", side_effect=error)
+
+    page_images = await get_pdf_page_images(
+        b"pdf", "https://example.com", "processes"
+    )
+
+    assert page_images == [b"png 1", b"png 2", b"png 3"]
+    mock_convert_from_bytes.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_pdf_page_images_renders_expired_pages(
+    mock_convert_from_bytes, blob_helper
+):
+    cache_folder = f"_cache/pages/{get_page_cache_key(b'pdf', 200, 0)}"
+    blob_helper.blobs[f"{cache_folder}/manifest.json"] = json.dumps(
+        {"cached_at": time.time() - 120, "pages": []}
+    ).encode()
+
+    page_images = await get_pdf_page_images(
+        b"pdf", "https://example.com", "processes", ttl_seconds=60
+    )
+
+    assert page_images == [b"png 1", b"png 2", b"png 3"]
+    mock_convert_from_bytes.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_expired_pages_are_evicted_on_write(mock_convert_from_bytes, blob_helper):
+    await get_pdf_page_images(b"old", "https://example.com", "processes")
+    for key in blob_helper.written_at:
+        blob_helper.written_at[key] -= 120
+
+    await get_pdf_page_images(b"new", "https://example.com", "processes", ttl_seconds=60)
+
+    new_folder = f"_cache/pages/{get_page_cache_key(b'new', 200, 0)}/"
+    assert len(blob_helper.blobs) == 4
+    assert all(key.startswith(new_folder) for key in blob_helper.blobs)
@@ -0,0 +1,102 @@
+import io
+import random
+
+from libs.pipeline.entities.mime_types import MimeTypes
+from libs.pipeline.handlers.logics.map_handler.prompt_image_optimizer import (
+    MIN_IMAGE_SIDE,
+    PromptImage,
+    estimate_image_tokens,
+    get_tile_grid_size,
+    optimize_prompt_images,
+)
+from PIL import Image
+
+
+def _png_image(width: int, height: int, noise: bool = False) -> PromptImage:
+    image = Image.new("RGB", (width, height), "white")
+    if noise:
+        # Random pixels don't compress, so the encoded size follows the image size
+        rng = random.Random(0)
+        image.putdata(
+            [
+                (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+                for _ in range(width * height)
+            ]
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return PromptImage(mime_type=MimeTypes.ImagePng, data=buffer.getvalue())
+
+
+def _image_size(image: PromptImage) -> tuple[int, int]:
+    with Image.open(io.BytesIO(image.data)) as decoded_image:
+        return decoded_image.size
+
+
+def test_get_tile_grid_size():
+    # Fit in 2048 x 2048, then the shortest side to 768
+    assert get_tile_grid_size(4096, 8192) == (768, 1536)
+    assert get_tile_grid_size(1700, 2200) == (768, 994)
+    # Small images are not scaled up
+    assert get_tile_grid_size(512, 300) == (512, 300)
+
+
+def test_estimate_image_tokens():
+    assert estimate_image_tokens(512, 512) == 85 + 170
+    # 768 x 994 is 2 x 2 tiles
+    assert estimate_image_tokens(1700, 2200) == 85 + 170 * 4
+
+
+def test_optimize_prompt_images_downscales_to_tile_grid():
+    images, stats = optimize_prompt_images([_png_image(1700, 2200)])
+
+    assert _image_size(images[0]) == (768, 994)
+    assert images[0].mime_type == MimeTypes.ImagePng
+    assert stats.image_count == 1
+    assert stats.optimized_bytes < stats.original_bytes
+    assert stats.original_tokens == stats.optimized_tokens
+
+
+def test_optimize_prompt_images_converts_to_jpeg():
+    images, stats = optimize_prompt_images(
+        [_png_image(600, 400, noise=True)], jpeg_quality=75
+    )
+
+    assert images[0].mime_type == MimeTypes.ImageJpeg
+    assert _image_size(images[0]) == (600, 400)
+    assert stats.optimized_bytes < stats.original_bytes
+
+
+def test_optimize_prompt_images_keeps_smaller_original():
+    original = _png_image(300, 200)
+
+    images, stats = optimize_prompt_images([original])
+
+    assert len(images[0].data) <= len(original.data)
+    assert stats.optimized_bytes <= stats.original_bytes
+
+
+def test_optimize_prompt_images_fits_byte_budget():
+    originals = [_png_image(768, 768, noise=True) for _ in range(2)]
+    max_total_bytes = sum(len(image.data) for image in originals) // 4
+
+    images, stats = optimize_prompt_images(originals, max_total_bytes=max_total_bytes)
+
+    assert stats.optimized_bytes <= max_total_bytes
+    assert all(_image_size(image)[0] < 768 for image in images)
+    assert stats.optimized_tokens < stats.original_tokens
+
+
+def test_optimize_prompt_images_stops_at_min_side():
+    images, _ = optimize_prompt_images(
+        [_png_image(768, 768, noise=True)], max_total_bytes=1
+    )
+
+    assert _image_size(images[0]) == (MIN_IMAGE_SIDE, MIN_IMAGE_SIDE)
+
+
+def test_optimize_prompt_images_without_images():
+    images, stats = optimize_prompt_images([])
+
+    assert images == []
+    assert stats.image_count == 0
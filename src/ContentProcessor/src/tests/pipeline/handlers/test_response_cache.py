@@ -0,0 +1,106 @@
+import os
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from libs.pipeline.entities.mime_types import MimeTypes
+from libs.pipeline.handlers.logics.map_handler import response_cache
+from libs.pipeline.handlers.logics.map_handler.prompt_image_optimizer import (
+    PromptImage,
+)
+from libs.pipeline.handlers.logics.map_handler.response_cache import (
+    BlobResponseCache,
+    DiskResponseCache,
+    get_response_cache,
+    get_response_cache_key,
+)
+from pydantic import BaseModel
+
+
+class Invoice(BaseModel):
+    invoice_id: str
+    total: float
+
+
+class Receipt(BaseModel):
+    merchant: str
+
+
+def _key(**overrides) -> str:
+    arguments = {
+        "model": "gpt-4o",
+        "response_format": Invoice,
+        "prompts": ["system", "markdown"],
+        "images": [PromptImage(mime_type=MimeTypes.ImagePng, data=b"page 1")],
+        "temperature": 0.1,
+    }
+    arguments.update(overrides)
+    return get_response_cache_key(**arguments)
+
+
+def test_get_response_cache_key():
+    assert _key() == _key()
+    assert _key() != _key(model="gpt-4o-mini")
+    assert _key() != _key(response_format=Receipt)
+    assert _key() != _key(prompts=["system", "other markdown"])
+    assert _key() != _key(
+        images=[PromptImage(mime_type=MimeTypes.ImagePng, data=b"page 2")]
+    )
+    assert _key() != _key(temperature=0.2)
+
+
+@pytest.mark.asyncio
+async def test_disk_response_cache(tmp_path):
+    cache = DiskResponseCache(folder=str(tmp_path))
+
+    assert await cache.get("key") is None
+    await cache.set("key", '{"choices": []}')
+
+    assert await cache.get("key") == '{"choices": []}'
+    assert [path.name for path in tmp_path.iterdir()] == ["key.json"]
+
+
+@pytest.mark.asyncio
+async def test_disk_response_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskResponseCache(folder=str(tmp_path))
+    for mtime, key in enumerate(("first", "second", "third")):
+        await cache.set(key, "x" * 100)
+        os.utime(tmp_path / f"{key}.json", (mtime, mtime))
+
+    # Reading the first entry makes it the most recently used
+    assert await cache.get("first") is not None
+    cache.max_bytes = 250
+    await cache.set("fourth", "x" * 100)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "first.json",
+        "fourth.json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_blob_response_cache(mocker):
+    blob_helper = mocker.MagicMock()
+    blob_helper.download_text = mocker.AsyncMock(
+        side_effect=ResourceNotFoundError("Blob not found")
+    )
+    blob_helper.upload_text = mocker.AsyncMock()
+    mocker.patch.object(response_cache, "StorageBlobHelper", return_value=blob_helper)
+    cache = BlobResponseCache(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="cps-processes",
+    )
+
+    assert await cache.get("key") is None
+    await cache.set("key", "{}")
+
+    blob_helper.upload_text.assert_awaited_once_with(
+        "_cache/gpt_responses", "key.json", "{}"
+    )
+
+
+def test_get_response_cache(tmp_path):
+    assert isinstance(
+        get_response_cache("disk", folder=str(tmp_path)), DiskResponseCache
+    )
+    with pytest.raises(ValueError, match="Unsupported response cache backend"):
+        get_response_cache("redis")
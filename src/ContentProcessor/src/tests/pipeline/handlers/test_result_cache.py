@@ -0,0 +1,135 @@
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from libs.pipeline.handlers.logics.extract_handler import result_cache
+from libs.pipeline.handlers.logics.extract_handler.result_cache import (
+    RESULT_CACHE_FOLDER,
+    ContentUnderstandingResultCache,
+    clear_eviction_schedule,
+    get_result_cache_key,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_eviction_schedule():
+    clear_eviction_schedule()
+    yield
+    clear_eviction_schedule()
+
+
+class _InMemoryBlobHelper:
+    def __init__(self):
+        self.blobs: dict[str, tuple[bytes, float]] = {}
+
+    async def download_stream(self, container_name, blob_name):
+        key = f"{container_name}/{blob_name}"
+        if key not in self.blobs:
+            raise ResourceNotFoundError("Blob not found")
+        return self.blobs[key][0]
+
+    async def upload_text(self, container_name, blob_name, text):
+        # Strictly increasing write times keep the eviction order deterministic
+        written_at = max([time.time()] + [t + 1 for _, t in self.blobs.values()])
+        self.blobs[f"{container_name}/{blob_name}"] = (text.encode(), written_at)
+
+    async def list_blobs(self, container_name):
+        prefix = f"{container_name}/"
+        return [
+            SimpleNamespace(
+                name=key[len(prefix) :],
+                size=len(data),
+                last_modified=datetime.fromtimestamp(written_at, timezone.utc),
+            )
+            for key, (data, written_at) in self.blobs.items()
+            if key.startswith(prefix)
+        ]
+
+    async def delete_blob(self, container_name, blob_name):
+        key = f"{container_name}/{blob_name}"
+        if key not in self.blobs:
+            raise ResourceNotFoundError("Blob not found")
+        del self.blobs[key]
+
+
+@pytest.fixture
+def blob_helper(mocker):
+    helper = _InMemoryBlobHelper()
+    mocker.patch.object(result_cache, "StorageBlobHelper", return_value=helper)
+    return helper
+
+
+def _cache(**kwargs) -> ContentUnderstandingResultCache:
+    return ContentUnderstandingResultCache(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="cps-processes",
+        **kwargs,
+    )
+
+
+def test_get_result_cache_key():
+    key = get_result_cache_key(b"invoice", "prebuilt-layout", "2024-12-01-preview")
+
+    assert key.endswith("_prebuilt-layout_2024-12-01-preview")
+    assert key == get_result_cache_key(
+        b"invoice", "prebuilt-layout", "2024-12-01-preview"
+    )
+    assert key != get_result_cache_key(b"invoice", "prebuilt-layout", "2025-05-01")
+    assert key != get_result_cache_key(b"receipt", "prebuilt-layout", "2024-12-01-preview")
+
+
+@pytest.mark.asyncio
+async def test_set_and_get(blob_helper):
+    cache = _cache()
+
+    assert await cache.get("key") is None
+    await cache.set("key", {"status": "Succeeded"})
+
+    assert await cache.get("key") == {"status": "Succeeded"}
+    assert f"{RESULT_CACHE_FOLDER}/key.json" in blob_helper.blobs
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_a_miss(blob_helper):
+    cache = _cache(ttl_seconds=60)
+    blob_helper.blobs[f"{RESULT_CACHE_FOLDER}/key.json"] = (
+        json.dumps({"cached_at": time.time() - 120, "result": {}}).encode(),
+        time.time() - 120,
+    )
+
+    assert await cache.get("key") is None
+    assert blob_helper.blobs == {}
+
+
+@pytest.mark.asyncio
+async def test_oldest_entries_are_evicted_over_max_bytes(blob_helper):
+    cache = _cache()
+    for key in ("first", "second", "third"):
+        await cache.set(key, {"content": "x" * 100})
+    # Room for the two newest entries, their sizes vary with the timestamp
+    cache.max_bytes = sum(
+        len(blob_helper.blobs[f"{RESULT_CACHE_FOLDER}/{key}.json"][0])
+        for key in ("second", "third")
+    )
+    await cache.evict()
+
+    assert await cache.get("first") is None
+    assert await cache.get("second") is not None
+    assert await cache.get("third") is not None
+
+
+@pytest.mark.asyncio
+async def test_eviction_runs_once_per_interval(blob_helper, mocker):
+    cache = _cache(ttl_seconds=60)
+    evict = mocker.spy(cache, "evict")
+
+    for key in ("first", "second", "third"):
+        await cache.set(key, {})
+    assert evict.call_count == 1
+
+    clear_eviction_schedule()
+    await cache.set("fourth", {})
+    assert evict.call_count == 2
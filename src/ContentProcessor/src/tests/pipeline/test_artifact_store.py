@@ -0,0 +1,136 @@
+import os
+
+import pytest
+from libs.azure_helper.aio import storage_blob as storage_blob_aio
+from libs.pipeline import artifact_store
+from libs.pipeline.artifact_store import (
+    DiskArtifactCache,
+    MemoryArtifactCache,
+    configure_artifact_cache,
+    get_artifact_cache,
+)
+from libs.pipeline.entities.pipeline_file import FileDetails
+
+ACCOUNT_URL = "https://testaccount.blob.core.windows.net"
+
+
+@pytest.fixture(autouse=True)
+def reset_artifact_cache():
+    configure_artifact_cache("none", 0)
+    yield
+    configure_artifact_cache("none", 0)
+
+
+def test_memory_artifact_cache_evicts_least_recently_used():
+    cache = MemoryArtifactCache(max_bytes=250)
+    cache.set("first", b"x" * 100)
+    cache.set("second", b"x" * 100)
+    assert cache.get("first") is not None
+
+    cache.set("third", b"x" * 100)
+
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+
+
+def test_memory_artifact_cache_skips_files_bigger_than_the_cache():
+    cache = MemoryArtifactCache(max_bytes=10)
+    cache.set("big", b"x" * 100)
+
+    assert cache.get("big") is None
+
+
+def test_disk_artifact_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskArtifactCache(max_bytes=250, folder=str(tmp_path))
+    for mtime, key in enumerate(("first", "second")):
+        cache.set(key, b"x" * 100)
+        os.utime(cache._get_path(key), (mtime, mtime))
+    assert cache.get("first") == b"x" * 100
+
+    cache.set("third", b"x" * 100)
+
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+
+
+def test_configure_artifact_cache(tmp_path):
+    configure_artifact_cache("memory", 100)
+    assert isinstance(get_artifact_cache(), MemoryArtifactCache)
+
+    configure_artifact_cache("disk", 100, str(tmp_path))
+    assert isinstance(get_artifact_cache(), DiskArtifactCache)
+
+    configure_artifact_cache("none", 100)
+    assert get_artifact_cache() is None
+
+    with pytest.raises(ValueError, match="Unsupported artifact cache tier"):
+        configure_artifact_cache("redis", 100)
+
+
+def _file_details(file_id="file-1"):
+    return FileDetails(id=file_id, process_id="process-1", name="gpt_output.json")
+
+
+@pytest.fixture
+def storage_blob_helper(mocker):
+    helper_class = mocker.patch("libs.pipeline.entities.pipeline_file.StorageBlobHelper")
+    helper_class.return_value.download_stream.return_value = b"from blob"
+    return helper_class.return_value
+
+
+def test_file_details_reads_through_the_cache(storage_blob_helper):
+    configure_artifact_cache("memory", 1024)
+
+    assert _file_details().download_stream(ACCOUNT_URL, "processes") == b"from blob"
+    assert _file_details().download_stream(ACCOUNT_URL, "processes") == b"from blob"
+
+    storage_blob_helper.download_stream.assert_called_once()
+
+
+def test_file_details_writes_through_the_cache(storage_blob_helper):
+    configure_artifact_cache("memory", 1024)
+
+    _file_details().upload_json_text(ACCOUNT_URL, "processes", '{"a": 1}')
+
+    assert _file_details().download_stream(ACCOUNT_URL, "processes") == b'{"a": 1}'
+    storage_blob_helper.upload_text.assert_called_once()
+    storage_blob_helper.download_stream.assert_not_called()
+
+
+def test_file_details_with_another_id_is_not_cached(storage_blob_helper):
+    configure_artifact_cache("memory", 1024)
+    _file_details().upload_json_text(ACCOUNT_URL, "processes", '{"a": 1}')
+
+    assert _file_details("file-2").download_stream(ACCOUNT_URL, "processes") == (
+        b"from blob"
+    )
+
+
+@pytest.mark.asyncio
+async def test_file_details_async_reads_through_the_cache(mocker):
+    helper_class = mocker.patch.object(storage_blob_aio, "StorageBlobHelper")
+    helper_class.return_value.download_stream = mocker.AsyncMock(
+        return_value=b"from blob"
+    )
+    helper_class.return_value.upload_text = mocker.AsyncMock()
+    configure_artifact_cache("memory", 1024)
+
+    await _file_details().upload_json_text_async(ACCOUNT_URL, "processes", "{}")
+    first = await _file_details().download_stream_async(ACCOUNT_URL, "processes")
+    second = await _file_details("file-2").download_stream_async(
+        ACCOUNT_URL, "processes"
+    )
+
+    assert first == b"{}"
+    assert second == b"from blob"
+    helper_class.return_value.download_stream.assert_awaited_once()
+
+
+def test_artifact_key_contains_the_file_id():
+    assert artifact_store.get_artifact_key(
+        ACCOUNT_URL, "processes", "process-1", "file-1", "a.json"
+    ) != artifact_store.get_artifact_key(
+        ACCOUNT_URL, "processes", "process-1", "file-2", "a.json"
+    )
@@ -0,0 +1,161 @@
+import pytest
+from azure.storage.queue import QueueMessage
+from unittest.mock import MagicMock
+from libs.application.application_context import AppContext
+from libs.pipeline.entities.pipeline_data import DataPipeline
+from libs.pipeline.entities.pipeline_message_context import MessageContext
+from libs.pipeline.entities.pipeline_step_result import StepResult
+from libs.pipeline.fused_pipeline_handler import FusedPipelineHandler
+from libs.pipeline.queue_handler_base import HandlerBase
+from libs.process_host.handler_process_host import HandlerHostManager
+
+
+# Steps executed by the recording handlers, in order
+executed: list[tuple[str, str, list[str]]] = []
+
+
+class RecordingHandler(HandlerBase):
+    async def execute(self, context: MessageContext) -> StepResult:
+        pipeline_status = context.data_pipeline.pipeline_status
+        executed.append(
+            (
+                self.handler_name,
+                pipeline_status.active_step,
+                list(pipeline_status.completed_steps),
+            )
+        )
+        return StepResult(
+            process_id=pipeline_status.process_id,
+            step_name=pipeline_status.active_step,
+            result={"result": "success"},
+        )
+
+
+@pytest.fixture
+def mock_app_context(mocker):
+    mocker.patch("libs.pipeline.artifact_store.configure_artifact_cache")
+    app_context = MagicMock(spec=AppContext)
+    app_context.configuration = MagicMock()
+    return app_context
+
+
+def _context(steps: list[str]) -> MessageContext:
+    data_pipeline = DataPipeline.get_object(
+        DataPipeline(
+            process_id="process-1",
+            PipelineStatus={
+                "ProcessId": "process-1",
+                "Steps": steps,
+                "RemainingSteps": list(steps),
+                "ActiveStep": steps[0],
+            },
+            Files=[],
+        ).model_dump_json(by_alias=True)
+    )
+    return MessageContext(
+        queue_message=MagicMock(spec=QueueMessage), data_pipeline=data_pipeline
+    )
+
+
+def _fused_handler(app_context, step_names: list[str]):
+    executed.clear()
+    step_handlers = {
+        step_name: RecordingHandler(appContext=app_context, step_name=step_name)
+        for step_name in step_names
+    }
+
+    fused_handler = FusedPipelineHandler(
+        appContext=app_context, step_name=step_names[0], step_handlers=step_handlers
+    )
+    fused_handler._bind_step(app_context, step_names[0])
+    return fused_handler
+
+
+@pytest.mark.asyncio
+async def test_steps_run_in_one_chain(mock_app_context):
+    fused_handler = _fused_handler(
+        mock_app_context, ["extract", "map", "evaluate", "save"]
+    )
+    context = _context(["extract", "map", "evaluate", "save"])
+
+    step_result = await fused_handler.execute(context)
+
+    assert executed == [
+        ("extract", "extract", []),
+        ("map", "map", ["extract"]),
+        ("evaluate", "evaluate", ["extract", "map"]),
+        ("save", "save", ["extract", "map", "evaluate"]),
+    ]
+    # The last result is left to the handler base to persist
+    assert step_result.step_name == "save"
+    assert step_result.elapsed is not None
+    pipeline_status = context.data_pipeline.pipeline_status
+    assert pipeline_status.active_step == "save"
+    assert [result.step_name for result in pipeline_status.process_results] == [
+        "extract",
+        "map",
+        "evaluate",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_steps_without_fused_handler_are_handed_over(mock_app_context):
+    fused_handler = _fused_handler(mock_app_context, ["extract", "map"])
+    context = _context(["extract", "map", "evaluate", "save"])
+
+    step_result = await fused_handler.execute(context)
+
+    assert [step for step, _, _ in executed] == ["extract", "map"]
+    assert step_result.step_name == "map"
+    assert context.data_pipeline.pipeline_status.active_step == "map"
+
+
+def test_add_fused_handlers_as_process(mock_app_context):
+    step_handlers = {
+        step_name: RecordingHandler(appContext=mock_app_context, step_name=step_name)
+        for step_name in ["extract", "map"]
+    }
+    handler_host_manager = HandlerHostManager()
+
+    handler_host_manager.add_fused_handlers_as_process(
+        step_handlers, mock_app_context, steps=["extract", "map"]
+    )
+
+    # Every step queue is polled, the messages queued at a later step are processed too
+    assert [handler["handler_name"] for handler in handler_host_manager.handlers] == [
+        "fused-extract",
+        "fused-map",
+    ]
+    for handler, step_name in zip(handler_host_manager.handlers, ["extract", "map"]):
+        handler_info = handler["handler_info"]
+        assert handler_info.args == (False, mock_app_context, step_name)
+        assert isinstance(handler_info.target_function.__self__, FusedPipelineHandler)
+        assert handler_info.target_function.__self__.step_handlers == step_handlers
+
+
+def test_add_fused_handlers_as_process_without_step_handler(mock_app_context):
+    step_handlers = {
+        "extract": RecordingHandler(appContext=mock_app_context, step_name="extract")
+    }
+
+    with pytest.raises(ValueError, match="No fused handler for the steps: map"):
+        HandlerHostManager().add_fused_handlers_as_process(
+            step_handlers, mock_app_context, steps=["extract", "map"]
+        )
+
+
+@pytest.mark.asyncio
+async def test_chain_starts_at_a_later_step(mock_app_context):
+    fused_handler = _fused_handler(
+        mock_app_context, ["extract", "map", "evaluate", "save"]
+    )
+    context = _context(["extract", "map", "evaluate", "save"])
+    # A message queued at the map step, as set by the handler base of the map queue
+    pipeline_status = context.data_pipeline.pipeline_status
+    pipeline_status.update_step()
+    pipeline_status.active_step = "map"
+
+    step_result = await fused_handler.execute(context)
+
+    assert [step for step, _, _ in executed] == ["map", "evaluate", "save"]
+    assert step_result.step_name == "save"
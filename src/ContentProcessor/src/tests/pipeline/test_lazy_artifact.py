@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from libs.models.content_process import Step_Outputs
+from libs.pipeline import lazy_artifact
+from libs.pipeline.lazy_artifact import LazyArtifact
+from pydantic import BaseModel
+
+
+class Invoice(BaseModel):
+    invoice_id: str
+    total: float
+
+
+DOCUMENT = {"result": {"contents": [{"markdown": "# Invoice"}]}}
+
+
+def test_data_is_parsed_once(mocker):
+    loads = mocker.spy(lazy_artifact, "loads")
+    artifact = LazyArtifact(json.dumps(DOCUMENT).encode("utf-8"))
+
+    assert loads.call_count == 0
+    assert artifact.data == DOCUMENT
+    assert artifact.data is artifact.data
+    assert loads.call_count == 1
+
+
+def test_get_sub_tree():
+    artifact = LazyArtifact(json.dumps(DOCUMENT))
+
+    assert artifact.get("result", "contents", 0, "markdown") == "# Invoice"
+    assert artifact.get("result", "contents", 1, "markdown") is None
+    assert artifact.get("result", "missing", default="") == ""
+
+
+def test_model_is_validated_once_from_the_parsed_data(mocker):
+    loads = mocker.spy(lazy_artifact, "loads")
+    artifact = LazyArtifact(b'{"invoice_id": "INV-1", "total": 10.5}', Invoice)
+
+    assert artifact.model == Invoice(invoice_id="INV-1", total=10.5)
+    assert artifact.model is artifact.model
+    assert artifact.data == {"invoice_id": "INV-1", "total": 10.5}
+    assert loads.call_count == 1
+
+
+def test_model_without_model_type():
+    with pytest.raises(ValueError, match="no model type"):
+        LazyArtifact(b"{}").model
+
+
+def test_text():
+    assert LazyArtifact("{\"name\": \"é\"}".encode("utf-8")).text == '{"name": "é"}'
+
+
+@pytest.mark.parametrize("backend", [None, "orjson"])
+def test_loads_and_dumps_with_and_without_orjson(mocker, backend):
+    if backend is None:
+        mocker.patch.object(lazy_artifact, "orjson", None)
+
+    assert lazy_artifact.loads(lazy_artifact.dumps(DOCUMENT)) == DOCUMENT
+
+
+def test_iter_json_writes_lazy_artifacts_raw(mocker):
+    loads = mocker.spy(lazy_artifact, "loads")
+    step_outputs = [
+        Step_Outputs(
+            step_name="extract",
+            processed_time="00:00:01.000",
+            step_result=LazyArtifact(json.dumps(DOCUMENT)),
+        ),
+        Step_Outputs(step_name="map", step_result={"name": "é", "values": [1, None]}),
+    ]
+
+    document = b"".join(lazy_artifact.iter_json(step_outputs))
+
+    assert loads.call_count == 0
+    assert json.loads(document) == [
+        {
+            "step_name": "extract",
+            "processed_time": "00:00:01.000",
+            "step_result": DOCUMENT,
+        },
+        {
+            "step_name": "map",
+            "processed_time": None,
+            "step_result": {"name": "é", "values": [1, None]},
+        },
+    ]
@@ -1,4 +1,7 @@
+import asyncio
 from unittest.mock import Mock
+
+import pytest
 from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.storage.queue import QueueClient, QueueMessage
@@ -11,11 +14,23 @@ from libs.pipeline.pipeline_queue_helper import (
     delete_queue_message,
     move_to_dead_letter_queue,
     has_messages,
+    receive_messages,
+    renew_message_lease,
+    IdlePollingBackoff,
+    MessageLeaseKeeper,
     pass_data_pipeline_to_next_step,
+    clear_queue_clients,
     _create_queue_client,
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_queue_clients():
+    clear_queue_clients()
+    yield
+    clear_queue_clients()
+
+
 def test_create_queue_client_name():
     assert create_queue_client_name("test") == "content-pipeline-test-queue"
 
@@ -72,6 +87,21 @@ def test_move_to_dead_letter_queue():
     queue_client.delete_message.assert_called_once_with(message=message)
 
 
+def test_move_to_dead_letter_queue_recreates_missing_queue():
+    message = Mock(spec=QueueMessage)
+    message.content = "test content"
+    dead_letter_queue_client = Mock(spec=QueueClient)
+    dead_letter_queue_client.send_message.side_effect = [ResourceNotFoundError, None]
+    dead_letter_queue_client.get_queue_properties.side_effect = ResourceNotFoundError
+    queue_client = Mock(spec=QueueClient)
+
+    move_to_dead_letter_queue(message, dead_letter_queue_client, queue_client)
+
+    dead_letter_queue_client.create_queue.assert_called_once()
+    assert dead_letter_queue_client.send_message.call_count == 2
+    queue_client.delete_message.assert_called_once()
+
+
 def test_has_messages():
     queue_client = Mock(spec=QueueClient)
     queue_client.peek_messages.return_value = [Mock(spec=QueueMessage)]
@@ -126,3 +156,88 @@ def test_create_queue_client(mocker):
 
     queue_client = _create_queue_client(account_url, queue_name, credential)
     assert queue_client is not None
+
+
+def test_create_queue_client_is_reused(mocker):
+    mock_queue_client_class = mocker.patch(
+        "libs.pipeline.pipeline_queue_helper.QueueClient"
+    )
+    mock_invalidate_queue = mocker.patch(
+        "libs.pipeline.pipeline_queue_helper.invalidate_queue"
+    )
+    account_url = "https://example.com"
+    credential = Mock(spec=DefaultAzureCredential)
+
+    first = _create_queue_client(account_url, "test-queue", credential)
+    second = create_or_get_queue_client("test-queue", account_url, credential)
+    other = _create_queue_client(account_url, "other-queue", credential)
+
+    assert first is second
+    assert mock_queue_client_class.call_count == 2
+    assert mock_invalidate_queue.call_count == 2
+    assert other is not None
+
+
+def test_receive_messages_in_single_page():
+    queue_client = Mock(spec=QueueClient)
+    queue_client.receive_messages.return_value = iter([Mock(spec=QueueMessage)])
+
+    messages = receive_messages(queue_client, max_messages=100, visibility_timeout=60)
+
+    assert len(messages) == 1
+    queue_client.receive_messages.assert_called_once_with(
+        messages_per_page=32, max_messages=32, visibility_timeout=60
+    )
+
+
+def test_renew_message_lease():
+    queue_client = Mock(spec=QueueClient)
+    queue_client.update_message.return_value = Mock(
+        pop_receipt="new-receipt", next_visible_on="later"
+    )
+    message = Mock(spec=QueueMessage)
+    message.id = "message-id"
+    message.pop_receipt = "old-receipt"
+
+    renew_message_lease(queue_client, message, visibility_timeout=60)
+
+    queue_client.update_message.assert_called_once_with(
+        "message-id", pop_receipt="old-receipt", visibility_timeout=60
+    )
+    assert message.pop_receipt == "new-receipt"
+    assert message.next_visible_on == "later"
+
+
+@pytest.mark.asyncio
+async def test_message_lease_keeper_stops_renewing():
+    queue_client = Mock(spec=QueueClient)
+    queue_client.update_message.return_value = Mock(pop_receipt="receipt")
+    message = Mock(spec=QueueMessage)
+
+    lease_keeper = MessageLeaseKeeper(queue_client, message, visibility_timeout=2)
+    lease_keeper.start()
+    await asyncio.sleep(0)
+    await lease_keeper.stop()
+
+    queue_client.update_message.assert_not_called()
+
+
+def test_idle_polling_backoff_grows_up_to_max_interval():
+    backoff = IdlePollingBackoff(min_interval=1, max_interval=8)
+
+    intervals = [backoff.next_interval() for _ in range(10)]
+
+    assert all(1 <= interval <= 8 for interval in intervals)
+    # Jitter keeps the interval within the upper half of the current bound
+    assert intervals[3] >= 4
+    assert all(interval >= 4 for interval in intervals[4:])
+
+
+def test_idle_polling_backoff_reset():
+    backoff = IdlePollingBackoff(min_interval=1, max_interval=60)
+    for _ in range(5):
+        backoff.next_interval()
+
+    backoff.reset()
+
+    assert backoff.next_interval() == 1
@@ -1,6 +1,9 @@
+import asyncio
+import json
+
 import pytest
 from unittest.mock import MagicMock
-from azure.storage.queue import QueueClient
+from azure.storage.queue import QueueClient, QueueMessage
 from libs.pipeline.entities.pipeline_message_context import MessageContext
 from libs.pipeline.entities.pipeline_step_result import StepResult
 from libs.pipeline.queue_handler_base import HandlerBase
@@ -35,6 +38,7 @@ def mock_app_context():
     mock_configuration.app_storage_queue_url = "https://testqueueurl.com"
     mock_configuration.app_storage_blob_url = "https://testbloburl.com"
     mock_configuration.app_cps_processes = "TestProcess"
+    mock_configuration.app_message_queue_process_timeout = 30
 
     mock_app_context.configuration = mock_configuration
     mock_app_context.credential = MagicMock()
@@ -75,3 +79,138 @@ def test_show_queue_information(mock_queue_helper, mock_app_context):
     handler.queue_client = mock_queue_client
 
     handler._show_queue_information()
+
+
+class ConcurrentMockHandler(HandlerBase):
+    running: int = 0
+    max_running: int = 0
+
+    async def execute(self, context: MessageContext) -> StepResult:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return StepResult(
+            process_id=context.data_pipeline.process_id,
+            step_name="extract",
+            result={"result": "success"},
+        )
+
+
+def _queue_message(process_id: str):
+    message = MagicMock(spec=QueueMessage)
+    message.id = f"message-{process_id}"
+    message.pop_receipt = "receipt"
+    message.content = json.dumps(
+        {
+            "process_id": process_id,
+            "PipelineStatus": {"ProcessId": process_id, "Steps": ["extract"]},
+            "Files": [],
+        }
+    )
+    return message
+
+
+@pytest.mark.asyncio
+async def test_process_message_uses_own_context_per_message(mocker, mock_app_context):
+    handler = ConcurrentMockHandler(appContext=mock_app_context, step_name="extract")
+    handler.handler_name = "extract"
+    handler.application_context = mock_app_context
+    completed = mocker.patch.object(handler, "_complete_message")
+
+    await asyncio.gather(
+        handler._process_message(_queue_message("process-1"), False),
+        handler._process_message(_queue_message("process-2"), False),
+    )
+
+    assert handler.max_running == 2
+    contexts = [call.args[0] for call in completed.call_args_list]
+    assert {context.data_pipeline.process_id for context in contexts} == {
+        "process-1",
+        "process-2",
+    }
+    assert all(
+        context.data_pipeline.pipeline_status.active_step == "extract"
+        for context in contexts
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_message_moves_invalid_message_to_dead_letter_queue(mocker):
+    handler = ConcurrentMockHandler(appContext=MagicMock(), step_name="extract")
+    move_to_dead_letter_queue = mocker.patch(
+        "libs.pipeline.pipeline_queue_helper.move_to_dead_letter_queue"
+    )
+    message = MagicMock(spec=QueueMessage)
+    message.content = "not a pipeline message"
+
+    await handler._process_message(message, False)
+
+    move_to_dead_letter_queue.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_message_renews_lease_while_executing(mocker, mock_app_context):
+    mock_app_context.configuration.app_message_queue_process_timeout = 2
+
+    class SlowMockHandler(HandlerBase):
+        async def execute(self, context: MessageContext) -> StepResult:
+            await asyncio.sleep(1.1)
+            return StepResult(process_id="1234", step_name="extract")
+
+    handler = SlowMockHandler(appContext=mock_app_context, step_name="extract")
+    handler.handler_name = "extract"
+    handler.application_context = mock_app_context
+    handler.queue_client = MagicMock(spec=QueueClient)
+    handler.queue_client.update_message.return_value = MagicMock(
+        pop_receipt="renewed-receipt"
+    )
+    mocker.patch.object(handler, "_complete_message")
+
+    message = _queue_message("process-1")
+    await handler._process_message(message, False)
+
+    assert handler.queue_client.update_message.call_count >= 1
+    assert message.pop_receipt == "renewed-receipt"
+
+
+class _StopPolling(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_connect_frees_slots_of_completed_messages(mocker, mock_app_context):
+    handler = MockHandler(appContext=mock_app_context, step_name="extract")
+    handler.application_context = mock_app_context
+    handler.queue_name = "test-queue"
+    handler.max_in_flight = 4
+    mock_app_context.configuration.app_message_queue_interval = 0
+    mock_app_context.configuration.app_message_queue_max_interval = 0
+    mocker.patch.object(HandlerBase, "_HandlerBase__initialize_handler")
+
+    async def process_message(queue_message, show_information):
+        if queue_message == "failing":
+            raise ValueError("Unexpected error")
+
+    mocker.patch.object(handler, "_process_message", side_effect=process_message)
+    logged_error = mocker.patch("libs.pipeline.queue_handler_base.logging.error")
+
+    receive_sizes = []
+
+    def receive_messages(queue_client, max_messages, visibility_timeout):
+        receive_sizes.append(max_messages)
+        if len(receive_sizes) == 1:
+            return ["first", "failing"]
+        raise _StopPolling()
+
+    mocker.patch(
+        "libs.pipeline.pipeline_queue_helper.receive_messages",
+        side_effect=receive_messages,
+    )
+
+    with pytest.raises(_StopPolling):
+        await handler._connect_async(show_information=False)
+
+    # Both messages completed before the next receive, so all the slots are free again
+    assert receive_sizes == [4, 4]
+    logged_error.assert_called_once()
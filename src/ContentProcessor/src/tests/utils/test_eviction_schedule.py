@@ -0,0 +1,24 @@
+from libs.utils.eviction_schedule import EvictionSchedule
+
+
+def test_eviction_is_due_once_per_interval(mocker):
+    monotonic = mocker.patch(
+        "libs.utils.eviction_schedule.time.monotonic", return_value=1000.0
+    )
+    schedule = EvictionSchedule(interval_seconds=300)
+
+    assert schedule.is_due() is True
+    assert schedule.is_due() is False
+
+    monotonic.return_value = 1299.0
+    assert schedule.is_due() is False
+    monotonic.return_value = 1300.0
+    assert schedule.is_due() is True
+
+
+def test_clear_makes_the_eviction_due():
+    schedule = EvictionSchedule(interval_seconds=300)
+    assert schedule.is_due() is True
+
+    schedule.clear()
+    assert schedule.is_due() is True
@@ -0,0 +1,102 @@
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+from libs.azure_helper import storage_blob
+from libs.utils import remote_module_loader
+from libs.utils.remote_module_loader import (
+    clear_schema_cache,
+    get_json_schema,
+    load_schema_from_blob,
+)
+
+SCHEMA_SOURCE = """
+from pydantic import BaseModel
+
+
+class InvoiceSchema(BaseModel):
+    invoice_id: str
+"""
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    clear_schema_cache()
+    storage_blob.clear_client_pool()
+    yield
+    clear_schema_cache()
+    storage_blob.clear_client_pool()
+
+
+@pytest.fixture
+def blob_client(mocker):
+    mocker.patch("libs.azure_helper.storage_blob.DefaultAzureCredential")
+    blob_service_client = mocker.patch(
+        "libs.azure_helper.storage_blob.BlobServiceClient"
+    ).return_value
+    blob_client = blob_service_client.get_blob_client.return_value
+    downloader = blob_client.download_blob.return_value
+    downloader.readall.return_value = SCHEMA_SOURCE.encode("utf-8")
+    downloader.properties.etag = '"etag-1"'
+    return blob_client
+
+
+def _load():
+    return load_schema_from_blob(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="cps-configuration/Schemas/schema-1",
+        blob_name="invoice.py",
+        module_name="InvoiceSchema",
+    )
+
+
+def test_schema_class_is_compiled_once(blob_client):
+    first = _load()
+    second = _load()
+
+    assert first is second
+    assert first.__name__ == "InvoiceSchema"
+    blob_client.download_blob.assert_called_once_with()
+
+
+def test_schema_class_is_revalidated_with_etag(blob_client, mocker):
+    first = _load()
+    mocker.patch.object(remote_module_loader, "SCHEMA_REVALIDATE_SECONDS", 0)
+    blob_client.download_blob.side_effect = ResourceNotModifiedError("Not modified")
+
+    assert _load() is first
+    blob_client.download_blob.assert_called_with(
+        etag='"etag-1"', match_condition=MatchConditions.IfModified
+    )
+
+
+def test_changed_schema_class_is_compiled_again(blob_client, mocker):
+    first = _load()
+    mocker.patch.object(remote_module_loader, "SCHEMA_REVALIDATE_SECONDS", 0)
+    blob_client.download_blob.return_value.properties.etag = '"etag-2"'
+
+    second = _load()
+
+    assert second is not first
+    assert blob_client.download_blob.call_count == 2
+
+
+def test_least_recently_used_schema_class_is_evicted(blob_client, mocker):
+    mocker.patch.object(remote_module_loader, "SCHEMA_CACHE_SIZE", 1)
+    _load()
+    load_schema_from_blob(
+        account_url="https://testaccount.blob.core.windows.net",
+        container_name="cps-configuration/Schemas/schema-2",
+        blob_name="invoice.py",
+        module_name="InvoiceSchema",
+    )
+
+    _load()
+
+    assert blob_client.download_blob.call_count == 3
+
+
+def test_get_json_schema(blob_client):
+    schema_class = _load()
+
+    assert get_json_schema(schema_class) is get_json_schema(schema_class)
+    assert "invoice_id" in get_json_schema(schema_class)["properties"]
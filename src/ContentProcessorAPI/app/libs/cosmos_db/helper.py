@@ -1,12 +1,42 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import threading
 from typing import Any, Dict, List, Optional
 
 import certifi
 from pymongo import MongoClient
 from pymongo.database import Collection, Database
 
+# MongoClient instances shared by every CosmosMongDBHelper in this process.
+# MongoClient is thread-safe and keeps its own connection pool, so one client per
+# connection string is enough. Collections and indexes are bootstrapped once.
+_pool_lock = threading.Lock()
+_mongo_clients: dict[str, MongoClient] = {}
+_prepared_containers: dict[tuple[str, str, str], set] = {}
+
+
+def _get_mongo_client(connection_string: str) -> MongoClient:
+    with _pool_lock:
+        mongo_client = _mongo_clients.get(connection_string)
+        if mongo_client is None:
+            # MongoClient need to get Certificate but in Container,
+            # it doesn't have native certificate so we need to add it othwerwise the connection will be fail
+            mongo_client = MongoClient(connection_string, tlsCAFile=certifi.where())
+            _mongo_clients[connection_string] = mongo_client
+        return mongo_client
+
+
+def clear_client_pool():
+    """
+    Close and forget the shared MongoClients and bootstrapped collections of this process.
+    """
+    with _pool_lock:
+        for mongo_client in _mongo_clients.values():
+            mongo_client.close()
+        _mongo_clients.clear()
+        _prepared_containers.clear()
+
 
 class CosmosMongDBHelper:
     def __init__(
@@ -40,19 +70,34 @@ class CosmosMongDBHelper:
             db_name (str): Database Name
             container_name (str): Collection Name to be created or used
             indexes (list, optional): Adding Fields to be get indexed for searching and ordering. Defaults to None.
+                Each index is a (field, order) tuple, or a tuple of them for a compound index.
 
         Returns:
             tuple: MongoClient, Database, Collection
         """
-        # MongoClient need to get Certificate but in Container,
-        # it doesn't have native certificate so we need to add it othwerwise the connection will be fail
-        mongoClient = MongoClient(connection_string, tlsCAFile=certifi.where())
+        mongoClient = _get_mongo_client(connection_string)
         database = mongoClient[db_name]
-        container = self._create_container(database, container_name)
+
+        # Only the first helper for a collection checks the collection and its indexes
+        key = (connection_string, db_name, container_name)
+        with _pool_lock:
+            prepared_indexes = _prepared_containers.get(key)
+
+        if prepared_indexes is None:
+            container = self._create_container(database, container_name)
+            prepared_indexes = set()
+        else:
+            container = database[container_name]
+
         # Add Indexes
-        if indexes:
-            self._create_indexes(container, indexes)
-        # self._create_indexes(container, ["ClassName", "Id"])
+        missing_indexes = [
+            index for index in (indexes or []) if index not in prepared_indexes
+        ]
+        if missing_indexes:
+            self._create_indexes(container, missing_indexes)
+
+        with _pool_lock:
+            _prepared_containers[key] = prepared_indexes.union(missing_indexes)
 
         return mongoClient, database, container
 
@@ -61,16 +106,24 @@ class CosmosMongDBHelper:
             database.create_collection(container_name)
         return database[container_name]
 
-    def _create_indexes(self, container, fields):
+    def _create_indexes(self, container, indexes):
         existing_indexes = container.index_information()
-        for field, order in fields:
-            if f"{field}_{order}" not in existing_indexes:
-                container.create_index([(field, order)])
+        for index in indexes:
+            # A (field, order) tuple, or a tuple of them for a compound index
+            keys = [index] if isinstance(index[0], str) else list(index)
+            index_name = "_".join(f"{field}_{order}" for field, order in keys)
+            if index_name not in existing_indexes:
+                container.create_index(keys)
 
     def insert_document(self, document: Dict[str, Any]):
         result = self.container.insert_one(document)
         return result
 
+    def insert_documents(self, documents: List[Dict[str, Any]]):
+        # Unordered, so the documents are written in one round trip without stopping at a failure
+        result = self.container.insert_many(documents, ordered=False)
+        return result
+
     def find_document(
         self,
         query: Dict[str, Any],
@@ -94,6 +147,13 @@ class CosmosMongDBHelper:
             query = {}
         return self.container.count_documents(query)
 
+    def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(self.container.aggregate(pipeline))
+
+    def estimated_document_count(self) -> int:
+        # Read from the collection metadata, without scanning the documents
+        return self.container.estimated_document_count()
+
     def update_document(self, item_id: str, update: Dict[str, Any]):
         result = self.container.update_one({"Id": item_id}, {"$set": update})
         return result
@@ -0,0 +1,75 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject the request bodies exceeding the limit of their path while they are received.
+
+    FastAPI spools the whole multipart body before the endpoint is called. This middleware
+    answers 413 as soon as the Content-Length, or the bytes received so far, exceed the
+    limit, so the rest of an oversized upload is never read.
+
+    Attributes:
+        limits (dict[str, int]): The maximum body size in bytes by request path.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        max_body_size = (
+            self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        )
+        if max_body_size is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_body_size:
+            await self._reject(scope, receive, send, max_body_size)
+            return
+
+        received_size = 0
+        rejected = False
+
+        async def receive_with_limit() -> Message:
+            nonlocal received_size, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received_size += len(message.get("body", b""))
+                if received_size > max_body_size:
+                    # Answer now and stop reading, the application sees a disconnected client
+                    rejected = True
+                    await self._reject(scope, receive, send, max_body_size)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message: Message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, receive_with_limit, send_unless_rejected)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def _reject(
+        self, scope: Scope, receive: Receive, send: Send, max_body_size: int
+    ):
+        response = JSONResponse(
+            status_code=413,
+            content={
+                "message": f"Request body exceeds the limit of {max_body_size / (1024 * 1024):.2f} MB."
+            },
+        )
+        await response(scope, receive, send)
@@ -1,16 +1,65 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import base64
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobBlock, BlobServiceClient
+
+# Number of blocks staged at the same time by upload_blob_chunks
+UPLOAD_MAX_CONCURRENCY = 4
+
+# Azure SDK clients shared by every StorageBlobHelper in this process.
+# The credential caches its tokens and each BlobServiceClient keeps its connection pool,
+# so they are created once instead of on every helper construction.
+_pool_lock = threading.Lock()
+_credential: DefaultAzureCredential = None
+_blob_service_clients: dict[str, BlobServiceClient] = {}
+_verified_containers: set[tuple[str, str]] = set()
+
+
+def _get_credential() -> DefaultAzureCredential:
+    global _credential
+    with _pool_lock:
+        if _credential is None:
+            _credential = DefaultAzureCredential()
+        return _credential
+
+
+def _get_blob_service_client(account_url: str) -> BlobServiceClient:
+    credential = _get_credential()
+    with _pool_lock:
+        blob_service_client = _blob_service_clients.get(account_url)
+        if blob_service_client is None:
+            blob_service_client = BlobServiceClient(
+                account_url=account_url, credential=credential
+            )
+            _blob_service_clients[account_url] = blob_service_client
+        return blob_service_client
+
+
+def clear_client_pool():
+    """
+    Close and forget the shared credential, clients and verified containers of this process.
+    """
+    global _credential
+    with _pool_lock:
+        for blob_service_client in _blob_service_clients.values():
+            blob_service_client.close()
+        if _credential is not None:
+            _credential.close()
+        _credential = None
+        _blob_service_clients.clear()
+        _verified_containers.clear()
 
 
 class StorageBlobHelper:
     def __init__(self, account_url, container_name=None):
-        credential = DefaultAzureCredential()
-        self.blob_service_client = BlobServiceClient(
-            account_url=account_url, credential=credential
-        )
+        self.blob_service_client = _get_blob_service_client(account_url)
         self.parent_container_name = container_name
         if container_name:
             # if containeer_name is provided, "container_name/folder name" is used, get container_name
@@ -39,9 +88,21 @@ class StorageBlobHelper:
         return container_client
 
     def _invalidate_container(self, container_name: str):
+        # Containers are only checked once per account in this process
+        key = (self.blob_service_client.url, container_name)
+        if key in _verified_containers:
+            return
+
         container_client = self.blob_service_client.get_container_client(container_name)
         if not container_client.exists():
-            container_client.create_container()
+            try:
+                container_client.create_container()
+            except ResourceExistsError:
+                # Created by another worker in the meantime
+                pass
+
+        with _pool_lock:
+            _verified_containers.add(key)
 
     def upload_blob(self, blob_name, file_stream, container_name=None):
         container_client = self._get_container_client(container_name)
@@ -69,6 +130,66 @@ class StorageBlobHelper:
         download_stream = blob_client.download_blob()
         return download_stream.readall()
 
+    def upload_blob_chunks(
+        self,
+        blob_name,
+        chunks,
+        container_name=None,
+        max_concurrency=UPLOAD_MAX_CONCURRENCY,
+    ):
+        # Each chunk is staged as a block while the next chunks are read, the blob is only
+        # created when the block list is committed. If reading the chunks fails, nothing is
+        # committed and the staged blocks are discarded by the storage service.
+        container_client = self._get_container_client(container_name)
+        blob_client = container_client.get_blob_client(blob_name)
+
+        block_list = []
+        pending = set()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            try:
+                for index, chunk in enumerate(chunks):
+                    # Block ids must have the same length within a blob
+                    block_id = base64.b64encode(f"{index:08d}".encode()).decode()
+                    block_list.append(BlobBlock(block_id=block_id))
+                    pending.add(executor.submit(blob_client.stage_block, block_id, chunk))
+
+                    # Keep at most max_concurrency chunks in memory
+                    if len(pending) >= max_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+
+                for future in pending:
+                    future.result()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        return blob_client.commit_block_list(block_list)
+
+    def get_blob_properties(self, blob_name, container_name=None):
+        container_client = self._get_container_client(container_name)
+        blob_client = container_client.get_blob_client(blob_name)
+        return blob_client.get_blob_properties()
+
+    def download_blob_stream(
+        self, blob_name, container_name=None, offset=None, length=None, etag=None
+    ):
+        # The returned downloader reads the blob, or the range of it, chunk by chunk with chunks()
+        container_client = self._get_container_client(container_name)
+        blob_client = container_client.get_blob_client(blob_name)
+
+        if etag:
+            # Fail rather than mix the content of two versions of the blob
+            return blob_client.download_blob(
+                offset=offset,
+                length=length,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+            )
+        return blob_client.download_blob(offset=offset, length=length)
+
     def replace_blob(self, blob_name, file_stream, container_name=None):
         return self.upload_blob(blob_name, file_stream, container_name)
 
@@ -2,14 +2,57 @@
 # Licensed under the MIT License.
 
 import datetime
+import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 
+from app.appsettings import get_app_config
+from app.libs.request_size_limit.middleware import RequestSizeLimitMiddleware
 from app.routers import contentprocessor, schemavault
+from app.routers.models.contentprocessor.content_process import (
+    ContentProcess as CosmosContentProcess,
+)
+
+# Room for the multipart envelope and the JSON payload around the submitted file
+SUBMIT_FORM_OVERHEAD_BYTES = 1024 * 1024
+# Maximum body size of a batch submission
+SUBMIT_BATCH_MAX_BODY_BYTES = 1024 * 1024 * 1024
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the indexes of the process list filters once, before serving the requests
+    app_config = get_app_config()
+    try:
+        await run_in_threadpool(
+            CosmosContentProcess.create_indexes_to_cosmos,
+            connection_string=app_config.app_cosmos_connstr,
+            database_name=app_config.app_cosmos_database,
+            collection_name=app_config.app_cosmos_container_process,
+        )
+    except Exception as e:
+        # The list creates its own index when it is used, only the filters lack theirs
+        logging.warning(f"Failed to create the process list indexes: {e}")
+    yield
+
 
 start_time = datetime.datetime.now()
 # app = FastAPI(dependencies=[Depends(get_token_header), Depends(get_query_token)])
-app = FastAPI(redirect_slashes=False)
+app = FastAPI(redirect_slashes=False, lifespan=lifespan)
+
+# Reject oversized submissions before their body is spooled
+max_submit_body_size = (
+    get_app_config().app_cps_max_filesize_mb * 1024 * 1024 + SUBMIT_FORM_OVERHEAD_BYTES
+)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={
+        "/contentprocessor/submit": max_submit_body_size,
+        "/contentprocessor/submit/batch": SUBMIT_BATCH_MAX_BODY_BYTES,
+    },
+)
 
 # Add the routers to the app
 app.include_router(contentprocessor.router)
@@ -1,18 +1,36 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import asyncio
+import contextlib
 import datetime
-import io
+import email.utils
+import os
 import urllib.parse
 import uuid
-
-from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
+import zipfile
+from typing import Annotated, BinaryIO, Callable, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 from pymongo.results import UpdateResult
 
 from app.appsettings import AppConfiguration, get_app_config
 from app.routers.logics.contentprocessor import (
     ContentProcessor,
+    FileValidationError,
     get_content_processor,
 )
 from app.routers.models.contentprocessor.content_process import (
@@ -24,6 +42,9 @@ from app.routers.models.contentprocessor.content_process import (
 from app.routers.models.contentprocessor.mime_types import MimeTypes, MimeTypesDetection
 from app.routers.models.contentprocessor.model import (
     ArtifactType,
+    BatchFileResult,
+    BatchStatus,
+    BatchSubmitResponse,
     ContentCommentUpdate,
     ContentProcess,
     ContentProcessorRequest,
@@ -31,6 +52,7 @@ from app.routers.models.contentprocessor.model import (
     ContentResultDelete,
     Paging,
     ProcessFile,
+    ProcessFilter,
     Status,
     Steps,
 )
@@ -55,35 +77,142 @@ router = APIRouter(
     class Paging(BaseModel):
         page_number: int = Field(default=0, gt=0)
         page_size: int = Field(default=0, gt=0)
+        continuation_token: Optional[str] = Field(default=None)
+        include_total_count: bool = Field(default=True)
 
     The request body should contain the following fields:
     * **page_number** : The page number to retrieve (1-based index).
     * **page_size** : The number of items per page.
     * **page_number** and **page_size** are both required and must be greater than 0.
+    * **continuation_token** : The continuation_token returned with the previous page.
+      The next page is read with a seek instead of skipping the previous pages,
+      page_number is not needed with it.
+    * **include_total_count** : Whether total_count and total_pages are returned.
+      The total count is estimated and refreshed every minute.
 
     ## Example Request Body
     {
         "page_number": 1,
         "page_size": 10
     }
+
+    ## Example Request Body for the next page
+    {
+        "page_size": 10,
+        "continuation_token": "<continuation_token of the previous page>"
+    }
+
+    ## Filters
+    The list is filtered on the server with the following query parameters:
+    * **status** : The status of the processes, can be repeated (ex. Completed, Error, processing).
+    * **schema_id** : The id of the schema the processes are submitted with.
+    * **imported_from**, **imported_to** : The range of the imported time (ISO 8601).
+    * **min_entity_score**, **min_schema_score** : The minimum scores of the processes.
+    * **file_name_prefix** : The beginning of the processed file name (case sensitive).
+
+    Keep the same filters while following the continuation tokens.
+
+    ## Example Request
+    POST /contentprocessor/processed?status=Completed&min_entity_score=0.8
     """,
 )
 async def get_all_processed_results(
     page_request: Paging,
+    process_filter: Annotated[ProcessFilter, Query()],
     app_config: AppConfiguration = Depends(get_app_config),
 ) -> PaginatedResponse:
     # Get all the processed content
-    paged_cosmos_content_process = CosmosContentProcess.get_all_processes_from_cosmos(
-        connection_string=app_config.app_cosmos_connstr,
-        database_name=app_config.app_cosmos_database,
-        collection_name=app_config.app_cosmos_container_process,
-        page_number=page_request.page_number if page_request else 0,
-        page_size=page_request.page_size if page_request else 0,
-    )
+    try:
+        paged_cosmos_content_process = (
+            CosmosContentProcess.get_all_processes_from_cosmos(
+                connection_string=app_config.app_cosmos_connstr,
+                database_name=app_config.app_cosmos_database,
+                collection_name=app_config.app_cosmos_container_process,
+                page_number=page_request.page_number if page_request else 0,
+                page_size=page_request.page_size if page_request else 0,
+                continuation_token=(
+                    page_request.continuation_token if page_request else None
+                ),
+                include_total_count=(
+                    page_request.include_total_count if page_request else True
+                ),
+                query=process_filter.to_query(),
+            )
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"message": str(e)})
 
     return paged_cosmos_content_process
 
 
+# File types accepted for processing - pdf or image files
+SUPPORTED_MIME_TYPES = [
+    MimeTypes.Pdf,
+    MimeTypes.ImageJpeg,
+    MimeTypes.ImagePng,
+    # MimeTypes.ImageBmp,
+    # MimeTypes.ImageGif,
+    # MimeTypes.ImageTiff,
+]
+
+# Archive types expanded by the batch submission
+ARCHIVE_MIME_TYPES = [MimeTypes.ArchiveZip, "application/x-zip-compressed"]
+
+# Maximum number of files in a batch submission
+BATCH_MAX_FILES = 1000
+
+# Number of files of a batch uploaded at the same time
+BATCH_UPLOAD_CONCURRENCY = 8
+
+
+def _create_submit_message(
+    process_id: str,
+    file_name: str,
+    file_size: int,
+    mime_type: str,
+    data: ContentProcessorRequest,
+) -> ContentProcess:
+    return ContentProcess(
+        **{
+            "process_id": process_id,
+            "files": [
+                ProcessFile(
+                    **{
+                        "process_id": process_id,
+                        "id": str(uuid.uuid4()),
+                        "name": file_name,
+                        "size": file_size,
+                        "mime_type": mime_type,
+                        "artifact_type": ArtifactType.SourceContent,
+                        "processed_by": "API",
+                    }
+                ),
+            ],
+            "pipeline_status": Status(
+                **{
+                    "process_id": process_id,
+                    "schema_id": data.Schema_Id,
+                    "metadata_id": data.Metadata_Id,
+                    "creation_time": datetime.datetime.now(datetime.timezone.utc),
+                    "steps": [
+                        Steps.Extract,
+                        Steps.Mapping,
+                        Steps.Evaluating,
+                        Steps.Save,
+                    ],
+                    "remaining_steps": [
+                        Steps.Extract,
+                        Steps.Mapping,
+                        Steps.Evaluating,
+                        Steps.Save,
+                    ],
+                    "completed_steps": [],
+                }
+            ),
+        }
+    )
+
+
 @router.post(
     "/submit",
     summary="Submit a file to be processed",
@@ -113,14 +242,7 @@ async def Submit_File_With_MetaData(
 ):
     # Save the uploaded file
     # 1. Check Mime Type and Validate whether file is supported - Should be pdf or image files
-    if file.content_type not in [
-        MimeTypes.Pdf,
-        MimeTypes.ImageJpeg,
-        MimeTypes.ImagePng,
-        # MimeTypes.ImageBmp,
-        # MimeTypes.ImageGif,
-        # MimeTypes.ImageTiff,
-    ]:
+    if file.content_type not in SUPPORTED_MIME_TYPES:
         return JSONResponse(
             status_code=415,
             content={
@@ -128,7 +250,8 @@ async def Submit_File_With_MetaData(
             },
         )
 
-    # 2. Check File Size - Should be less than 20MB
+    # 2. Check File Size - Should be less than 20MB.
+    # Bodies far over the limit are already rejected by the request size limit while received
     if file.size > app_config.app_cps_max_filesize_mb * 1024 * 1024:
         return JSONResponse(
             status_code=413,
@@ -140,56 +263,33 @@ async def Submit_File_With_MetaData(
     # Generate Process Id
     process_id = str(uuid.uuid4())
 
-    # Save the file to Blob Storage
-    content_processor.save_file_to_blob(
-        process_id=process_id, file=file.file, file_name=file.filename
-    )
+    # Save the file to Blob Storage.
+    # The blocks are checked, hashed and uploaded as they are read, the SDK calls are blocking
+    try:
+        uploaded_file = await run_in_threadpool(
+            content_processor.save_file_stream_to_blob,
+            process_id=process_id,
+            file=file.file,
+            file_name=file.filename,
+            mime_type=file.content_type,
+            max_size=app_config.app_cps_max_filesize_mb * 1024 * 1024,
+        )
+    except FileValidationError as e:
+        return JSONResponse(status_code=e.status_code, content={"message": e.message})
 
     # Create Message Object to be sent to Queue
-    submit_queue_message = ContentProcess(
-        **{
-            "process_id": process_id,
-            "files": [
-                ProcessFile(
-                    **{
-                        "process_id": process_id,
-                        "id": str(uuid.uuid4()),
-                        "name": file.filename,
-                        "size": file.size,
-                        "mime_type": file.content_type,
-                        "artifact_type": ArtifactType.SourceContent,
-                        "processed_by": "API",
-                    }
-                ),
-            ],
-            "pipeline_status": Status(
-                **{
-                    "process_id": process_id,
-                    "schema_id": data.Schema_Id,
-                    "metadata_id": data.Metadata_Id,
-                    "creation_time": datetime.datetime.now(datetime.timezone.utc),
-                    "steps": [
-                        Steps.Extract,
-                        Steps.Mapping,
-                        Steps.Evaluating,
-                        Steps.Save,
-                    ],
-                    "remaining_steps": [
-                        Steps.Extract,
-                        Steps.Mapping,
-                        Steps.Evaluating,
-                        Steps.Save,
-                    ],
-                    "completed_steps": [],
-                }
-            ),
-        }
+    submit_queue_message = _create_submit_message(
+        process_id=process_id,
+        file_name=file.filename,
+        file_size=uploaded_file.size,
+        mime_type=file.content_type,
+        data=data,
     )
 
     # Droop the message to Queue
     content_processor.enqueue_message(submit_queue_message)
 
-    file_size_mb = file.size / (1024 * 1024)
+    file_size_mb = uploaded_file.size / (1024 * 1024)
 
     # Add Empty Process
     CosmosContentProcess(
@@ -201,16 +301,232 @@ async def Submit_File_With_MetaData(
         connection_string=content_processor.config.app_cosmos_connstr,
         database_name=content_processor.config.app_cosmos_database,
         collection_name=content_processor.config.app_cosmos_container_process,
+        schema_id=data.Schema_Id,
     )
     return JSONResponse(
         status_code=202,
         content={
             "message": f"File '{file.filename}' of size {file_size_mb:.2f} MB received with metadata: {data} \n The file is being processed.",
             "status_url": f"/contentprocessor/status/{process_id}",
+            "sha256": uploaded_file.sha256,
         },
     )
 
 
+@router.post(
+    "/submit/batch",
+    response_model=BatchSubmitResponse,
+    summary="Submit a batch of files to be processed",
+    description="""
+    Submits many files to be processed by the content processor with the same schema.
+    The files can be passed as several `files` parts or as zip archives of files.
+
+    Each file must be a PDF or image file (JPEG, PNG) and should not exceed the file size limit.
+    The files are uploaded concurrently. A rejected file doesn't reject the batch,
+    its status and reason are returned with the other files.
+
+    The response contains the process id of every submitted file and the batch id.
+    The aggregate status of the batch is returned by '/contentprocessor/batch/{batch_id}'.
+
+    ## Example Request Body
+    {
+        "Schema_Id": "registered schema id - UUID string",
+        "Metadata_Id": "metadata_id"
+    }
+
+   """,
+)
+async def Submit_Files_With_MetaData(
+    data: ContentProcessorRequest = Body(...),
+    files: list[UploadFile] = File(...),
+    content_processor: ContentProcessor = Depends(get_content_processor),
+    app_config: AppConfiguration = Depends(get_app_config),
+):
+    batch_id = str(uuid.uuid4())
+    max_file_size = app_config.app_cps_max_filesize_mb * 1024 * 1024
+
+    with contextlib.ExitStack() as archives:
+        # Expand the zip archives, their entries are only read when they are uploaded
+        batch_files: list[tuple[str, str, Callable[[], BinaryIO]]] = []
+        file_results: list[BatchFileResult] = []
+        for file in files:
+            if file.content_type not in ARCHIVE_MIME_TYPES:
+                batch_files.append(
+                    (file.filename, file.content_type, lambda file=file: file.file)
+                )
+                continue
+
+            try:
+                archive = archives.enter_context(zipfile.ZipFile(file.file))
+            except zipfile.BadZipFile:
+                file_results.append(
+                    BatchFileResult(
+                        file_name=file.filename,
+                        status="rejected",
+                        message="The archive is not a valid zip file.",
+                    )
+                )
+                continue
+
+            for entry in archive.infolist():
+                file_name = os.path.basename(entry.filename)
+                if entry.is_dir() or not file_name:
+                    continue
+                batch_files.append(
+                    (
+                        file_name,
+                        MimeTypesDetection.try_get_file_type(file_name.lower()),
+                        lambda archive=archive, entry=entry: archive.open(entry),
+                    )
+                )
+
+        if len(batch_files) > BATCH_MAX_FILES:
+            return JSONResponse(
+                status_code=413,
+                content={
+                    "message": f"The batch exceeds the limit of {BATCH_MAX_FILES} files. Current count: {len(batch_files)}."
+                },
+            )
+
+        upload_slots = asyncio.Semaphore(BATCH_UPLOAD_CONCURRENCY)
+
+        async def upload_file(
+            file_name: str, mime_type: str, open_file: Callable[[], BinaryIO]
+        ) -> tuple[BatchFileResult, Optional[ContentProcess]]:
+            if mime_type not in SUPPORTED_MIME_TYPES:
+                return (
+                    BatchFileResult(
+                        file_name=file_name,
+                        status="rejected",
+                        message=f"Unsupported file type: {mime_type}. Only PDF and JPEG, PNG image files are available.",
+                    ),
+                    None,
+                )
+
+            process_id = str(uuid.uuid4())
+
+            def save_file():
+                # Opened in the worker thread, zip entries are decompressed there
+                with open_file() as file_stream:
+                    return content_processor.save_file_stream_to_blob(
+                        process_id=process_id,
+                        file=file_stream,
+                        file_name=file_name,
+                        mime_type=mime_type,
+                        max_size=max_file_size,
+                    )
+
+            try:
+                async with upload_slots:
+                    uploaded_file = await run_in_threadpool(save_file)
+            except FileValidationError as e:
+                return (
+                    BatchFileResult(
+                        file_name=file_name, status="rejected", message=e.message
+                    ),
+                    None,
+                )
+
+            return (
+                BatchFileResult(
+                    file_name=file_name,
+                    status="submitted",
+                    process_id=process_id,
+                    status_url=f"/contentprocessor/status/{process_id}",
+                    sha256=uploaded_file.sha256,
+                ),
+                _create_submit_message(
+                    process_id=process_id,
+                    file_name=file_name,
+                    file_size=uploaded_file.size,
+                    mime_type=mime_type,
+                    data=data,
+                ),
+            )
+
+        uploads = await asyncio.gather(
+            *(upload_file(*batch_file) for batch_file in batch_files)
+        )
+
+    file_results.extend(result for result, _ in uploads)
+    submitted = [(result, message) for result, message in uploads if message]
+    if not submitted:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "message": "No file of the batch was submitted.",
+                "files": [result.model_dump() for result in file_results],
+            },
+        )
+
+    # Add the Empty Processes with one request, before their messages are processed
+    imported_time = datetime.datetime.now(datetime.timezone.utc)
+    await run_in_threadpool(
+        CosmosContentProcess.insert_processes_to_cosmos,
+        processes=[
+            CosmosContentProcess(
+                process_id=result.process_id,
+                processed_file_name=result.file_name,
+                status="processing",
+                imported_time=imported_time,
+            )
+            for result, _ in submitted
+        ],
+        batch_id=batch_id,
+        schema_id=data.Schema_Id,
+        connection_string=app_config.app_cosmos_connstr,
+        database_name=app_config.app_cosmos_database,
+        collection_name=app_config.app_cosmos_container_process,
+    )
+
+    # Drop the messages to Queue
+    async def enqueue_message(message: ContentProcess):
+        async with upload_slots:
+            await run_in_threadpool(content_processor.enqueue_message, message)
+
+    await asyncio.gather(*(enqueue_message(message) for _, message in submitted))
+
+    response = BatchSubmitResponse(
+        batch_id=batch_id,
+        status_url=f"/contentprocessor/batch/{batch_id}",
+        submitted_count=len(submitted),
+        rejected_count=len(file_results) - len(submitted),
+        files=file_results,
+    )
+    return JSONResponse(status_code=202, content=response.model_dump())
+
+
+@router.get(
+    "/batch/{batch_id}",
+    response_model=BatchStatus,
+    summary="Get the aggregate status of a batch of files",
+    description="""
+            Returns the number of processes of a batch by status,
+            and the status of each process submitted in the batch.
+            """,
+)
+async def get_batch_status(
+    batch_id: str, app_config: AppConfiguration = Depends(get_app_config)
+):
+    batch_status = CosmosContentProcess.get_batch_status_from_cosmos(
+        batch_id=batch_id,
+        connection_string=app_config.app_cosmos_connstr,
+        database_name=app_config.app_cosmos_database,
+        collection_name=app_config.app_cosmos_container_process,
+    )
+
+    if batch_status is None:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "status": "failed",
+                "message": f"Batch with ID '{batch_id}' not found.",
+            },
+        )
+
+    return batch_status
+
+
 @router.get(
     "/status/{process_id}",
     summary="Get the status of a file being processing. it shows the status of the file being processed",
@@ -436,6 +752,63 @@ async def update_process_result(
         )
 
 
+def _parse_byte_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single "bytes=start-end" range into inclusive start and end offsets.
+    Returns None when the whole file is served: no range, a malformed range or several ranges.
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    first, separator, last = range_header[len("bytes="):].strip().partition("-")
+    if not separator or "," in last:
+        return None
+
+    if not first:
+        # Suffix range, the last bytes of the file
+        if not last.isdigit():
+            return None
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise ValueError("Unsatisfiable range.")
+        return max(size - suffix_length, 0), size - 1
+
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range.")
+    return start, min(end, size - 1)
+
+
+def _is_not_modified(
+    request: Request, etag: str, last_modified: datetime.datetime
+) -> bool:
+    """
+    Check the conditional request headers of the browser against the file version.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, If-Modified-Since is ignored when If-None-Match is present
+        etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in etags or etag in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            modified_since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if modified_since.tzinfo is None:
+            modified_since = modified_since.replace(tzinfo=datetime.timezone.utc)
+        # HTTP dates have a precision of one second
+        return last_modified.replace(microsecond=0) <= modified_since
+
+    return False
+
+
 @router.get(
     "/processed/files/{process_id}",
     summary="Get the original file to be processed",
@@ -446,10 +819,17 @@ async def update_process_result(
             just use this endpoint for your file viewer URL.
             for example :
             contentviewer.url = http://<endpoint>/contentprocessor/processed/files/{process_id}
+
+            The file is streamed from the blob storage chunk by chunk.
+            A single byte range can be requested with the Range header (206 Partial Content).
+            The ETag and Last-Modified headers are returned, so the file can be revalidated
+            with If-None-Match or If-Modified-Since (304 Not Modified).
             """,
 )
 async def get_original_file(
-    process_id: str, app_config: AppConfiguration = Depends(get_app_config)
+    process_id: str,
+    request: Request,
+    app_config: AppConfiguration = Depends(get_app_config),
 ):
     # Check processed content in Cosmos
     process_status = CosmosContentProcess(process_id=process_id).get_status_from_cosmos(
@@ -467,31 +847,97 @@ async def get_original_file(
             },
         )
 
-    # if not process_status: return 404
-    if process_status is not None:
-        # Get the file from Blob Storage
-        file_bytes = process_status.get_file_bytes_from_blob(
+    container_name = f"{app_config.app_cps_processes}/{process_status.process_id}"
+
+    # Get the file version from Blob Storage, the SDK calls are blocking
+    try:
+        file_properties = await run_in_threadpool(
+            process_status.get_file_properties_from_blob,
             connection_string=app_config.app_storage_blob_url,
             blob_name=process_status.processed_file_name,
-            container_name=f"{app_config.app_cps_processes}/{process_status.process_id}",
+            container_name=container_name,
         )
-        file_stream = io.BytesIO(file_bytes)
+    except ResourceNotFoundError:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "status": "failed",
+                "message": f"File of Process ID '{process_id}' not found.",
+            },
+        )
+
+    file_size = file_properties.size
+    etag = file_properties.etag
+    last_modified = file_properties.last_modified
 
-        # Encode the filename to support RFC 5987
-        encoded_filename = urllib.parse.quote(process_status.processed_file_name)
-        content_type_string = MimeTypesDetection.get_file_type(
-            process_status.processed_file_name
+    # Encode the filename to support RFC 5987
+    encoded_filename = urllib.parse.quote(process_status.processed_file_name)
+    content_type_string = MimeTypesDetection.get_file_type(
+        process_status.processed_file_name
+    )
+    # Set the response headers
+    headers = {
+        "Content-Disposition": f"inline; filename*=UTF-8''{encoded_filename}",
+        "Content-Type": content_type_string,
+        "Accept-Ranges": "bytes",
+    }
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = email.utils.format_datetime(
+            last_modified.astimezone(datetime.timezone.utc), usegmt=True
         )
-        # Set the response headers
-        headers = {
-            "Content-Disposition": f"inline; filename*=UTF-8''{encoded_filename}",
-            "Content-Type": content_type_string,
-        }
 
-        return StreamingResponse(
-            file_stream, media_type=content_type_string, headers=headers
+    if _is_not_modified(request, etag, last_modified):
+        return Response(
+            status_code=304,
+            headers={
+                key: value
+                for key, value in headers.items()
+                if key in ("ETag", "Last-Modified")
+            },
+        )
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range not in (headers.get("ETag"), headers.get("Last-Modified")):
+        # The browser has another version of the file, the whole file is served
+        range_header = None
+
+    try:
+        byte_range = _parse_byte_range(range_header, file_size)
+    except ValueError:
+        return Response(
+            status_code=416, headers={"Content-Range": f"bytes */{file_size}"}
         )
 
+    if byte_range is None:
+        status_code, offset, length = 200, None, None
+        headers["Content-Length"] = str(file_size)
+    else:
+        start, end = byte_range
+        status_code, offset, length = 206, start, end - start + 1
+        headers["Content-Length"] = str(length)
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+
+    # Download the version of the file checked above, chunk by chunk
+    file_stream = await run_in_threadpool(
+        process_status.get_file_stream_from_blob,
+        connection_string=app_config.app_storage_blob_url,
+        blob_name=process_status.processed_file_name,
+        container_name=container_name,
+        offset=offset,
+        length=length,
+        etag=etag,
+    )
+
+    return StreamingResponse(
+        file_stream.chunks(),
+        status_code=status_code,
+        media_type=content_type_string,
+        headers=headers,
+    )
+
 
 @router.delete(
     "/processed/{process_id}",
@@ -1,11 +1,34 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import hashlib
+from typing import BinaryIO
+
 from pydantic import BaseModel, Field
 
 from app.appsettings import AppConfiguration, get_app_config
 from app.libs.storage_blob.helper import StorageBlobHelper
 from app.libs.storage_queue.helper import StorageQueueHelper
+from app.routers.models.contentprocessor.mime_types import MimeTypesDetection
+
+# Size of the blocks the submitted files are uploaded in
+UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class FileValidationError(Exception):
+    """
+    The submitted file is rejected, status_code is the HTTP status of the response.
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadedFile(BaseModel):
+    size: int
+    sha256: str
 
 
 class ContentProcessor(BaseModel):
@@ -26,6 +49,56 @@ class ContentProcessor(BaseModel):
     def save_file_to_blob(self, process_id: str, file: bytes, file_name: str):
         self.blobHelper.upload_blob(file_name, file, process_id)
 
+    def save_file_stream_to_blob(
+        self,
+        process_id: str,
+        file: BinaryIO,
+        file_name: str,
+        mime_type: str,
+        max_size: int,
+    ) -> UploadedFile:
+        """
+        Upload the file block by block, reading it once.
+
+        While the blocks are read, the content type is checked against the leading bytes of
+        the file, the size is checked against max_size and the SHA-256 of the content is
+        computed. The upload is aborted at the first block failing the checks.
+
+        Raises:
+            FileValidationError: If the content doesn't match mime_type or exceeds max_size.
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+
+        def read_blocks():
+            nonlocal size
+            while block := file.read(UPLOAD_BLOCK_SIZE):
+                if size == 0:
+                    detected_type = MimeTypesDetection.try_get_file_type_from_content(
+                        block
+                    )
+                    if detected_type != mime_type:
+                        raise FileValidationError(
+                            f"The content of the file doesn't match its type: {mime_type}.",
+                            status_code=415,
+                        )
+
+                size += len(block)
+                if size > max_size:
+                    raise FileValidationError(
+                        f"File size exceeds the limit of {max_size / (1024 * 1024):.0f} MB.",
+                        status_code=413,
+                    )
+
+                sha256.update(block)
+                yield block
+
+            if size == 0:
+                raise FileValidationError("The file is empty.", status_code=400)
+
+        self.blobHelper.upload_blob_chunks(file_name, read_blocks(), process_id)
+        return UploadedFile(size=size, sha256=sha256.hexdigest())
+
     def enqueue_message(self, message_object: BaseModel):
         self.queueHelper.drop_message(message_object)
 
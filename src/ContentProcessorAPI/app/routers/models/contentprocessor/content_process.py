@@ -1,14 +1,18 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import base64
 import datetime
 import json
+import threading
+import time
 from typing import Any, List, Optional
 
 from pydantic import BaseModel, SkipValidation
 
 from app.libs.cosmos_db.helper import CosmosMongDBHelper
 from app.libs.storage_blob.helper import StorageBlobHelper
+from app.routers.models.contentprocessor.model import BatchProcessItem, BatchStatus
 from app.routers.models.schmavault.model import Schema
 
 
@@ -44,12 +48,90 @@ class Step_Outputs(BaseModel):
         arbitrary_types_allowed = True
 
 
+# Sort order of the process list, served by a compound index
+PROCESS_LIST_INDEX = (("imported_time", -1), ("process_id", -1))
+
+# Indexes of the filters of the process list, created at startup.
+# The equality filters come first, followed by the sort order of the list.
+PROCESS_FILTER_INDEXES = [
+    (("status", 1), ("imported_time", -1), ("process_id", -1)),
+    (("schema_id", 1), ("imported_time", -1), ("process_id", -1)),
+    ("processed_file_name", 1),
+    ("entity_score", -1),
+    ("schema_score", -1),
+]
+
+# Seconds a total count of the process list is reused
+TOTAL_COUNT_CACHE_SECONDS = 60
+# Number of total counts kept for the filters of the process list
+TOTAL_COUNT_CACHE_SIZE = 256
+
+# Total counts of the process lists by (connection_string, database_name, collection_name, query)
+_total_counts: dict[tuple[str, str, str, str], tuple[int, float]] = {}
+_total_counts_lock = threading.Lock()
+
+
+def clear_total_count_cache():
+    """
+    Forget the cached total counts of the process lists.
+    """
+    with _total_counts_lock:
+        _total_counts.clear()
+
+
+def _get_total_count(mongo_helper: CosmosMongDBHelper, key: tuple, query: dict) -> int:
+    # The count is reused for a while instead of counting the documents on every page request.
+    # Without a filter, it is estimated from the collection metadata.
+    key = (*key, json.dumps(query, sort_keys=True, default=str))
+    with _total_counts_lock:
+        cached = _total_counts.get(key)
+    if cached is not None and time.monotonic() - cached[1] < TOTAL_COUNT_CACHE_SECONDS:
+        return cached[0]
+
+    if query:
+        total_count = mongo_helper.count_documents(query)
+    else:
+        total_count = mongo_helper.estimated_document_count()
+
+    with _total_counts_lock:
+        _total_counts.pop(key, None)
+        _total_counts[key] = (total_count, time.monotonic())
+        while len(_total_counts) > TOTAL_COUNT_CACHE_SIZE:
+            del _total_counts[next(iter(_total_counts))]
+    return total_count
+
+
+def _encode_continuation_token(
+    imported_time: datetime.datetime, process_id: str, page_number: int
+) -> str:
+    # Stored dates are UTC
+    if imported_time.tzinfo is not None:
+        imported_time = imported_time.astimezone(datetime.UTC).replace(tzinfo=None)
+    token = json.dumps(
+        {"t": imported_time.isoformat(), "id": process_id, "p": page_number}
+    )
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def _decode_continuation_token(token: str) -> tuple[datetime.datetime, str, int]:
+    try:
+        value = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return (
+            datetime.datetime.fromisoformat(value["t"]),
+            str(value["id"]),
+            int(value["p"]),
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid continuation token.") from e
+
+
 class PaginatedResponse(BaseModel):
-    total_count: int
-    total_pages: int
+    total_count: Optional[int] = None
+    total_pages: Optional[int] = None
     current_page: int
     page_size: int
     items: List["ContentProcess"]
+    continuation_token: Optional[str] = None
 
 
 class ContentProcess(BaseModel):
@@ -82,9 +164,11 @@ class ContentProcess(BaseModel):
         connection_string: str,
         database_name: str,
         collection_name: str,
+        schema_id: Optional[str] = None,
     ):
         """
         Update the status of the process in Cosmos DB.
+        The schema_id the process is submitted with is stored for the schema filter of the process list.
         """
         # Check if the process_id is already in the database
         mongo_helper = CosmosMongDBHelper(
@@ -98,6 +182,7 @@ class ContentProcess(BaseModel):
         existing_process = mongo_helper.find_document(
             query={"process_id": self.process_id}
         )
+        schema = {"schema_id": schema_id} if schema_id else {}
         if existing_process:
             # Update the existing document
             mongo_helper.update_document_by_query(
@@ -105,11 +190,12 @@ class ContentProcess(BaseModel):
                 {
                     "status": self.status,
                     "processed_file_name": self.processed_file_name,
+                    **schema,
                 },
             )
         else:
             # Insert a new document
-            mongo_helper.insert_document(self.model_dump())
+            mongo_helper.insert_document({**self.model_dump(), **schema})
 
     def update_status_to_cosmos(
         self, connection_string: str, database_name: str, collection_name: str
@@ -287,6 +373,95 @@ class ContentProcess(BaseModel):
         else:
             return None
 
+    @staticmethod
+    def insert_processes_to_cosmos(
+        processes: list["ContentProcess"],
+        batch_id: str,
+        schema_id: str,
+        connection_string: str,
+        database_name: str,
+        collection_name: str,
+    ):
+        """
+        Insert the status documents of the processes of a batch in Cosmos DB with one request.
+        The schema_id the batch is submitted with is stored for the schema filter of the process list.
+        """
+        mongo_helper = CosmosMongDBHelper(
+            connection_string=connection_string,
+            db_name=database_name,
+            container_name=collection_name,
+            indexes=[("process_id", 1), ("batch_id", 1)],
+        )
+
+        return mongo_helper.insert_documents(
+            [
+                {**process.model_dump(), "batch_id": batch_id, "schema_id": schema_id}
+                for process in processes
+            ]
+        )
+
+    @staticmethod
+    def get_batch_status_from_cosmos(
+        batch_id: str,
+        connection_string: str,
+        database_name: str,
+        collection_name: str,
+    ) -> Optional[BatchStatus]:
+        """
+        Get the status of the processes submitted in a batch from Cosmos DB.
+        """
+        mongo_helper = CosmosMongDBHelper(
+            connection_string=connection_string,
+            db_name=database_name,
+            container_name=collection_name,
+            indexes=[("process_id", 1), ("batch_id", 1)],
+        )
+
+        status_counts = mongo_helper.aggregate(
+            [
+                {"$match": {"batch_id": batch_id}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ]
+        )
+        if not status_counts:
+            return None
+
+        items = mongo_helper.find_document(
+            query={"batch_id": batch_id},
+            projection=["process_id", "processed_file_name", "status"],
+        )
+
+        return BatchStatus(
+            batch_id=batch_id,
+            total_count=sum(item["count"] for item in status_counts),
+            status_counts={
+                str(item["_id"]): item["count"] for item in status_counts
+            },
+            items=[BatchProcessItem(**item) for item in items],
+        )
+
+    @staticmethod
+    def create_indexes_to_cosmos(
+        connection_string: str,
+        database_name: str,
+        collection_name: str,
+    ):
+        """
+        Create the indexes of the process list and its filters in Cosmos DB.
+        """
+        CosmosMongDBHelper(
+            connection_string=connection_string,
+            db_name=database_name,
+            container_name=collection_name,
+            indexes=[
+                ("process_id", 1),
+                ("imported_time", -1),
+                ("batch_id", 1),
+                PROCESS_LIST_INDEX,
+                *PROCESS_FILTER_INDEXES,
+            ],
+        )
+
     @staticmethod
     def get_all_processes_from_cosmos(
         connection_string: str,
@@ -294,27 +469,50 @@ class ContentProcess(BaseModel):
         collection_name: str,
         page_size: int = 0,
         page_number: int = 0,
+        continuation_token: Optional[str] = None,
+        include_total_count: bool = True,
+        query: Optional[dict] = None,
     ) -> PaginatedResponse:
         """
-        Get all processes from Cosmos DB.
+        Get all processes from Cosmos DB matching the query, newest first.
+
+        The pages are read with a seek on (imported_time, process_id) served by a compound index.
+        Each page returns the continuation token of the next page. Without a token, the page
+        is located by page_number, which skips the previous pages.
         """
-        # Check if the process_id is already in the database
         mongo_helper = CosmosMongDBHelper(
             connection_string=connection_string,
             db_name=database_name,
             container_name=collection_name,
-            indexes=[("process_id", 1), ("imported_time", -1)],
+            indexes=[("process_id", 1), ("imported_time", -1), PROCESS_LIST_INDEX],
         )
 
-        total_count = mongo_helper.count_documents()
-        total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 1
+        filter_query = query or {}
+        page_query = filter_query
+        skip = 0
+        if continuation_token:
+            imported_time, process_id, page_number = _decode_continuation_token(
+                continuation_token
+            )
+            seek_query = {
+                "$or": [
+                    {"imported_time": {"$lt": imported_time}},
+                    {"imported_time": imported_time, "process_id": {"$lt": process_id}},
+                ]
+            }
+            page_query = (
+                {"$and": [filter_query, seek_query]} if filter_query else seek_query
+            )
+        elif page_number > 1:
+            skip = (page_number - 1) * page_size
+        page_number = max(page_number, 1)
 
-        # Check if the process_id already exists in the database
+        # Read one more item to know whether there is a next page
         items = mongo_helper.find_document(
-            query={},
-            sort_fields=[("imported_time", -1)],
-            skip=(page_number - 1) * page_size,
-            limit=page_size,
+            query=page_query,
+            sort_fields=list(PROCESS_LIST_INDEX),
+            skip=skip,
+            limit=page_size + 1 if page_size > 0 else 0,
             projection=[
                 "process_id",
                 "processed_file_name",
@@ -332,20 +530,34 @@ class ContentProcess(BaseModel):
             ],
         )
 
-        if items:
-            return PaginatedResponse(
-                total_count=total_count,
-                total_pages=total_pages,
-                current_page=page_number,
-                page_size=page_size,
-                items=items,
+        next_continuation_token = None
+        if page_size > 0 and len(items) > page_size:
+            items = items[:page_size]
+            next_continuation_token = _encode_continuation_token(
+                items[-1]["imported_time"], items[-1]["process_id"], page_number + 1
             )
-        else:
-            # Return an empty list if no processes are found
-            return PaginatedResponse(
-                total_count=0, total_pages=0, current_page=0, page_size=0, items=[]
+
+        total_count = total_pages = None
+        if include_total_count:
+            total_count = _get_total_count(
+                mongo_helper,
+                (connection_string, database_name, collection_name),
+                filter_query,
+            )
+            total_pages = (
+                (total_count + page_size - 1) // page_size if page_size > 0 else 1
             )
 
+        # A page past the last one is empty, the totals still describe the whole list
+        return PaginatedResponse(
+            total_count=total_count,
+            total_pages=total_pages,
+            current_page=page_number,
+            page_size=page_size,
+            items=items,
+            continuation_token=next_continuation_token,
+        )
+
     def get_file_bytes_from_blob(
         self,
         connection_string: str,
@@ -361,5 +573,41 @@ class ContentProcess(BaseModel):
 
         return blob_helper.download_blob(blob_name=blob_name)
 
+    def get_file_properties_from_blob(
+        self,
+        connection_string: str,
+        container_name: str,
+        blob_name: str,
+    ):
+        """
+        Get the properties of the file in blob storage (size, ETag, last modified time).
+        """
+        blob_helper = StorageBlobHelper(
+            account_url=connection_string, container_name=container_name
+        )
+
+        return blob_helper.get_blob_properties(blob_name=blob_name)
+
+    def get_file_stream_from_blob(
+        self,
+        connection_string: str,
+        container_name: str,
+        blob_name: str,
+        offset: Optional[int] = None,
+        length: Optional[int] = None,
+        etag: Optional[str] = None,
+    ):
+        """
+        Get a streamed download of the file, or of a byte range of it, from blob storage.
+        When etag is given, the download fails if the file changed in the meantime.
+        """
+        blob_helper = StorageBlobHelper(
+            account_url=connection_string, container_name=container_name
+        )
+
+        return blob_helper.download_blob_stream(
+            blob_name=blob_name, offset=offset, length=length, etag=etag
+        )
+
     class Config:
         arbitrary_types_allowed = True
@@ -175,6 +175,19 @@ class MimeTypesDetection:
         FileExtensions.Archive7Zip: MimeTypes.Archive7Zip,
     }
 
+    # Leading bytes (magic numbers) of the binary file types
+    _content_signatures = [
+        (b"%PDF-", MimeTypes.Pdf),
+        (b"\xff\xd8\xff", MimeTypes.ImageJpeg),
+        (b"\x89PNG\r\n\x1a\n", MimeTypes.ImagePng),
+        (b"BM", MimeTypes.ImageBmp),
+        (b"GIF87a", MimeTypes.ImageGif),
+        (b"GIF89a", MimeTypes.ImageGif),
+        (b"II*\x00", MimeTypes.ImageTiff),
+        (b"MM\x00*", MimeTypes.ImageTiff),
+        (b"PK\x03\x04", MimeTypes.ArchiveZip),
+    ]
+
     @staticmethod
     def get_file_type(filename):
         """
@@ -209,3 +222,19 @@ class MimeTypesDetection:
         """
         extension = os.path.splitext(filename)[1]
         return MimeTypesDetection._extension_types.get(extension, None)
+
+    @staticmethod
+    def try_get_file_type_from_content(content):
+        """
+        Tries to get the MIME type of a file based on its leading bytes.
+
+        Args:
+            content (bytes): The beginning of the file content.
+
+        Returns:
+            str or None: The MIME type if the content signature is recognized, otherwise None.
+        """
+        for signature, mime_type in MimeTypesDetection._content_signatures:
+            if content.startswith(signature):
+                return mime_type
+        return None
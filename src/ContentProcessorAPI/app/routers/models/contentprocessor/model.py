@@ -2,7 +2,8 @@
 # Licensed under the MIT License.
 
 import json
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional
 
@@ -58,6 +59,51 @@ class ProcessFile(BaseModel):
 class Paging(BaseModel):
     page_number: int = Field(default=0, gt=0)
     page_size: int = Field(default=0, gt=0)
+    continuation_token: Optional[str] = Field(default=None)
+    include_total_count: bool = Field(default=True)
+
+
+class ProcessFilter(BaseModel):
+    status: Optional[list[str]] = Field(default=None)
+    schema_id: Optional[str] = Field(default=None)
+    imported_from: Optional[datetime] = Field(default=None)
+    imported_to: Optional[datetime] = Field(default=None)
+    min_entity_score: Optional[float] = Field(default=None)
+    min_schema_score: Optional[float] = Field(default=None)
+    file_name_prefix: Optional[str] = Field(default=None, min_length=1)
+
+    def to_query(self) -> dict:
+        """
+        Build the Cosmos DB query of the processes matching the filter.
+        """
+        query = {}
+        if self.status:
+            query["status"] = {"$in": self.status}
+        if self.schema_id:
+            query["schema_id"] = self.schema_id
+        if self.imported_from or self.imported_to:
+            query["imported_time"] = {}
+            if self.imported_from:
+                query["imported_time"]["$gte"] = _to_utc(self.imported_from)
+            if self.imported_to:
+                query["imported_time"]["$lt"] = _to_utc(self.imported_to)
+        if self.min_entity_score is not None:
+            query["entity_score"] = {"$gte": self.min_entity_score}
+        if self.min_schema_score is not None:
+            query["schema_score"] = {"$gte": self.min_schema_score}
+        if self.file_name_prefix:
+            # An anchored, case sensitive prefix can be served by the index
+            query["processed_file_name"] = {
+                "$regex": f"^{re.escape(self.file_name_prefix)}"
+            }
+        return query
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Stored dates are UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
 class ContentResultUpdate(BaseModel):
@@ -93,3 +139,33 @@ class ContentProcess(BaseModel):
     process_id: str
     files: list[ProcessFile] = Field(default_factory=list)
     pipeline_status: Status = Field(default_factory=Status)
+
+
+class BatchFileResult(BaseModel):
+    file_name: str
+    status: str
+    process_id: Optional[str] = None
+    status_url: Optional[str] = None
+    sha256: Optional[str] = None
+    message: Optional[str] = None
+
+
+class BatchSubmitResponse(BaseModel):
+    batch_id: str
+    status_url: str
+    submitted_count: int
+    rejected_count: int
+    files: list[BatchFileResult] = Field(default_factory=list)
+
+
+class BatchProcessItem(BaseModel):
+    process_id: str
+    processed_file_name: Optional[str] = None
+    status: Optional[str] = None
+
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    total_count: int
+    status_counts: dict[str, int] = Field(default_factory=dict)
+    items: list[BatchProcessItem] = Field(default_factory=list)
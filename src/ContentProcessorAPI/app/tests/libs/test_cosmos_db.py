@@ -2,7 +2,14 @@ import pytest
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
-from app.libs.cosmos_db.helper import CosmosMongDBHelper
+from app.libs.cosmos_db.helper import CosmosMongDBHelper, clear_client_pool
+
+
+@pytest.fixture(autouse=True)
+def reset_client_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
 
 
 @pytest.fixture
@@ -57,6 +64,21 @@ def test_insert_document(cosmos_mongo_db_helper, mock_collection):
     assert result.inserted_id == "mock_id"
 
 
+def test_insert_documents(cosmos_mongo_db_helper, mock_collection):
+    documents = [{"key": "first"}, {"key": "second"}]
+    result = cosmos_mongo_db_helper.insert_documents(documents)
+    mock_collection.insert_many.assert_called_once_with(documents, ordered=False)
+    assert result == mock_collection.insert_many.return_value
+
+
+def test_aggregate(cosmos_mongo_db_helper, mock_collection):
+    pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+    mock_collection.aggregate.return_value = iter([{"_id": "completed", "count": 2}])
+    result = cosmos_mongo_db_helper.aggregate(pipeline)
+    mock_collection.aggregate.assert_called_once_with(pipeline)
+    assert result == [{"_id": "completed", "count": 2}]
+
+
 def test_find_document(cosmos_mongo_db_helper, mock_collection):
     query = {"key": "value"}
     result = cosmos_mongo_db_helper.find_document(query)
@@ -87,3 +109,28 @@ def test_delete_document(cosmos_mongo_db_helper, mock_collection):
     result = cosmos_mongo_db_helper.delete_document(item_id)
     mock_collection.delete_one.assert_called_once_with({"Id": item_id})
     assert result.deleted_count == 1
+
+
+def test_compound_indexes(mock_mongo_client, mock_database, mock_collection, mocker):
+    mocker.patch(
+        "app.libs.cosmos_db.helper.MongoClient", return_value=mock_mongo_client
+    )
+    mock_mongo_client.__getitem__.return_value = mock_database
+    mock_database.__getitem__.return_value = mock_collection
+    mock_collection.index_information.return_value = {"process_id_1": {}}
+
+    CosmosMongDBHelper(
+        connection_string="mongodb://localhost:27017",
+        db_name="test_db",
+        container_name="test_collection",
+        indexes=[("process_id", 1), (("imported_time", -1), ("process_id", -1))],
+    )
+
+    mock_collection.create_index.assert_called_once_with(
+        [("imported_time", -1), ("process_id", -1)]
+    )
+
+
+def test_estimated_document_count(cosmos_mongo_db_helper, mock_collection):
+    mock_collection.estimated_document_count.return_value = 42
+    assert cosmos_mongo_db_helper.estimated_document_count() == 42
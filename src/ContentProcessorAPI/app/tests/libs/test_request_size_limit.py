@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.libs.request_size_limit.middleware import RequestSizeLimitMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, limits={"/upload": 10})
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_body_within_limit(client):
+    response = client.post("/upload", content=b"x" * 10)
+    assert response.status_code == 200
+    assert response.json() == {"size": 10}
+
+
+def test_content_length_over_limit(client):
+    response = client.post("/upload", content=b"x" * 11)
+    assert response.status_code == 413
+    assert "exceeds the limit" in response.json()["message"]
+
+
+def test_streamed_body_over_limit(client):
+    # No Content-Length, the body is counted while it is received
+    def body():
+        for _ in range(5):
+            yield b"x" * 4
+
+    response = client.post("/upload", content=body())
+    assert response.status_code == 413
+
+
+def test_other_paths_are_not_limited(client):
+    response = client.post("/other", content=b"x" * 100)
+    assert response.status_code == 200
@@ -1,7 +1,15 @@
 import pytest
 from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
+from azure.core import MatchConditions
 from azure.core.exceptions import ResourceNotFoundError
-from app.libs.storage_blob.helper import StorageBlobHelper
+from app.libs.storage_blob.helper import StorageBlobHelper, clear_client_pool
+
+
+@pytest.fixture(autouse=True)
+def reset_client_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
 
 
 @pytest.fixture
@@ -61,6 +69,37 @@ def test_download_blob_not_found(
         storage_blob_helper.download_blob("test-blob", "test-container")
 
 
+def test_get_blob_properties(
+    storage_blob_helper, mock_container_client, mock_blob_client
+):
+    result = storage_blob_helper.get_blob_properties("test-blob")
+    mock_container_client.get_blob_client.assert_called_once_with("test-blob")
+    mock_blob_client.get_blob_properties.assert_called_once()
+    assert result == mock_blob_client.get_blob_properties.return_value
+
+
+def test_download_blob_stream(
+    storage_blob_helper, mock_container_client, mock_blob_client
+):
+    result = storage_blob_helper.download_blob_stream("test-blob", offset=10, length=5)
+    mock_container_client.get_blob_client.assert_called_once_with("test-blob")
+    mock_blob_client.download_blob.assert_called_once_with(offset=10, length=5)
+    mock_blob_client.get_blob_properties.assert_not_called()
+    assert result == mock_blob_client.download_blob.return_value
+
+
+def test_download_blob_stream_with_etag(
+    storage_blob_helper, mock_container_client, mock_blob_client
+):
+    storage_blob_helper.download_blob_stream("test-blob", etag='"0x1"')
+    mock_blob_client.download_blob.assert_called_once_with(
+        offset=None,
+        length=None,
+        etag='"0x1"',
+        match_condition=MatchConditions.IfNotModified,
+    )
+
+
 def test_replace_blob(storage_blob_helper, mock_container_client, mock_blob_client):
     file_stream = b"dummy content"
     result = storage_blob_helper.replace_blob("test-blob", file_stream)
@@ -91,3 +130,29 @@ def test_delete_blob(storage_blob_helper, mock_container_client, mock_blob_clien
 #     mock_blob_client.delete_blob.assert_called_once()
 #     mock_container_client.list_blobs.assert_called_once()
 #     assert mock_page_iterator.__iter__.called
+
+
+def test_upload_blob_chunks(
+    storage_blob_helper, mock_container_client, mock_blob_client
+):
+    result = storage_blob_helper.upload_blob_chunks(
+        "test-blob", iter([b"first", b"second", b"third"]), max_concurrency=2
+    )
+    mock_container_client.get_blob_client.assert_called_once_with("test-blob")
+    staged = sorted(call.args for call in mock_blob_client.stage_block.call_args_list)
+    assert [chunk for _, chunk in staged] == [b"first", b"second", b"third"]
+    block_list = mock_blob_client.commit_block_list.call_args.args[0]
+    assert [block.id for block in block_list] == [block_id for block_id, _ in staged]
+    assert result == mock_blob_client.commit_block_list.return_value
+
+
+def test_upload_blob_chunks_failure_is_not_committed(
+    storage_blob_helper, mock_blob_client
+):
+    def chunks():
+        yield b"first"
+        raise ValueError("Invalid content")
+
+    with pytest.raises(ValueError, match="Invalid content"):
+        storage_blob_helper.upload_blob_chunks("test-blob", chunks())
+    mock_blob_client.commit_block_list.assert_not_called()
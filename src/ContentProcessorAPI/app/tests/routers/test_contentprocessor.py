@@ -1,12 +1,34 @@
+import datetime
+import hashlib
+import io
+import json
+import zipfile
+
 import pytest
+from azure.core.exceptions import ResourceNotFoundError
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app
 
 from app.appsettings import AppConfiguration
+from app.routers.logics.contentprocessor import (
+    ContentProcessor,
+    FileValidationError,
+    UploadedFile,
+    UPLOAD_BLOCK_SIZE,
+    get_content_processor,
+)
+from app.routers.models.contentprocessor import content_process
+from app.routers.models.contentprocessor.content_process import (
+    ContentProcess as CosmosContentProcess,
+)
+from app.routers.models.contentprocessor.model import BatchStatus, ProcessFilter
 
 client = TestClient(app)
 
+ETAG = '"0x8DD3159A2B4C5D6"'
+LAST_MODIFIED = datetime.datetime(2025, 1, 10, 8, 30, tzinfo=datetime.timezone.utc)
+
 
 @pytest.fixture
 def app_config():
@@ -63,6 +85,7 @@ def test_get_all_processed_results(
         "page_size": 10,
         "total_count": 0,
         "total_pages": 0,
+        "continuation_token": None,
     }
 
 
@@ -200,7 +223,12 @@ def test_get_original_file_success(
     mock_process_status = MagicMock()
     mock_process_status.processed_file_name = "testfile.txt"
     mock_process_status.process_id = "123"
-    mock_process_status.get_file_bytes_from_blob.return_value = b"file content"
+    mock_process_status.get_file_properties_from_blob.return_value = MagicMock(
+        size=12, etag=ETAG, last_modified=LAST_MODIFIED
+    )
+    mock_process_status.get_file_stream_from_blob.return_value.chunks.return_value = (
+        iter([b"file ", b"content"])
+    )
     mock_cosmos_content_process.return_value.get_status_from_cosmos.return_value = (
         mock_process_status
     )
@@ -215,6 +243,102 @@ def test_get_original_file_success(
         response.headers["Content-Disposition"]
         == "inline; filename*=UTF-8''testfile.txt"
     )
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"] == ETAG
+    assert response.headers["Last-Modified"] == "Fri, 10 Jan 2025 08:30:00 GMT"
+    assert response.headers["Content-Length"] == "12"
+    assert response.content == b"file content"
+    kwargs = mock_process_status.get_file_stream_from_blob.call_args.kwargs
+    assert (kwargs["offset"], kwargs["length"], kwargs["etag"]) == (None, None, ETAG)
+
+
+@pytest.fixture
+def mock_original_file(mock_cosmos_content_process, mock_mime_types_detection):
+    mock_process_status = MagicMock()
+    mock_process_status.processed_file_name = "testfile.pdf"
+    mock_process_status.process_id = "123"
+    mock_process_status.get_file_properties_from_blob.return_value = MagicMock(
+        size=100, etag=ETAG, last_modified=LAST_MODIFIED
+    )
+    mock_process_status.get_file_stream_from_blob.return_value.chunks.return_value = (
+        iter([b"partial content"])
+    )
+    mock_cosmos_content_process.return_value.get_status_from_cosmos.return_value = (
+        mock_process_status
+    )
+    mock_mime_types_detection.get_file_type.return_value = "application/pdf"
+    return mock_process_status
+
+
+def test_get_original_file_range(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123", headers={"Range": "bytes=10-19"}
+    )
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 10-19/100"
+    assert response.headers["Content-Length"] == "10"
+    kwargs = mock_original_file.get_file_stream_from_blob.call_args.kwargs
+    assert (kwargs["offset"], kwargs["length"]) == (10, 10)
+
+
+def test_get_original_file_suffix_range(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123", headers={"Range": "bytes=-30"}
+    )
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 70-99/100"
+
+
+def test_get_original_file_range_not_satisfiable(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123", headers={"Range": "bytes=100-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */100"
+    mock_original_file.get_file_stream_from_blob.assert_not_called()
+
+
+def test_get_original_file_if_range_mismatch(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123",
+        headers={"Range": "bytes=10-19", "If-Range": '"0xOTHER"'},
+    )
+    assert response.status_code == 200
+    assert "Content-Range" not in response.headers
+
+
+def test_get_original_file_not_modified(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123", headers={"If-None-Match": ETAG}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == ETAG
+    mock_original_file.get_file_stream_from_blob.assert_not_called()
+
+
+def test_get_original_file_not_modified_since(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123",
+        headers={"If-Modified-Since": "Fri, 10 Jan 2025 08:30:00 GMT"},
+    )
+    assert response.status_code == 304
+
+
+def test_get_original_file_modified(mock_original_file):
+    response = client.get(
+        "/contentprocessor/processed/files/123", headers={"If-None-Match": '"0xOLD"'}
+    )
+    assert response.status_code == 200
+    assert response.content == b"partial content"
+
+
+def test_get_original_file_blob_not_found(mock_original_file):
+    mock_original_file.get_file_properties_from_blob.side_effect = (
+        ResourceNotFoundError("Blob not found")
+    )
+    response = client.get("/contentprocessor/processed/files/123")
+    assert response.status_code == 404
+    assert response.json()["status"] == "failed"
 
 
 @patch("app.routers.contentprocessor.get_app_config")
@@ -226,3 +350,325 @@ def test_get_original_file_not_found(mock_get_status, mock_get_app_config, app_c
     response = client.get("/contentprocessor/processed/files/test_process_id")
     assert response.status_code == 404
     assert response.json()["status"] == "failed"
+
+
+@pytest.fixture
+def content_processor():
+    blob_helper = MagicMock()
+    blob_helper.upload_blob_chunks.side_effect = lambda name, chunks, folder: list(
+        chunks
+    )
+    return ContentProcessor.model_construct(blobHelper=blob_helper)
+
+
+def test_save_file_stream_to_blob(content_processor):
+    content = b"%PDF-1.7" + b"x" * UPLOAD_BLOCK_SIZE
+    uploaded_file = content_processor.save_file_stream_to_blob(
+        process_id="123",
+        file=io.BytesIO(content),
+        file_name="invoice.pdf",
+        mime_type="application/pdf",
+        max_size=len(content),
+    )
+    assert uploaded_file.size == len(content)
+    assert uploaded_file.sha256 == hashlib.sha256(content).hexdigest()
+    args = content_processor.blobHelper.upload_blob_chunks.call_args.args
+    assert (args[0], args[2]) == ("invoice.pdf", "123")
+
+
+def test_save_file_stream_to_blob_content_mismatch(content_processor):
+    with pytest.raises(FileValidationError) as error:
+        content_processor.save_file_stream_to_blob(
+            process_id="123",
+            file=io.BytesIO(b"not a pdf"),
+            file_name="invoice.pdf",
+            mime_type="application/pdf",
+            max_size=1024,
+        )
+    assert error.value.status_code == 415
+
+
+def test_save_file_stream_to_blob_too_large(content_processor):
+    file = io.BytesIO(b"%PDF-1.7" + b"x" * (2 * UPLOAD_BLOCK_SIZE))
+    with pytest.raises(FileValidationError) as error:
+        content_processor.save_file_stream_to_blob(
+            process_id="123",
+            file=file,
+            file_name="invoice.pdf",
+            mime_type="application/pdf",
+            max_size=UPLOAD_BLOCK_SIZE,
+        )
+    assert error.value.status_code == 413
+    # The rest of the file is not read
+    assert file.tell() == 2 * UPLOAD_BLOCK_SIZE
+
+
+@pytest.fixture
+def batch_content_processor():
+    uploaded_names = []
+
+    def save_file_stream_to_blob(process_id, file, file_name, mime_type, max_size):
+        content = file.read()
+        if not content.startswith(b"%PDF-"):
+            raise FileValidationError("The content doesn't match.", status_code=415)
+        uploaded_names.append(file_name)
+        return UploadedFile(size=len(content), sha256=hashlib.sha256(content).hexdigest())
+
+    processor = MagicMock()
+    processor.save_file_stream_to_blob.side_effect = save_file_stream_to_blob
+    processor.uploaded_names = uploaded_names
+    app.dependency_overrides[get_content_processor] = lambda: processor
+    yield processor
+    app.dependency_overrides.pop(get_content_processor)
+
+
+def _batch_data():
+    return {"data": json.dumps({"Metadata_Id": "Meta 001", "Schema_Id": "schema-1"})}
+
+
+def test_submit_batch(batch_content_processor, mock_cosmos_content_process):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("invoices/b.pdf", b"%PDF-b")
+        zip_file.writestr("invoices/notes.txt", b"notes")
+
+    response = client.post(
+        "/contentprocessor/submit/batch",
+        data=_batch_data(),
+        files=[
+            ("files", ("a.pdf", b"%PDF-a", "application/pdf")),
+            ("files", ("c.pdf", b"not a pdf", "application/pdf")),
+            ("files", ("invoices.zip", archive.getvalue(), "application/zip")),
+        ],
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["submitted_count"] == 2
+    assert body["rejected_count"] == 2
+    assert body["status_url"] == f"/contentprocessor/batch/{body['batch_id']}"
+    statuses = {item["file_name"]: item["status"] for item in body["files"]}
+    assert statuses == {
+        "a.pdf": "submitted",
+        "c.pdf": "rejected",
+        "b.pdf": "submitted",
+        "notes.txt": "rejected",
+    }
+    assert sorted(batch_content_processor.uploaded_names) == ["a.pdf", "b.pdf"]
+
+    # One insert for the batch, one message per submitted file
+    insert = mock_cosmos_content_process.insert_processes_to_cosmos
+    insert.assert_called_once()
+    assert len(insert.call_args.kwargs["processes"]) == 2
+    assert insert.call_args.kwargs["batch_id"] == body["batch_id"]
+    assert insert.call_args.kwargs["schema_id"] == "schema-1"
+    assert batch_content_processor.enqueue_message.call_count == 2
+
+
+def test_submit_batch_nothing_submitted(
+    batch_content_processor, mock_cosmos_content_process
+):
+    response = client.post(
+        "/contentprocessor/submit/batch",
+        data=_batch_data(),
+        files=[("files", ("notes.txt", b"notes", "text/plain"))],
+    )
+
+    assert response.status_code == 400
+    assert response.json()["files"][0]["status"] == "rejected"
+    mock_cosmos_content_process.insert_processes_to_cosmos.assert_not_called()
+    batch_content_processor.enqueue_message.assert_not_called()
+
+
+def test_get_batch_status(mock_cosmos_content_process):
+    mock_cosmos_content_process.get_batch_status_from_cosmos.return_value = (
+        BatchStatus(
+            batch_id="batch-1",
+            total_count=2,
+            status_counts={"processing": 1, "Completed": 1},
+        )
+    )
+
+    response = client.get("/contentprocessor/batch/batch-1")
+    assert response.status_code == 200
+    assert response.json()["total_count"] == 2
+
+
+def test_get_batch_status_not_found(mock_cosmos_content_process):
+    mock_cosmos_content_process.get_batch_status_from_cosmos.return_value = None
+
+    response = client.get("/contentprocessor/batch/batch-1")
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def mock_mongo_helper():
+    content_process.clear_total_count_cache()
+    with patch.object(content_process, "CosmosMongDBHelper") as mock:
+        yield mock.return_value
+    content_process.clear_total_count_cache()
+
+
+def _processes(count):
+    imported_time = datetime.datetime(2025, 1, 10, 8, 30)
+    return [
+        {"process_id": f"process-{index}", "imported_time": imported_time}
+        for index in range(count)
+    ]
+
+
+def _get_processes(**kwargs):
+    return CosmosContentProcess.get_all_processes_from_cosmos(
+        connection_string="connstr",
+        database_name="database",
+        collection_name="processes",
+        **kwargs,
+    )
+
+
+def test_get_all_processes_continuation(mock_mongo_helper):
+    mock_mongo_helper.find_document.return_value = _processes(3)
+    mock_mongo_helper.estimated_document_count.return_value = 25
+
+    first_page = _get_processes(page_size=2, page_number=1)
+
+    assert len(first_page.items) == 2
+    assert (first_page.total_count, first_page.total_pages) == (25, 13)
+    assert mock_mongo_helper.find_document.call_args.kwargs["limit"] == 3
+    assert first_page.continuation_token is not None
+
+    mock_mongo_helper.find_document.return_value = _processes(1)
+    second_page = _get_processes(
+        page_size=2, continuation_token=first_page.continuation_token
+    )
+
+    kwargs = mock_mongo_helper.find_document.call_args.kwargs
+    assert kwargs["skip"] == 0
+    assert kwargs["query"]["$or"][1] == {
+        "imported_time": datetime.datetime(2025, 1, 10, 8, 30),
+        "process_id": {"$lt": "process-1"},
+    }
+    assert second_page.current_page == 2
+    assert second_page.continuation_token is None
+    # The total count is estimated once and reused
+    mock_mongo_helper.estimated_document_count.assert_called_once()
+    mock_mongo_helper.count_documents.assert_not_called()
+
+
+def test_get_all_processes_page_number(mock_mongo_helper):
+    mock_mongo_helper.find_document.return_value = _processes(1)
+    _get_processes(page_size=10, page_number=3, include_total_count=False)
+
+    assert mock_mongo_helper.find_document.call_args.kwargs["skip"] == 20
+    mock_mongo_helper.estimated_document_count.assert_not_called()
+
+
+def test_get_all_processes_out_of_range_page(mock_mongo_helper):
+    mock_mongo_helper.find_document.return_value = []
+    mock_mongo_helper.count_documents.return_value = 5
+    query = {"status": {"$in": ["Completed"]}}
+
+    page = _get_processes(page_size=2, page_number=10, query=query)
+
+    assert page.items == []
+    assert (page.total_count, page.total_pages) == (5, 3)
+    assert (page.current_page, page.page_size) == (10, 2)
+    assert page.continuation_token is None
+
+    page = _get_processes(page_size=2, page_number=10, include_total_count=False)
+    assert (page.total_count, page.total_pages) == (None, None)
+
+
+def test_get_all_processes_invalid_continuation_token(mock_mongo_helper):
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        _get_processes(page_size=10, continuation_token="not-a-token")
+
+
+@patch(
+    "app.routers.contentprocessor.CosmosContentProcess.get_all_processes_from_cosmos"
+)
+def test_get_all_processed_results_filters(mock_get_all_processes):
+    mock_get_all_processes.return_value = {
+        "items": [],
+        "current_page": 1,
+        "page_size": 10,
+    }
+
+    response = client.post(
+        "/contentprocessor/processed?status=Completed&status=Error&min_entity_score=0.8",
+        json={"page_number": 1, "page_size": 10},
+    )
+
+    assert response.status_code == 200
+    assert mock_get_all_processes.call_args.kwargs["query"] == {
+        "status": {"$in": ["Completed", "Error"]},
+        "entity_score": {"$gte": 0.8},
+    }
+
+
+def test_process_filter_to_query():
+    process_filter = ProcessFilter(
+        schema_id="schema-1",
+        imported_from=datetime.datetime(
+            2025, 1, 10, 10, tzinfo=datetime.timezone(datetime.timedelta(hours=2))
+        ),
+        imported_to=datetime.datetime(2025, 1, 11),
+        min_schema_score=0.5,
+        file_name_prefix="invoice (1",
+    )
+
+    assert process_filter.to_query() == {
+        "schema_id": "schema-1",
+        "imported_time": {
+            "$gte": datetime.datetime(2025, 1, 10, 8),
+            "$lt": datetime.datetime(2025, 1, 11),
+        },
+        "schema_score": {"$gte": 0.5},
+        "processed_file_name": {"$regex": "^invoice\\ \\(1"},
+    }
+    assert ProcessFilter().to_query() == {}
+
+
+def test_schema_filter_matches_processes_before_save(mock_mongo_helper):
+    # The status documents are written at submit time, before the save step sets target_schema
+    CosmosContentProcess.insert_processes_to_cosmos(
+        processes=[
+            CosmosContentProcess(process_id="process-1", status="processing"),
+            CosmosContentProcess(process_id="process-2", status="Error"),
+        ],
+        batch_id="batch-1",
+        schema_id="schema-1",
+        connection_string="connstr",
+        database_name="database",
+        collection_name="processes",
+    )
+    documents = mock_mongo_helper.insert_documents.call_args.args[0]
+
+    query = ProcessFilter(schema_id="schema-1").to_query()
+    matched = [
+        document["process_id"]
+        for document in documents
+        if all(document.get(field) == value for field, value in query.items())
+    ]
+    assert matched == ["process-1", "process-2"]
+    assert all(document["target_schema"] is None for document in documents)
+
+
+def test_get_all_processes_filtered(mock_mongo_helper):
+    mock_mongo_helper.find_document.return_value = _processes(3)
+    mock_mongo_helper.count_documents.return_value = 5
+    query = {"status": {"$in": ["Completed"]}}
+
+    first_page = _get_processes(page_size=2, query=query)
+    assert first_page.total_count == 5
+    mock_mongo_helper.count_documents.assert_called_once_with(query)
+    mock_mongo_helper.estimated_document_count.assert_not_called()
+
+    _get_processes(
+        page_size=2, query=query, continuation_token=first_page.continuation_token
+    )
+    page_query = mock_mongo_helper.find_document.call_args.kwargs["query"]
+    assert page_query["$and"][0] == query
+    assert "$or" in page_query["$and"][1]
+    # The count of the same filter is reused
+    mock_mongo_helper.count_documents.assert_called_once()
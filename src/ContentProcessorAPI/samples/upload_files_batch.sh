@@ -0,0 +1,55 @@
+#!/bin/bash
+
+# Check if the correct number of arguments is provided
+if [ "$#" -ne 3 ]; then
+    echo "Usage: $0 <API_BATCH_ENDPOINT_URL> <FOLDER_PATH> <SCHEMA_ID>"
+    echo "Example: $0 http://<endpoint>/contentprocessor/submit/batch ./invoices <SCHEMA_ID>"
+    exit 1
+fi
+
+# Assign arguments to variables
+API_ENDPOINT_URL=$1
+FOLDER_PATH=$2
+SCHEMA_ID=$3
+
+# Validate if the folder exists
+if [ ! -d "$FOLDER_PATH" ]; then
+    echo "Error: Folder '$FOLDER_PATH' does not exist."
+    exit 1
+fi
+
+# Create the JSON payload for the data field
+DATA_JSON=$(jq -n --arg Metadata_Id "Meta 001" --arg Schema_Id "$SCHEMA_ID" \
+    '{Metadata_Id: $Metadata_Id, Schema_Id: $Schema_Id}')
+
+# Add every file of the folder to the same request
+FILE_ARGS=()
+for FILE in "$FOLDER_PATH"/*; do
+    if [ -f "$FILE" ]; then
+        FILE_ARGS+=(-F "files=@$FILE;filename=$(basename "$FILE")")
+    fi
+done
+
+if [ "${#FILE_ARGS[@]}" -eq 0 ]; then
+    echo "No files found in the folder '$FOLDER_PATH'."
+    exit 1
+fi
+
+# Invoke the API with multipart/form-data
+RESPONSE=$(curl -s -w "\nHTTP_STATUS:%{http_code}" -X POST "$API_ENDPOINT_URL" \
+    -H "Content-Type: multipart/form-data" \
+    "${FILE_ARGS[@]}" \
+    -F "data=$DATA_JSON")
+
+# Extract HTTP status code
+HTTP_STATUS=$(echo "$RESPONSE" | sed -n 's/.*HTTP_STATUS://p')
+RESPONSE_BODY=$(echo "$RESPONSE" | sed 's/HTTP_STATUS:.*//')
+
+# Print the API response
+if [ "$HTTP_STATUS" -eq 202 ]; then
+    echo "Submitted the batch of $((${#FILE_ARGS[@]} / 2)) files."
+    echo "API Response: $RESPONSE_BODY"
+else
+    echo "Failed to upload the batch. HTTP Status: $HTTP_STATUS"
+    echo "Error Response: $RESPONSE_BODY"
+fi